@@ -0,0 +1,43 @@
+-- ============================================
+-- KHDEMTI SCHEMA - INDEXES UPDATE
+-- ============================================
+-- Run after rating_aggregates_schema.sql.
+--
+-- schema.sql and chat_schema.sql only declare primary keys, so every
+-- per-user list below was a sequential scan of the whole table plus a sort.
+-- Each index matches one SupabaseService query: filter column first, then
+-- the column it orders by, in the order postgrest-dart asks for
+-- (.order(col) is col.desc.nullslast, which plain DESC, i.e. NULLS FIRST,
+-- can't serve in either direction). provider_services(service_id) and
+-- ratings(target_id) are indexed in provider_lookup_schema.sql.
+--
+-- `python -m harness.plans` (testsprite_tests) fails if a query stops
+-- using them.
+
+-- The first version of this file built the two below as plain DESC
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_bookings_customer_created'
+               AND indexdef NOT LIKE '%NULLS LAST%') THEN
+        DROP INDEX idx_bookings_customer_created;
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = 'idx_notifications_user_created'
+               AND indexdef NOT LIKE '%NULLS LAST%') THEN
+        DROP INDEX idx_notifications_user_created;
+    END IF;
+END $$;
+
+-- getMyBookings(): customer_id = me ORDER BY created_at DESC NULLS LAST
+CREATE INDEX IF NOT EXISTS idx_bookings_customer_created ON bookings(customer_id, created_at DESC NULLS LAST);
+
+-- getNotifications(): user_id = me ORDER BY created_at DESC NULLS LAST
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON notifications(user_id, created_at DESC NULLS LAST);
+
+-- getSavedAddresses(): user_id = me
+CREATE INDEX IF NOT EXISTS idx_saved_addresses_user ON saved_addresses(user_id);
+
+-- getMessages(): booking_id = $1 ORDER BY created_at (ASC is NULLS LAST already)
+CREATE INDEX IF NOT EXISTS idx_messages_booking_created ON messages(booking_id, created_at);
+
+-- getProviders() without a service: role = 'provider'
+CREATE INDEX IF NOT EXISTS idx_profiles_role ON profiles(role);
@@ -55,6 +55,13 @@ class UserModel {
   final int? age;
   final DateTime createdAt;
 
+  // Set only on provider listings (get_service_providers), never saved back
+  final double? hourlyRate;
+  final bool? isAvailable;
+  // From the trigger-maintained rating_count/rating_sum on profiles, never saved back
+  final double? ratingAverage;
+  final int? ratingCount;
+
   // Computed property for easy access to rating
   double get rating => manualRating;
   
@@ -84,6 +91,10 @@ class UserModel {
     this.isOnline = false,
     this.age,
     required this.createdAt,
+    this.hourlyRate,
+    this.isAvailable,
+    this.ratingAverage,
+    this.ratingCount,
   });
 
   factory UserModel.fromJson(Map<String, dynamic> json) {
@@ -101,6 +112,11 @@ class UserModel {
       isOnline: json['is_online'] ?? false,
       age: json['age'] as int?,
       createdAt: DateTime.parse(json['created_at'] ?? DateTime.now().toIso8601String()),
+      hourlyRate: (json['hourly_rate'] as num?)?.toDouble(),
+      isAvailable: json['is_available'] as bool?,
+      ratingAverage: (json['rating_avg'] as num?)?.toDouble() ??
+          ((json['rating_count'] ?? 0) > 0 ? (json['rating_sum'] as num) / (json['rating_count'] as num) : null),
+      ratingCount: json['rating_count'] as int?,
     );
   }
 
@@ -147,6 +163,10 @@ class UserModel {
       isOnline: isOnline ?? this.isOnline,
       age: age ?? this.age,
       createdAt: createdAt,
+      hourlyRate: hourlyRate,
+      isAvailable: isAvailable,
+      ratingAverage: ratingAverage,
+      ratingCount: ratingCount,
     );
   }
   
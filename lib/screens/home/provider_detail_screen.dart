@@ -48,6 +48,13 @@ class _ProviderDetailScreenState extends State<ProviderDetailScreen> {
   }
 
   Future<void> _loadRating() async {
+    // Opened from a provider list: the rating came with the row
+    // (called from initState, so no setState needed)
+    if (widget.provider.ratingCount != null) {
+      _rating = widget.provider.ratingAverage ?? 0.0;
+      _isLoadingRating = false;
+      return;
+    }
     try {
       _rating = await _service.getProviderRating(widget.provider.id);
     } catch (e) {
@@ -19,6 +19,12 @@ class _ServiceProvidersScreenState extends State<ServiceProvidersScreen> {
   final SupabaseService _service = SupabaseService();
   List<UserModel> _providers = [];
   bool _isLoading = true;
+  bool _isLoadingMore = false;
+  bool _hasMore = true;
+  bool _loadMoreFailed = false;
+  int _page = 0;
+  // Bumped by every reload, so a page requested before it is dropped
+  int _generation = 0;
 
   @override
   void initState() {
@@ -28,14 +34,44 @@ class _ServiceProvidersScreenState extends State<ServiceProvidersScreen> {
 
   Future<void> _loadProviders() async {
     setState(() => _isLoading = true);
+    final generation = ++_generation;
     try {
-      _providers = await _service.getProviders(serviceId: widget.category.id);
+      _page = 0;
+      _loadMoreFailed = false;
+      final providers = await _service.getProviders(serviceId: widget.category.id);
+      if (generation != _generation) return;
+      _providers = providers;
+      _hasMore = _providers.length == SupabaseService.providersPageSize;
     } catch (e) {
       debugPrint('Error loading providers: ' + e.toString());
     }
     if (mounted) setState(() => _isLoading = false);
   }
 
+  Future<void> _loadMoreProviders() async {
+    if (_isLoadingMore || !_hasMore || _loadMoreFailed) return;
+    setState(() => _isLoadingMore = true);
+    final generation = _generation;
+    try {
+      final next = await _service.getProviders(serviceId: widget.category.id, page: _page + 1);
+      if (generation == _generation) {
+        _page++;
+        _providers = [..._providers, ...next];
+        _hasMore = next.length == SupabaseService.providersPageSize;
+      }
+    } catch (e) {
+      debugPrint('Error loading more providers: ' + e.toString());
+      // Wait for a tap instead of retrying on every frame
+      if (generation == _generation) _loadMoreFailed = true;
+    }
+    if (mounted) setState(() => _isLoadingMore = false);
+  }
+
+  void _retryLoadMore() {
+    setState(() => _loadMoreFailed = false);
+    _loadMoreProviders();
+  }
+
   @override
   Widget build(BuildContext context) {
     return Scaffold(
@@ -81,8 +117,28 @@ class _ServiceProvidersScreenState extends State<ServiceProvidersScreen> {
                   onRefresh: _loadProviders,
                   child: ListView.builder(
                     padding: const EdgeInsets.all(16),
-                    itemCount: _providers.length,
+                    itemCount: _providers.length + (_hasMore ? 1 : 0),
                     itemBuilder: (context, index) {
+                      if (index == _providers.length) {
+                        if (_loadMoreFailed) {
+                          return Padding(
+                            padding: const EdgeInsets.all(16),
+                            child: Center(
+                              child: TextButton.icon(
+                                onPressed: _retryLoadMore,
+                                icon: const Icon(Icons.refresh),
+                                label: const Text('Could not load more providers. Tap to retry'),
+                              ),
+                            ),
+                          );
+                        }
+                        // Reached the end of the loaded page: fetch the next one after this frame
+                        WidgetsBinding.instance.addPostFrameCallback((_) => _loadMoreProviders());
+                        return const Padding(
+                          padding: EdgeInsets.all(16),
+                          child: Center(child: CircularProgressIndicator()),
+                        );
+                      }
                       final p = _providers[index];
                       final name = p.fullName ?? 'Provider';
                       final isOnline = p.isOnline;
@@ -141,7 +197,12 @@ class _ServiceProvidersScreenState extends State<ServiceProvidersScreen> {
                                   Row(
                                     children: [
                                       const Icon(Icons.star, color: Colors.amber, size: 16),
-                                      const Text(' --- ', style: TextStyle(fontSize: 12)),
+                                      Text(
+                                        p.ratingAverage != null
+                                            ? ' ${p.ratingAverage!.toStringAsFixed(1)} (${p.ratingCount}) · '
+                                            : ' --- ',
+                                        style: const TextStyle(fontSize: 12),
+                                      ),
                                       Text(
                                         isOnline ? 'Available' : 'Offline',
                                         style: TextStyle(
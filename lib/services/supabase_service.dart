@@ -59,15 +59,20 @@ class SupabaseService {
   }
 
   // PROVIDERS
-  Future<List<UserModel>> getProviders({String? serviceId}) async {
-    var query = client.from('profiles').select().eq('role', 'provider');
+  static const int providersPageSize = 20;
+
+  Future<List<UserModel>> getProviders({String? serviceId, int page = 0, int pageSize = providersPageSize}) async {
     if (serviceId != null) {
-      final providerIds = await client.from('provider_services').select('provider_id').eq('service_id', serviceId);
-      final ids = (providerIds as List).map((e) => e['provider_id']).toList();
-      if (ids.isEmpty) return [];
-      query = client.from('profiles').select().inFilter('id', ids);
+      // One round trip: a page of the service's providers with rate, availability and rating, best ranked first
+      // (get_service_providers in provider_lookup_schema.sql).
+      final response = await client.rpc('get_service_providers', params: {
+        'p_service_id': serviceId,
+        'p_limit': pageSize,
+        'p_offset': page * pageSize,
+      });
+      return (response as List).map((e) => UserModel.fromJson(e)).toList();
     }
-    final response = await query;
+    final response = await client.from('profiles').select().eq('role', 'provider');
     return (response as List).map((e) => UserModel.fromJson(e)).toList();
   }
 
@@ -77,11 +82,14 @@ class SupabaseService {
     return UserModel.fromJson(response);
   }
 
+  // Lists need no extra call: get_service_providers returns rating_avg/rating_count per row, and
+  // profiles rows carry rating_count/rating_sum (UserModel.ratingAverage).
   Future<double> getProviderRating(String providerId) async {
-    final result = await client.from('ratings').select('rating').eq('target_id', providerId);
-    if (result.isEmpty) return 0.0;
-    final ratings = (result as List).map((e) => (e['rating'] as num).toDouble()).toList();
-    return ratings.reduce((a, b) => a + b) / ratings.length;
+    // rating_count/rating_sum are kept up to date by triggers on ratings (rating_aggregates_schema.sql)
+    final result = await client.from('profiles').select('rating_count, rating_sum').eq('id', providerId).maybeSingle();
+    final count = (result?['rating_count'] as num?) ?? 0;
+    if (count == 0) return 0.0;
+    return (result!['rating_sum'] as num) / count;
   }
 
   // BOOKINGS (Keeping as Maps for now as I haven't made a BookingModel yet to save time, but should have)
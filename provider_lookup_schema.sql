@@ -0,0 +1,65 @@
+-- ============================================
+-- KHDEMTI SCHEMA - PROVIDER LOOKUP UPDATE
+-- ============================================
+-- Run after schema.sql and chat_schema.sql.
+--
+-- getProviders(serviceId:) used to take two round trips: provider_ids from
+-- provider_services, then profiles?id=in.(...) with every id in the URL.
+-- get_service_providers() returns one page of a service's providers, joined
+-- with their rate, availability, online status and rating, best ranked first.
+
+-- Lookups by service, and rating aggregates per provider
+CREATE INDEX IF NOT EXISTS idx_provider_services_service ON provider_services(service_id, provider_id);
+CREATE INDEX IF NOT EXISTS idx_ratings_target ON ratings(target_id);
+
+-- 10. Providers of a service, one page at a time
+-- rank_score: the rating shrunk towards 3.5 by 5 virtual reviews, so one
+-- 5-star review doesn't outrank a hundred 4.8s, plus a bonus for being
+-- available (1), online (0.5) and verified (0.25).
+CREATE OR REPLACE FUNCTION get_service_providers(
+    p_service_id TEXT,
+    p_limit INTEGER DEFAULT 20,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    phone TEXT,
+    full_name TEXT,
+    email TEXT,
+    avatar_url TEXT,
+    age INTEGER,
+    manual_rating DECIMAL(3,1),
+    role TEXT,
+    bio TEXT,
+    is_online BOOLEAN,
+    is_verified BOOLEAN,
+    created_at TIMESTAMPTZ,
+    hourly_rate DECIMAL(10,2),
+    is_available BOOLEAN,
+    rating_avg DECIMAL(3,2),
+    rating_count BIGINT,
+    rank_score DECIMAL(6,3)
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT p.id, p.phone, p.full_name, p.email, p.avatar_url, p.age, p.manual_rating, p.role, p.bio,
+           p.is_online, p.is_verified, p.created_at,
+           ps.hourly_rate, ps.is_available,
+           ROUND(r.total::DECIMAL / NULLIF(r.count, 0), 2),
+           r.count,
+           ROUND((r.total + 3.5 * 5) / (r.count + 5)
+               + CASE WHEN ps.is_available THEN 1 ELSE 0 END
+               + CASE WHEN p.is_online THEN 0.5 ELSE 0 END
+               + CASE WHEN p.is_verified THEN 0.25 ELSE 0 END, 3) AS rank_score
+    FROM provider_services ps
+    JOIN profiles p ON p.id = ps.provider_id
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(SUM(rating), 0) AS total, COUNT(*) AS count FROM ratings WHERE target_id = p.id
+    ) r
+    WHERE ps.service_id = p_service_id
+    ORDER BY rank_score DESC, p.id
+    LIMIT LEAST(GREATEST(p_limit, 1), 100)
+    OFFSET GREATEST(p_offset, 0);
+$$;
+
+GRANT EXECUTE ON FUNCTION get_service_providers(TEXT, INTEGER, INTEGER) TO anon, authenticated;
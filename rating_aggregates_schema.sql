@@ -0,0 +1,163 @@
+-- ============================================
+-- KHDEMTI SCHEMA - RATING AGGREGATES UPDATE
+-- ============================================
+-- Run after provider_lookup_schema.sql.
+--
+-- getProviderRating used to download every ratings row of a provider and
+-- average them in Dart. Each profile now carries rating_count/rating_sum,
+-- kept up to date by statement-level triggers on ratings, so a rating is one
+-- small read and a page of providers needs one call.
+
+-- Per-provider rating totals (average = rating_sum / rating_count)
+ALTER TABLE profiles
+    ADD COLUMN IF NOT EXISTS rating_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS rating_sum INTEGER NOT NULL DEFAULT 0;
+
+-- ============================================
+-- KEEP THE TOTALS IN STEP WITH RATINGS
+-- ============================================
+-- One UPDATE per statement, grouped by provider, so bulk inserts and
+-- deletes don't touch a profile once per row. SECURITY DEFINER: the rater
+-- may not update the rated provider's profile under its own RLS.
+CREATE OR REPLACE FUNCTION public.apply_rating_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE profiles p
+        SET rating_count = p.rating_count - d.count, rating_sum = p.rating_sum - d.total
+        FROM (
+            SELECT target_id, COUNT(*) AS count, SUM(rating) AS total
+            FROM old_ratings
+            WHERE target_id IS NOT NULL AND rating IS NOT NULL
+            GROUP BY target_id
+        ) d
+        WHERE p.id = d.target_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE profiles p
+        SET rating_count = p.rating_count + d.count, rating_sum = p.rating_sum + d.total
+        FROM (
+            SELECT target_id, COUNT(*) AS count, SUM(rating) AS total
+            FROM new_ratings
+            WHERE target_id IS NOT NULL AND rating IS NOT NULL
+            GROUP BY target_id
+        ) d
+        WHERE p.id = d.target_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS ratings_aggregate_insert ON ratings;
+DROP TRIGGER IF EXISTS ratings_aggregate_update ON ratings;
+DROP TRIGGER IF EXISTS ratings_aggregate_delete ON ratings;
+
+CREATE TRIGGER ratings_aggregate_insert
+    AFTER INSERT ON ratings REFERENCING NEW TABLE AS new_ratings
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_rating_changes();
+CREATE TRIGGER ratings_aggregate_update
+    AFTER UPDATE ON ratings REFERENCING OLD TABLE AS old_ratings NEW TABLE AS new_ratings
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_rating_changes();
+CREATE TRIGGER ratings_aggregate_delete
+    AFTER DELETE ON ratings REFERENCING OLD TABLE AS old_ratings
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_rating_changes();
+
+-- Only the triggers above may change the totals. profiles_insert and
+-- profiles_update let users write their own row, so any other write keeps
+-- the stored values (a REVOKE on the columns would not beat the table grant).
+CREATE OR REPLACE FUNCTION public.protect_rating_totals()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Depth 1: a client's own statement. apply_rating_changes() runs us at depth 2.
+    IF pg_trigger_depth() < 2 THEN
+        IF TG_OP = 'INSERT' THEN
+            NEW.rating_count := 0;
+            NEW.rating_sum := 0;
+        ELSE
+            NEW.rating_count := OLD.rating_count;
+            NEW.rating_sum := OLD.rating_sum;
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Dropped around the backfill, which is a direct write too.
+DROP TRIGGER IF EXISTS profiles_protect_rating_totals ON profiles;
+
+-- Backfill from the ratings already there (safe to re-run)
+UPDATE profiles p
+SET rating_count = s.count, rating_sum = s.total
+FROM (
+    SELECT pr.id, COUNT(r.rating) AS count, COALESCE(SUM(r.rating), 0) AS total
+    FROM profiles pr
+    LEFT JOIN ratings r ON r.target_id = pr.id
+    GROUP BY pr.id
+) s
+WHERE p.id = s.id
+  AND (p.rating_count, p.rating_sum) IS DISTINCT FROM (s.count::INTEGER, s.total::INTEGER);
+
+CREATE TRIGGER profiles_protect_rating_totals
+    BEFORE INSERT OR UPDATE OF rating_count, rating_sum ON profiles
+    FOR EACH ROW EXECUTE FUNCTION public.protect_rating_totals();
+
+-- ============================================
+-- READ THE TOTALS
+-- ============================================
+
+-- 10. get_service_providers() from provider_lookup_schema.sql, reading the
+-- totals instead of aggregating every provider's ratings per call
+CREATE OR REPLACE FUNCTION get_service_providers(
+    p_service_id TEXT,
+    p_limit INTEGER DEFAULT 20,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    phone TEXT,
+    full_name TEXT,
+    email TEXT,
+    avatar_url TEXT,
+    age INTEGER,
+    manual_rating DECIMAL(3,1),
+    role TEXT,
+    bio TEXT,
+    is_online BOOLEAN,
+    is_verified BOOLEAN,
+    created_at TIMESTAMPTZ,
+    hourly_rate DECIMAL(10,2),
+    is_available BOOLEAN,
+    rating_avg DECIMAL(3,2),
+    rating_count BIGINT,
+    rank_score DECIMAL(6,3)
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT p.id, p.phone, p.full_name, p.email, p.avatar_url, p.age, p.manual_rating, p.role, p.bio,
+           p.is_online, p.is_verified, p.created_at,
+           ps.hourly_rate, ps.is_available,
+           ROUND(p.rating_sum::DECIMAL / NULLIF(p.rating_count, 0), 2),
+           p.rating_count::BIGINT,
+           ROUND((p.rating_sum + 3.5 * 5) / (p.rating_count + 5)
+               + CASE WHEN ps.is_available THEN 1 ELSE 0 END
+               + CASE WHEN p.is_online THEN 0.5 ELSE 0 END
+               + CASE WHEN p.is_verified THEN 0.25 ELSE 0 END, 3) AS rank_score
+    FROM provider_services ps
+    JOIN profiles p ON p.id = ps.provider_id
+    WHERE ps.service_id = p_service_id
+    ORDER BY rank_score DESC, p.id
+    LIMIT LEAST(GREATEST(p_limit, 1), 100)
+    OFFSET GREATEST(p_offset, 0);
+$$;
+
+-- 11. Ratings for a page of providers in one call
+CREATE OR REPLACE FUNCTION get_provider_ratings(p_provider_ids UUID[])
+RETURNS TABLE (provider_id UUID, rating_count INTEGER, rating_avg DECIMAL(3,2))
+LANGUAGE sql STABLE
+AS $$
+    SELECT p.id, p.rating_count, ROUND(p.rating_sum::DECIMAL / NULLIF(p.rating_count, 0), 2)
+    FROM profiles p
+    WHERE p.id = ANY(p_provider_ids);
+$$;
+
+GRANT EXECUTE ON FUNCTION get_provider_ratings(UUID[]) TO anon, authenticated;
@@ -0,0 +1,82 @@
+-- ============================================
+-- KHDEMTI SCHEMA - ROW LEVEL SECURITY UPDATE
+-- ============================================
+-- Run after indexes_schema.sql.
+--
+-- The admin check in the profiles and bookings policies looked the caller's
+-- profile up inside the policy, and messages_select probed bookings (through
+-- the bookings policies) for every message row. The checks now go through
+-- STABLE SECURITY DEFINER helpers wrapped in (SELECT ...), which Postgres
+-- runs once per statement instead of once per row; being SECURITY DEFINER,
+-- they also skip the RLS of the tables they read. Who can see and change
+-- what is unchanged.
+
+-- Caller's bookings as a provider (as a customer: idx_bookings_customer_created)
+CREATE INDEX IF NOT EXISTS idx_bookings_provider ON bookings(provider_id);
+
+-- ============================================
+-- HELPERS
+-- ============================================
+
+-- Is the caller an admin or the super admin?
+CREATE OR REPLACE FUNCTION public.is_admin()
+RETURNS BOOLEAN
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+    SELECT EXISTS (SELECT 1 FROM profiles WHERE id = auth.uid() AND role IN ('admin', 'super_admin'));
+$$;
+
+-- Bookings the caller is the customer or the provider of
+CREATE OR REPLACE FUNCTION public.my_booking_ids()
+RETURNS SETOF UUID
+LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public
+AS $$
+    SELECT id FROM bookings WHERE customer_id = auth.uid() OR provider_id = auth.uid();
+$$;
+
+GRANT EXECUTE ON FUNCTION public.is_admin() TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.my_booking_ids() TO anon, authenticated;
+
+-- ============================================
+-- POLICIES
+-- ============================================
+
+-- Profiles
+DROP POLICY IF EXISTS "profiles_update" ON profiles;
+DROP POLICY IF EXISTS "profiles_delete" ON profiles;
+CREATE POLICY "profiles_update" ON profiles FOR UPDATE
+    USING ((SELECT auth.uid()) = id OR (SELECT public.is_admin()));
+CREATE POLICY "profiles_delete" ON profiles FOR DELETE
+    USING ((SELECT public.is_admin()));
+
+-- The admin policies supabase_migration.sql adds, where it was applied
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_policies WHERE tablename = 'profiles' AND policyname = 'Admin can view all profiles') THEN
+        DROP POLICY "Admin can view all profiles" ON profiles;
+        CREATE POLICY "Admin can view all profiles" ON profiles FOR SELECT USING ((SELECT public.is_admin()));
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_policies WHERE tablename = 'profiles' AND policyname = 'Admin can update all profiles') THEN
+        DROP POLICY "Admin can update all profiles" ON profiles;
+        CREATE POLICY "Admin can update all profiles" ON profiles FOR UPDATE USING ((SELECT public.is_admin()));
+    END IF;
+END $$;
+
+-- Bookings
+DROP POLICY IF EXISTS "bookings_select" ON bookings;
+DROP POLICY IF EXISTS "bookings_insert" ON bookings;
+DROP POLICY IF EXISTS "bookings_update" ON bookings;
+CREATE POLICY "bookings_select" ON bookings FOR SELECT
+    USING ((SELECT auth.uid()) = customer_id OR (SELECT auth.uid()) = provider_id OR (SELECT public.is_admin()));
+CREATE POLICY "bookings_insert" ON bookings FOR INSERT
+    WITH CHECK ((SELECT auth.uid()) = customer_id);
+CREATE POLICY "bookings_update" ON bookings FOR UPDATE
+    USING ((SELECT auth.uid()) = customer_id OR (SELECT auth.uid()) = provider_id OR (SELECT public.is_admin()));
+
+-- Messages
+DROP POLICY IF EXISTS "messages_select" ON messages;
+DROP POLICY IF EXISTS "messages_insert" ON messages;
+CREATE POLICY "messages_select" ON messages FOR SELECT
+    USING ((SELECT auth.uid()) = sender_id OR booking_id IN (SELECT public.my_booking_ids()));
+CREATE POLICY "messages_insert" ON messages FOR INSERT
+    WITH CHECK ((SELECT auth.uid()) = sender_id);
@@ -1,5 +1,8 @@
 import asyncio
 from playwright import async_api
+from playwright.async_api import expect
+
+from harness.semantics import tap
 
 async def run_test():
     pw = None
@@ -48,23 +51,8 @@ async def run_test():
         # -> Navigate to http://localhost:55372
         await page.goto("http://localhost:55372", wait_until="commit", timeout=10000)
         
-        # -> Open the flutter-view shadow root so the onboarding buttons (Skip/Next) become accessible, then click the Skip button.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Open the flutter-view shadow root so the Skip button becomes accessible, then click the Skip button (first open the shadow host).
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Open the flutter-view shadow root by clicking the flutter-view host (index 983) so the onboarding controls become accessible, then click the Skip button (next step after this click).
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # -> Click the onboarding Skip button through the Flutter semantics tree.
+        await tap(page, "Skip")
         
         # --> Assertions to verify final state
         frame = context.pages[-1]
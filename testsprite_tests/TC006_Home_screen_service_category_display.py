@@ -1,6 +1,9 @@
 import asyncio
 from playwright import async_api
 
+from harness.semantics import scroll_to, semantic, tap
+from harness.throttle import budget
+
 async def run_test():
     pw = None
     browser = None
@@ -48,36 +51,26 @@ async def run_test():
         # -> Navigate to http://localhost:55372
         await page.goto("http://localhost:55372", wait_until="commit", timeout=10000)
         
-        # -> Click the visible onboarding 'Next' control (tap the Flutter root) to advance to the next onboarding slide and ultimately reach the home screen.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Click the onboarding 'Next' control by clicking the flutter-view root again to advance to the next onboarding slide or reach the home screen.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Click the onboarding 'Next' control (flutter-view index 984) one more time to advance onboarding; after the page updates, re-scan the page for the 12 predefined categories and verify exactly 12 are displayed in a grid.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Focus the phone input by clicking the flutter-view, enter a test phone number (612345678) and press Enter to send code, wait 2s, then scan the page DOM for the 12 predefined service categories and report counts/details.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Submit the phone number (activate 'Send Code'), wait for the app to update, then run a DOM scan to detect and count the 12 predefined categories and return the findings.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+        # -> Enter demo mode to reach the home screen.
+        await tap(page, "Skip for Now (Demo Mode)", settle=False)
+
+        # -> Under a throttle profile the category grid must show within its budget.
+        async with budget(page, "home_categories", since_navigation=True):
+            await semantic(page, "Plumber", exact=False).wait_for()
+
+        # --> Assertions to verify final state
+        # Every predefined category in lib/utils/data.dart, in grid order; labels
+        # also carry the icon, hence exact=False.
+        categories = [
+            "Plumber", "Electrician", "Carpenter", "AC & Cooling", "Painter", "Roofer",
+            "Locksmith", "Handyman", "Cleaning", "Carpet Clean", "Window Clean", "Laundry",
+            "Gardening", "PC Repair", "Phone Repair", "TV Setup", "WiFi & Net", "Barber",
+            "Makeup", "Tailor", "Fitness", "Car Mechanic", "Moto Repair", "Tire Service",
+            "Grocery", "Food Delivery", "Courier", "Shopping", "Solar Panel", "HVAC",
+            "CCTV Install", "Water Tank", "Vet Visits", "Pet Grooming",
+        ]
+        for category in categories:
+            await scroll_to(page, category, exact=False)
         await asyncio.sleep(5)
 
     finally:
@@ -1,6 +1,10 @@
 import asyncio
 from playwright import async_api
 
+from harness.semantics import semantic, tap
+from harness.viewports import sweep
+from harness.visual import expect_screen
+
 async def run_test():
     pw = None
     browser = None
@@ -48,15 +52,19 @@ async def run_test():
         # -> Navigate to http://localhost:55372
         await page.goto("http://localhost:55372", wait_until="commit", timeout=10000)
         
-        # -> Force a reload of the app (cache-bypass) to attempt to load SPA assets, then wait and run a detailed DOM/style inspection to detect any zellij rendering elements (computed backgrounds, canvases, images, svgs, and elements with 'zellij' in id/class). If the reload still fails, plan next: emulate multiple viewports/orientations and re-check rendering.
-        await page.goto("http://localhost:55372/?_reload=1", wait_until="commit", timeout=10000)
+        # -> Enter demo mode and open Urgent Help, a screen drawn on ZellijBackground, through the Flutter semantics tree.
+        await tap(page, "Skip for Now (Demo Mode)", settle=False)
+        await tap(page, "URGENT", settle=False)
+        await semantic(page, "Urgent Help").wait_for()
         
-        # --> Assertions to verify final state
-        frame = context.pages[-1]
-        try:
-            await expect(frame.locator('text=Zellij background rendered correctly').first).to_be_visible(timeout=3000)
-        except AssertionError:
-            raise AssertionError("Test case failed: expected the Moroccan Zellij tile background to render fully and maintain correct proportions across multiple device resolutions and orientations (no clipping, distortion, or misalignment), but the success text/element was not found — the background may be missing, clipped, or distorted after viewport or orientation changes.")
+        # --> Assertions to verify final state, at every device size and orientation
+        await sweep(
+            page,
+            "TC014",
+            check=lambda page, profile: expect_screen(
+                page, f"TC014_urgent_help_{profile.name}", palette=["backgroundOffWhite"]
+            ),
+        )
         await asyncio.sleep(5)
 
     finally:
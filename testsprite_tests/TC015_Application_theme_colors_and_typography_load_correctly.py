@@ -1,6 +1,9 @@
 import asyncio
 from playwright import async_api
 
+from harness.semantics import enable_semantics, semantic
+from harness.visual import expect_screen
+
 async def run_test():
     pw = None
     browser = None
@@ -48,66 +51,14 @@ async def run_test():
         # -> Navigate to http://localhost:55372
         await page.goto("http://localhost:55372", wait_until="commit", timeout=10000)
         
-        # -> Open the flutter-view shadow root so computed styles (colors, gradients, font-family, font-size, box-shadow) for the visible heading and the Next button can be extracted and validated against the Moroccan-inspired MD3 theme.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Click the flutter-view element to ensure the shadow root is open, then run an in-page JS evaluate to extract computed styles (color, font-family, font-size, font-weight, box-shadow, border-radius, background) for the visible heading and the Next button inside the shadow root, and collect MD3 CSS variables on the flutter-view host and document.fonts checks for target Google Fonts.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Open the flutter-view element (ensure shadowRoot is accessible) and programmatically click the Next button inside the shadow root to advance to the next onboarding screen. After page update, extract computed styles for heading and Next button (this extraction will be attempted after navigation).
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Click the flutter-view element (index 985) to open/access the shadow root and attempt to advance the onboarding by triggering the Next button inside it. This is the immediate action; after the click, page state will be re-evaluated and computed-style extraction will be attempted.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Click the flutter-view probe to ensure the shadow root is exposed, then run an in-page JS evaluate to extract computed styles for the visible heading and the Next button inside the flutter-view (colors, font-family, font-size, font-weight, box-shadow, border-radius, background) and read MD3 CSS variables on the flutter-view host plus check document.fonts for target Google Fonts.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Ensure shadowRoot access, extract computed styles for the hero heading and Next button on the current onboarding screen, then programmatically click Next to navigate to the next onboarding screen (page state will change). Proceed only until that navigation occurs.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Try to activate the Next button by focusing the flutter-view and sending an Enter keystroke (click flutter-view to focus, then send Enter). If the page advances, wait and then run extraction (in a subsequent step).
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Focus the flutter-view, send the Enter key to activate the Next control and advance to onboarding page 2, then wait briefly for the UI to update so subsequent style extraction can run.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-        # -> Focus the flutter-view and send the Enter key to try to activate the Next button and advance to onboarding page 2, then wait briefly for the UI to update.
-        frame = context.pages[-1]
-        # Click element
-        elem = frame.locator('xpath=html/body/flutter-view').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        # -> Wait for the start screen to render its Login button through the Flutter semantics tree.
+        await enable_semantics(page)
+        await semantic(page, "Login", role="button").wait_for()
         
         # --> Assertions to verify final state
-        frame = context.pages[-1]
-        try:
-            await expect(frame.locator('text=Moroccan Material Theme Loaded').first).to_be_visible(timeout=3000)
-        except AssertionError:
-            raise AssertionError("Test case failed: The test attempted to verify that the Moroccan-inspired Material Design 3 theme (colors, gradients, MD3 CSS variables) and Google Fonts rendered correctly across the app, but the expected success indicator 'Moroccan Material Theme Loaded' was not visible. This indicates the theme or fonts may not have applied, shadow-root styles were inaccessible, or navigation to the screen showing the indicator failed.")
+        await expect_screen(
+            page, "TC015_start_screen", palette=["primaryRedDark", "backgroundWhite", "textDark"]
+        )
         await asyncio.sleep(5)
 
     finally:
@@ -0,0 +1,29 @@
+"""Shared execution harness for the generated TestSprite TC scripts.
+
+The TCxxx_*.py files are generated by TestSprite and still run on their own;
+the harness imports their ``run_test`` coroutines and drives them with
+shared browsers instead of one cold Chromium launch per script.
+
+Run from the ``testsprite_tests`` directory::
+
+    python -m harness                 # whole suite
+    python -m harness TC004 TC005     # selected tests
+"""
+
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = TESTS_DIR.parent
+TMP_DIR = TESTS_DIR / "tmp"
+RESULTS_PATH = TMP_DIR / "test_results.json"
+
+APP_URL = "http://localhost:55372"
+
+# Same flags the generated scripts launch with, minus ``--single-process``:
+# a pooled browser hosts many contexts over its lifetime, and Chromium's
+# single-process mode is not stable across repeated context teardown.
+LAUNCH_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+]
@@ -0,0 +1,218 @@
+"""Command-line entry point for the shared-browser TC runner."""
+
+import argparse
+import asyncio
+import os
+import sys
+from contextlib import nullcontext
+
+from . import RESULTS_PATH
+from .app_build import build_hash
+from .auth_state import TEST_ROLES, prepare_snapshots, storage_states_for
+from .capture import CaptureSettings
+from .impact import select_changed
+from .loader import discover
+from .preflight import run_preflight
+from .prefix_tree import run_tree
+from .profile import write_summary
+from .report import ReportRenderer
+from .results import historical_durations
+from .results_log import last_runs, materialize, open_log
+from .runner import RunOptions, format_outcome, run_suite
+from .schedule import flaky_tests, history_durations, load_history, update_history
+from .shard import estimate_durations, run_sharded
+from .throttle import PROFILES as THROTTLE_PROFILES, THROTTLE_ENV
+from .viewports import VIEWPORTS_ENV, selected_profiles
+from .visual import UPDATE_ENV
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m harness", description=__doc__)
+    parser.add_argument("tests", nargs="*", help="TC ids to run, e.g. TC004 TC005 (default: all)")
+    parser.add_argument(
+        "--changed-since", metavar="REV",
+        help="only run tests whose features touch files changed since this git revision",
+    )
+    parser.add_argument("-w", "--workers", type=int, default=1, help="warm browsers in the pool")
+    parser.add_argument(
+        "-n", "--shards", type=int, default=1,
+        help="worker processes, each with its own browser, balanced by past durations",
+    )
+    parser.add_argument(
+        "--share-prefixes", action="store_true",
+        help="run the scripts' common leading steps once and fork the page for the rest",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=0, metavar="N",
+        help="rerun up to N transient failures (timeouts, dropped browsers) per run",
+    )
+    parser.add_argument(
+        "--fixed-waits", action="store_true",
+        help="keep the scripts' fixed sleeps instead of waiting for Flutter to settle",
+    )
+    parser.add_argument(
+        "--no-semantics", action="store_true",
+        help="don't switch on the Flutter accessibility tree in every page",
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="serve Supabase auth and REST from an in-process stand-in (OTP 123456)",
+    )
+    parser.add_argument(
+        "--asset-cache", action="store_true",
+        help="record the build's static assets once and replay them from memory",
+    )
+    parser.add_argument(
+        "--auth-state", action="store_true",
+        help="start role-mapped tests from saved per-role sign-in snapshots",
+    )
+    parser.add_argument(
+        "--capture-failures", action="store_true",
+        help="keep each test's last frames in memory and save them to tmp/failures/ if it fails",
+    )
+    parser.add_argument(
+        "--capture-depth", type=int, default=CaptureSettings.depth, metavar="N",
+        help=f"frames kept per test with --capture-failures (default {CaptureSettings.depth})",
+    )
+    parser.add_argument(
+        "--capture-quality", type=int, default=CaptureSettings.quality, metavar="Q",
+        help=f"JPEG quality of captured frames (default {CaptureSettings.quality})",
+    )
+    parser.add_argument(
+        "--capture-trace", action="store_true",
+        help="with --capture-failures, also save a Playwright trace of failing tests",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="write a per-test timing breakdown to tmp/profiles/",
+    )
+    parser.add_argument(
+        "--skip-preflight", action="store_true",
+        help="don't check that the app's assets and backend are reachable first",
+    )
+    parser.add_argument(
+        "--report", action="store_true",
+        help="keep the MCP markdown/HTML reports up to date while tests finish",
+    )
+    parser.add_argument(
+        "--update-baselines", action="store_true",
+        help="record the screenshots visual checks compare against instead of comparing",
+    )
+    parser.add_argument(
+        "--viewports", metavar="NAMES",
+        help="comma-separated device profiles for viewport sweeps (default: all, see harness.viewports)",
+    )
+    parser.add_argument(
+        "--throttle", choices=THROTTLE_PROFILES, metavar="PROFILE",
+        help=f"emulate a slower network and CPU and enforce its latency budgets ({', '.join(THROTTLE_PROFILES)})",
+    )
+    parser.add_argument("--headed", action="store_true", help="show the browser windows")
+    parser.add_argument("--results", default=str(RESULTS_PATH), help="results file to update")
+    parser.add_argument("--no-write", action="store_true", help="don't update the results file")
+    return parser.parse_args(argv)
+
+
+def print_profile_summary(totals):
+    overall = sum(totals.values()) or 1.0
+    print("Time by step type (all tests):")
+    for category, seconds in totals.items():
+        print(f"  {category:<12} {seconds:8.1f}s  {100 * seconds / overall:5.1f}%")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = discover(only=set(args.tests) or None)
+    if not cases:
+        print("No TC scripts matched.", file=sys.stderr)
+        return 2
+    if args.changed_since:
+        selection = select_changed(args.changed_since)
+        for reason in selection.reasons:
+            print(f"impact: {reason}")
+        if not selection.full:
+            cases = [case for case in cases if case.tc_id in selection.tc_ids]
+            if not cases:
+                print(f"No tests affected by changes since {args.changed_since}.")
+                return 0
+
+    if args.update_baselines:
+        # Read by harness.visual in this process and in shard workers.
+        os.environ[UPDATE_ENV] = "1"
+    if args.viewports:
+        try:
+            selected_profiles(args.viewports.split(","))
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+        os.environ[VIEWPORTS_ENV] = args.viewports
+    if args.throttle:
+        # Read by harness.throttle.budget() in the scripts.
+        os.environ[THROTTLE_ENV] = args.throttle
+
+    options = RunOptions(
+        headless=not args.headed,
+        fixed_waits=args.fixed_waits,
+        semantics=not args.no_semantics,
+        offline=args.offline,
+        profile=args.profile,
+        retries=args.retries,
+        history=load_history(),
+        throttle=args.throttle,
+    )
+    if args.capture_failures:
+        options.capture = CaptureSettings(
+            depth=args.capture_depth, quality=args.capture_quality, trace=args.capture_trace
+        )
+    if not args.skip_preflight:
+        report = asyncio.run(run_preflight(check_backend=not args.offline, headless=options.headless))
+        print(report.diagnosis())
+        if not report.ok:
+            return 3
+    if args.asset_cache:
+        options.asset_cache = build_hash()
+    if args.auth_state:
+        roles = {TEST_ROLES[case.tc_id] for case in cases if case.tc_id in TEST_ROLES}
+        snapshots = asyncio.run(prepare_snapshots(roles, headless=options.headless))
+        options.storage_states = storage_states_for(cases, snapshots)
+
+    if not args.no_write:
+        options.results_log = str(open_log(args.results))
+    reporter = ReportRenderer(args.results) if args.report and not args.no_write else None
+    history = {
+        **historical_durations(last_runs(args.results)),
+        **history_durations(options.history),
+    }
+    with reporter.following([case.tc_id for case in cases]) if reporter else nullcontext():
+        if args.share_prefixes:
+            outcomes = asyncio.run(
+                run_tree(cases, options=options, on_outcome=lambda o: print(format_outcome(o)))
+            )
+        elif args.shards > 1:
+            outcomes = run_sharded(cases, args.shards, history=history, options=options)
+        else:
+            outcomes = asyncio.run(
+                run_suite(
+                    cases,
+                    workers=args.workers,
+                    options=options,
+                    on_outcome=lambda o: print(format_outcome(o)),
+                    estimates=estimate_durations(cases, history),
+                )
+            )
+
+    if not args.no_write:
+        materialize(args.results, cases)
+        flaky = flaky_tests(update_history(outcomes))
+        for tc_id in sorted(flaky.keys() & {case.tc_id for case in cases}):
+            print(f"flaky: {tc_id} ({flaky[tc_id]:.0%} of recent runs)")
+
+    if args.profile:
+        print_profile_summary(write_summary({o.tc_id: o.profile for o in outcomes if o.profile}))
+
+    failed = sum(not o.passed for o in outcomes)
+    print(f"{len(outcomes) - failed} passed, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""Identify the web build served at the app URL."""
+
+import hashlib
+import urllib.error
+import urllib.request
+
+from . import APP_URL
+
+# Files whose content identifies a web build.
+BUILD_FILES = ("index.html", "flutter_bootstrap.js", "main.dart.js")
+
+
+def build_hash(app_url=APP_URL, timeout=5) -> str:
+    """Short content hash of the build currently served at ``app_url``."""
+    digest = hashlib.sha256()
+    for name in BUILD_FILES:
+        try:
+            with urllib.request.urlopen(f"{app_url}/{name}", timeout=timeout) as response:
+                digest.update(name.encode())
+                digest.update(response.read())
+        except urllib.error.HTTPError:
+            continue
+    return digest.hexdigest()[:16]
@@ -0,0 +1,125 @@
+"""Record/replay cache for the Flutter web build's static assets.
+
+Every fresh context downloads ``flutter_bootstrap.js``, ``main.dart.js``,
+``dart_sdk.js``, the DDC module loader, CanvasKit and fonts from the app
+server again. With ``--asset-cache`` the first response for each asset URL
+is recorded, and later requests from any test are fulfilled from memory
+through ``context.route``.
+
+Recordings are keyed by the build hash (see :mod:`harness.app_build`) and
+persisted under ``tmp/asset_cache/``: one ``<build>.json`` index of URL ->
+status, content type and body digest, and the bodies themselves stored once
+per SHA-256 digest in ``blobs/``, so unchanged files are shared between
+builds. A new build starts a new index and records again.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from . import APP_URL, TMP_DIR
+
+ASSET_CACHE_DIR = TMP_DIR / "asset_cache"
+
+# Documents (index.html and SPA routes) are always fetched so navigation
+# behaves normally; everything else from the app origin is cacheable.
+CACHED_RESOURCE_TYPES = {"script", "stylesheet", "image", "font", "fetch", "xhr", "manifest", "other"}
+
+
+@dataclass
+class CachedAsset:
+    status: int
+    content_type: str
+    digest: str
+    body: bytes = b""
+
+
+class AssetCache:
+    def __init__(self, build, directory=ASSET_CACHE_DIR, app_url=APP_URL):
+        self.build = build
+        self.directory = directory
+        self.origin = urlsplit(app_url).netloc
+        self.assets = {}
+        self.recorded = 0
+        self.replayed = 0
+        self._load()
+
+    @property
+    def index_path(self):
+        return self.directory / f"{self.build}.json"
+
+    def _blob_path(self, digest):
+        return self.directory / "blobs" / digest
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as fh:
+                index = json.load(fh)
+        except FileNotFoundError:
+            return
+        for url, entry in index.items():
+            try:
+                body = self._blob_path(entry["digest"]).read_bytes()
+            except FileNotFoundError:
+                continue
+            self.assets[url] = CachedAsset(entry["status"], entry["contentType"], entry["digest"], body)
+
+    def save(self):
+        """Write new blobs and merge this process's entries into the build index."""
+        (self.directory / "blobs").mkdir(parents=True, exist_ok=True)
+        try:
+            with open(self.index_path, encoding="utf-8") as fh:
+                index = json.load(fh)
+        except FileNotFoundError:
+            index = {}
+        for url, asset in self.assets.items():
+            blob = self._blob_path(asset.digest)
+            if not blob.exists():
+                blob.write_bytes(asset.body)
+            index[url] = {"status": asset.status, "contentType": asset.content_type, "digest": asset.digest}
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(index, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        os.replace(tmp_path, self.index_path)
+
+    def cacheable(self, request) -> bool:
+        return (
+            request.method == "GET"
+            and request.resource_type in CACHED_RESOURCE_TYPES
+            and urlsplit(request.url).netloc == self.origin
+        )
+
+    async def handle(self, route, request):
+        asset = self.assets.get(request.url)
+        if asset is not None:
+            self.replayed += 1
+            await route.fulfill(
+                status=asset.status, headers={"content-type": asset.content_type}, body=asset.body
+            )
+            return
+        response = await route.fetch()
+        body = await response.body()
+        if response.status == 200:
+            self.assets[request.url] = CachedAsset(
+                response.status,
+                response.headers.get("content-type", "application/octet-stream"),
+                hashlib.sha256(body).hexdigest(),
+                body,
+            )
+            self.recorded += 1
+        await route.fulfill(response=response, body=body)
+
+    async def install(self, context):
+        """Context hook: serve the app's static assets from this cache."""
+        origin = f"{urlsplit(APP_URL).scheme}://{self.origin}/**"
+
+        async def route_asset(route, request):
+            if self.cacheable(request):
+                await self.handle(route, request)
+            else:
+                await route.fallback()
+
+        await context.route(origin, route_asset)
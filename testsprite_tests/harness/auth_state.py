@@ -0,0 +1,185 @@
+"""Per-role storage-state snapshots so tests start already signed in.
+
+TC007–TC013 each replay onboarding and a login before reaching the screen
+they test. With ``--auth-state`` the harness instead signs in once per role,
+saves the Playwright storage state (localStorage, which holds the app's
+SharedPreferences keys, plus the IndexedDB where Firebase Auth keeps its
+session) under ``tmp/auth_state/<role>.json``, and opens each mapped test's
+context from that snapshot.
+
+TC006 is not mapped: it taps "Skip for Now (Demo Mode)" itself and times the
+trip from the start screen to the category grid (``home_categories``), so it
+always starts signed out.
+
+Snapshots record the build hash of the served app and are redone when it
+changes. Real accounts are taken from ``KHDEMTI_<ROLE>_EMAIL`` and
+``KHDEMTI_<ROLE>_PASSWORD``; without them the customer falls back to the
+app's demo mode and the admin to its local admin session.
+"""
+
+import asyncio
+import json
+import os
+
+from . import APP_URL, TMP_DIR
+from .app_build import build_hash
+from .flutter import settle_waits, wait_for_flutter_settled
+from .pool import BrowserPool
+from .semantics import enable_semantics, semantics_on, tap
+
+AUTH_STATE_DIR = TMP_DIR / "auth_state"
+MANIFEST_PATH = AUTH_STATE_DIR / "manifest.json"
+
+# Which signed-in role each test starts as.
+TEST_ROLES = {
+    "TC007": "customer",
+    "TC008": "customer",
+    "TC009": "customer",
+    "TC010": "customer",
+    "TC011": "customer",
+    "TC012": "admin",
+    "TC013": "provider",
+}
+
+
+class SnapshotError(RuntimeError):
+    pass
+
+
+def credentials(role):
+    prefix = f"KHDEMTI_{role.upper()}_"
+    email, password = os.environ.get(prefix + "EMAIL"), os.environ.get(prefix + "PASSWORD")
+    return (email, password) if email and password else None
+
+
+async def _set_preference(page, key, value):
+    # shared_preferences on the web stores JSON-encoded values under "flutter.<key>".
+    await page.evaluate(
+        "([key, value]) => localStorage.setItem('flutter.' + key, JSON.stringify(value))",
+        [key, value],
+    )
+
+
+async def email_login(page, email, password):
+    await tap(page, "Login")
+    fields = page.get_by_role("textbox")
+    await fields.nth(0).fill(email)
+    await fields.nth(1).fill(password)
+    await tap(page, "Sign In")
+
+
+async def login_customer(page):
+    account = credentials("customer")
+    if account:
+        await email_login(page, *account)
+    else:
+        await tap(page, "Skip for Now", exact=False)
+
+
+async def login_provider(page):
+    account = credentials("provider")
+    if not account:
+        raise SnapshotError("provider snapshot needs KHDEMTI_PROVIDER_EMAIL/PASSWORD")
+    await email_login(page, *account)
+
+
+async def login_admin(page):
+    account = credentials("admin")
+    if account:
+        await email_login(page, *account)
+        return
+    # Same flag AuthProvider.loginAdminLocally() persists.
+    await _set_preference(page, "is_admin_logged_in", True)
+    await page.reload()
+    await enable_semantics(page)
+
+
+ROLE_LOGINS = {
+    "customer": login_customer,
+    "provider": login_provider,
+    "admin": login_admin,
+}
+
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_manifest(manifest):
+    AUTH_STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+        fh.write("\n")
+
+
+def snapshot_path(role):
+    return AUTH_STATE_DIR / f"{role}.json"
+
+
+def stale_roles(roles, build, manifest=None) -> list:
+    manifest = load_manifest() if manifest is None else manifest
+    return [
+        role
+        for role in roles
+        if manifest.get(role, {}).get("build") != build or not snapshot_path(role).exists()
+    ]
+
+
+async def record_snapshot(browser, role):
+    context = await browser.new_context()
+    try:
+        await settle_waits(context)
+        await semantics_on(context)
+        page = await context.new_page()
+        await page.goto(APP_URL, wait_until="commit")
+        await wait_for_flutter_settled(page)
+        await _set_preference(page, "seen_onboarding", True)
+        await ROLE_LOGINS[role](page)
+        await wait_for_flutter_settled(page)
+        path = snapshot_path(role)
+        try:
+            await context.storage_state(path=str(path), indexed_db=True)
+        except TypeError:
+            # Playwright < 1.51 cannot capture IndexedDB.
+            await context.storage_state(path=str(path))
+    finally:
+        await context.close()
+
+
+async def prepare_snapshots(roles, headless=True) -> dict:
+    """Make sure a current snapshot exists for every role; returns ``{role: path}``.
+
+    Roles whose snapshot could not be recorded are reported and left out, so
+    their tests fall back to starting signed out.
+    """
+    roles = sorted(set(roles))
+    build = await asyncio.to_thread(build_hash)
+    manifest = load_manifest()
+    stale = stale_roles(roles, build, manifest)
+    if stale:
+        AUTH_STATE_DIR.mkdir(parents=True, exist_ok=True)
+        async with BrowserPool(size=1, headless=headless) as pool:
+            async with pool.lease() as browser:
+                for role in stale:
+                    try:
+                        await record_snapshot(browser, role)
+                    except Exception as exc:
+                        print(f"auth-state: no {role} snapshot ({exc})")
+                        manifest.pop(role, None)
+                        continue
+                    manifest[role] = {"build": build}
+        _save_manifest(manifest)
+    return {role: str(snapshot_path(role)) for role in roles if role in manifest}
+
+
+def storage_states_for(cases, snapshots) -> dict:
+    """Map TC id to the storage-state file its context should start from."""
+    return {
+        case.tc_id: snapshots[TEST_ROLES[case.tc_id]]
+        for case in cases
+        if TEST_ROLES.get(case.tc_id) in snapshots
+    }
@@ -0,0 +1,573 @@
+"""Startup benchmarks for the Flutter web build, from the harness's Chromium.
+
+Run from the ``testsprite_tests`` directory::
+
+    python -m harness.bench                       # 10 cold starts
+    python -m harness.bench -n 30 --fail-on-regression
+    python -m harness.bench cache                 # cache disabled vs primed
+    python -m harness.bench renderers --build canvaskit=../build/web-canvaskit \\
+        --build skwasm=../build/web-skwasm --build html=../build/web-html
+
+Each iteration opens a fresh context (so an empty HTTP cache) in one warm
+browser, loads the app and waits for the first interactive semantics node.
+It reads CDP ``Performance.getMetrics`` and a CDP ``Tracing`` capture of the
+load, and records in milliseconds:
+
+``ttfb``
+    navigation request start to first response byte;
+``bootstrap_eval`` / ``main_eval``
+    evaluating ``flutter_bootstrap.js`` and ``main.dart.js``;
+``engine_download`` / ``engine_kb``
+    fetching the CanvasKit / skwasm engine (JS and wasm), and its size;
+``engine_compile``
+    V8 wasm compilation;
+``dart_main``
+    end of ``main.dart.js`` evaluation to the first frame: the Dart
+    ``main()`` in ``lib/main.dart`` (Firebase and Supabase init, first build);
+``first_frame``
+    Flutter's ``flutter-first-frame`` event;
+``first_semantics``
+    first ``flt-semantics`` button, once semantics are switched on;
+``script_time`` / ``task_time`` / ``js_heap_mb``
+    main-thread totals and heap from ``Performance.getMetrics``;
+``download_kb`` / ``request_count`` / ``cached_count``
+    bytes over the wire (CDP ``Network.loadingFinished``, so cross-origin
+    Firebase and font downloads count too), requests, and requests answered
+    from the memory or disk cache.
+
+Besides ``startup``, two comparison scenarios print one table of download
+size, main-thread time and first-frame latency across their variants:
+
+``cache``
+    ``cold`` loads with CDP ``Network.setCacheDisabled``; ``warm`` loads the
+    app once in the context to prime its HTTP and code caches, then
+    measures a second navigation, like a returning user.
+``renderers``
+    cold loads of each ``--build NAME=DIR_OR_URL``, e.g. the same commit
+    built with ``flutter build web`` (CanvasKit), ``flutter build web
+    --wasm`` (skwasm) and, on Flutter releases that still have it,
+    ``flutter build web --web-renderer html``. A directory is served from
+    a local server with the cross-origin isolation headers skwasm needs;
+    the renderer that actually loaded is detected from its requests.
+
+The variants take turns within each iteration so that drift in the machine
+or network affects them alike.
+
+``--throttle PROFILE`` runs any scenario under a :mod:`harness.throttle`
+network and CPU profile and checks the p90 of ``first_frame`` and
+``first_semantics`` against that profile's latency budgets; a miss is
+reported and makes the run exit 1. History entries of throttled runs are
+kept apart (``startup@slow-4g``).
+
+Percentiles over the iterations are printed and appended to
+``tmp/bench/startup.json`` with the build hash and git commit, one entry
+per variant (``startup``, ``cache:warm``, ``renderers:skwasm``, ...). A p50 more
+than :data:`REGRESSION_RATIO` (and :data:`REGRESSION_MIN_MS`) above the
+median of the last :data:`HISTORY_WINDOW` runs is reported as a regression.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import http.server
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+from pathlib import Path
+
+from . import APP_URL, REPO_DIR, TMP_DIR
+from .app_build import build_hash
+from .pool import BrowserPool
+from .throttle import PROFILES as THROTTLE_PROFILES, over_budget
+
+BENCH_DIR = TMP_DIR / "bench"
+HISTORY_PATH = BENCH_DIR / "startup.json"
+
+DEFAULT_ITERATIONS = 10
+STARTUP_TIMEOUT_MS = 30000
+PERCENTILES = (50, 90, 95)
+
+HISTORY_WINDOW = 5
+REGRESSION_RATIO = 1.15
+REGRESSION_MIN_MS = 20.0
+
+TRACE_CATEGORIES = [
+    "devtools.timeline",
+    "blink.user_timing",
+    "loading",
+    "v8.execute",
+    "v8.wasm",
+    "disabled-by-default-v8.compile",
+    "disabled-by-default-v8.wasm.detailed",
+]
+
+METRICS = (
+    "ttfb",
+    "bootstrap_eval",
+    "main_eval",
+    "engine_download",
+    "engine_kb",
+    "engine_compile",
+    "dart_main",
+    "first_frame",
+    "first_semantics",
+    "script_time",
+    "task_time",
+    "js_heap_mb",
+    "download_kb",
+    "request_count",
+    "cached_count",
+)
+
+SCENARIOS = ("startup", "cache", "renderers")
+
+# Columns of the comparison table: (metric, heading).
+COMPARISON = (
+    ("download_kb", "download KB"),
+    ("request_count", "requests"),
+    ("cached_count", "cached"),
+    ("task_time", "main thread ms"),
+    ("first_frame", "first frame ms"),
+)
+
+# Records the first frame and the first interactive semantics node in
+# performance.now() time, switching semantics on as soon as the engine
+# offers its placeholder.
+STARTUP_PROBE_JS = """
+(() => {
+  if (window.__harnessStartup) return;
+  const marks = window.__harnessStartup = {};
+  window.addEventListener('flutter-first-frame', () => { marks.firstFrame = performance.now(); });
+  const poll = () => {
+    const roots = [document].concat(
+      Array.from(document.querySelectorAll('flt-glass-pane, flutter-view'))
+        .map((host) => host.shadowRoot)
+        .filter(Boolean));
+    for (const root of roots) {
+      const placeholder = root.querySelector('flt-semantics-placeholder');
+      if (placeholder && !marks.semanticsRequested) {
+        marks.semanticsRequested = performance.now();
+        placeholder.click();
+      }
+      if (root.querySelector('flt-semantics[role="button"], flt-semantics [role="button"]')) {
+        marks.firstSemantics = performance.now();
+        return;
+      }
+    }
+    setTimeout(poll, 10);
+  };
+  poll();
+})();
+"""
+
+READY_JS = "() => Boolean(window.__harnessStartup && window.__harnessStartup.firstSemantics)"
+
+TIMINGS_JS = """
+() => {
+  const nav = performance.getEntriesByType('navigation')[0] || {};
+  return {
+    marks: window.__harnessStartup || {},
+    navigation: { requestStart: nav.requestStart, responseStart: nav.responseStart },
+    resources: performance.getEntriesByType('resource').map((r) => ({
+      name: r.name, startTime: r.startTime, responseEnd: r.responseEnd,
+      transferSize: r.transferSize, encodedBodySize: r.encodedBodySize,
+    })),
+  };
+}
+"""
+
+
+def is_engine_resource(url) -> bool:
+    name = url.split("?", 1)[0].rsplit("/", 1)[-1]
+    return name.startswith(("canvaskit", "skwasm", "chromium")) and name.endswith((".js", ".wasm"))
+
+
+def renderer_of(urls) -> str:
+    """Which web renderer a load fetched, from its request URLs."""
+    names = [url.split("?", 1)[0].rsplit("/", 1)[-1] for url in urls]
+    if any(name.startswith("skwasm") for name in names):
+        return "skwasm"
+    if any(name.startswith("canvaskit") for name in names):
+        return "canvaskit"
+    return "html"
+
+
+def _evaluations(events, suffix):
+    return [
+        event
+        for event in events
+        if event.get("name") == "EvaluateScript"
+        and event.get("ph") == "X"
+        and event.get("args", {}).get("data", {}).get("url", "").split("?", 1)[0].endswith(suffix)
+    ]
+
+
+def startup_sample(timings, metrics, events, network=None) -> dict:
+    """One iteration's numbers (ms unless named otherwise) from the page, CDP metrics, trace and network."""
+    marks, navigation = timings["marks"], timings["navigation"]
+    sample = dict.fromkeys(METRICS)
+    if network is not None:
+        sample["download_kb"] = network["bytes"] / 1024
+        sample["request_count"] = len(network["urls"])
+        sample["cached_count"] = network["cached"]
+        sample["renderer"] = renderer_of(network["urls"])
+    if navigation.get("responseStart") is not None:
+        sample["ttfb"] = navigation["responseStart"] - navigation["requestStart"]
+    bootstrap = _evaluations(events, "flutter_bootstrap.js")
+    main = _evaluations(events, "main.dart.js")
+    if bootstrap:
+        sample["bootstrap_eval"] = sum(event["dur"] for event in bootstrap) / 1000
+    if main:
+        sample["main_eval"] = sum(event["dur"] for event in main) / 1000
+    engine = [r for r in timings["resources"] if is_engine_resource(r["name"])]
+    if engine:
+        started = min(r["startTime"] for r in engine)
+        sample["engine_download"] = max(r["responseEnd"] for r in engine) - started
+        sample["engine_kb"] = sum(r["transferSize"] or r["encodedBodySize"] for r in engine) / 1024
+    compiles = [
+        event["dur"]
+        for event in events
+        if event.get("ph") == "X"
+        and "wasm" in event.get("name", "").lower()
+        and "compil" in event.get("name", "").lower()
+    ]
+    if compiles:
+        sample["engine_compile"] = sum(compiles) / 1000
+    sample["first_frame"] = marks.get("firstFrame")
+    sample["first_semantics"] = marks.get("firstSemantics")
+    if main and sample["first_frame"] is not None:
+        # Trace timestamps are µs on the trace clock; anchor them at the
+        # document's navigationStart, which performance.now() counts from.
+        main_start = min(event["ts"] for event in main)
+        starts = [
+            event["ts"]
+            for event in events
+            if event.get("name") == "navigationStart" and event["ts"] <= main_start
+        ]
+        if starts:
+            main_end = max(event["ts"] + event["dur"] for event in main)
+            sample["dart_main"] = sample["first_frame"] - (main_end - max(starts)) / 1000
+    if "ScriptDuration" in metrics:
+        sample["script_time"] = metrics["ScriptDuration"] * 1000
+        sample["task_time"] = metrics["TaskDuration"] * 1000
+        sample["js_heap_mb"] = metrics["JSHeapUsedSize"] / 2**20
+    return sample
+
+
+def _watch_network(cdp) -> dict:
+    """Count requests, cache hits and encoded bytes seen by ``cdp``."""
+    network = {"urls": [], "cached": 0, "bytes": 0}
+
+    def on_response(params):
+        response = params["response"]
+        if response.get("fromDiskCache") or response.get("fromPrefetchCache"):
+            network["cached"] += 1
+
+    def on_finished(params):
+        network["bytes"] += params.get("encodedDataLength", 0)
+
+    def on_memory_hit(params):
+        network["cached"] += 1
+
+    cdp.on("Network.requestWillBeSent", lambda params: network["urls"].append(params["request"]["url"]))
+    cdp.on("Network.responseReceived", on_response)
+    cdp.on("Network.loadingFinished", on_finished)
+    cdp.on("Network.requestServedFromCache", on_memory_hit)
+    return network
+
+
+# Performance.getMetrics counters that keep growing for the whole page
+# session, as opposed to gauges such as JSHeapUsedSize.
+CUMULATIVE_METRICS = ("ScriptDuration", "TaskDuration", "LayoutDuration", "RecalcStyleDuration")
+
+
+async def _performance_metrics(cdp) -> dict:
+    return {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+
+
+async def measure_startup(
+    browser,
+    url=APP_URL,
+    timeout=STARTUP_TIMEOUT_MS,
+    context_options=None,
+    setup=None,
+    cache_disabled=False,
+    warm=False,
+) -> dict:
+    """Load ``url`` in a fresh context and return its :func:`startup_sample`.
+
+    ``setup(cdp)`` is awaited on the page's CDP session before navigating,
+    for scenarios that change emulation settings. ``cache_disabled`` turns
+    the HTTP cache off through CDP; ``warm`` loads the app once, unmeasured,
+    and measures a second navigation in the same context (durations are
+    counted from just before it, so the priming load doesn't add to them).
+    """
+    context = await browser.new_context(**(context_options or {}))
+    try:
+        await context.add_init_script(STARTUP_PROBE_JS)
+        page = await context.new_page()
+        cdp = await context.new_cdp_session(page)
+        events = []
+        complete = asyncio.get_running_loop().create_future()
+        cdp.on("Tracing.dataCollected", lambda params: events.extend(params["value"]))
+        cdp.on("Tracing.tracingComplete", lambda params: complete.done() or complete.set_result(True))
+        await cdp.send("Performance.enable")
+        await cdp.send("Network.enable")
+        await cdp.send("Network.setCacheDisabled", {"cacheDisabled": cache_disabled})
+        if setup:
+            await setup(cdp)
+        if warm:
+            await page.goto(url, wait_until="commit")
+            await page.wait_for_function(READY_JS, polling=50, timeout=timeout)
+        network = _watch_network(cdp)
+        before = await _performance_metrics(cdp)
+        await cdp.send(
+            "Tracing.start",
+            {"traceConfig": {"includedCategories": TRACE_CATEGORIES}, "transferMode": "ReportEvents"},
+        )
+        await page.goto(url, wait_until="commit")
+        await page.wait_for_function(READY_JS, polling=50, timeout=timeout)
+        timings = await page.evaluate(TIMINGS_JS)
+        metrics = await _performance_metrics(cdp)
+        for name in CUMULATIVE_METRICS:
+            if name in metrics and name in before:
+                metrics[name] -= before[name]
+        await cdp.send("Tracing.end")
+        await asyncio.wait_for(complete, timeout / 1000)
+        return startup_sample(timings, metrics, events, network)
+    finally:
+        await context.close()
+
+
+class _IsolatedHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files with the cross-origin isolation skwasm's threads need.
+
+    ``credentialless`` rather than ``require-corp``, so that the Firebase
+    scripts from gstatic.com still load without a CORP header.
+    """
+
+    extensions_map = {**http.server.SimpleHTTPRequestHandler.extensions_map, ".wasm": "application/wasm"}
+
+    def end_headers(self):
+        self.send_header("Cross-Origin-Opener-Policy", "same-origin")
+        self.send_header("Cross-Origin-Embedder-Policy", "credentialless")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_build(directory):
+    """Serve a ``flutter build web`` output directory; yields its URL."""
+    handler = functools.partial(_IsolatedHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of ``values`` (``pct`` in 0-100)."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples) -> dict:
+    """Metric -> {"p50": ..., "p90": ..., "p95": ..., "max": ...} over the samples that have it."""
+    summary = {}
+    for metric in METRICS:
+        values = [sample[metric] for sample in samples if sample.get(metric) is not None]
+        if values:
+            summary[metric] = {f"p{pct}": round(percentile(values, pct), 2) for pct in PERCENTILES}
+            summary[metric]["max"] = round(max(values), 2)
+    return summary
+
+
+def format_summary(summary, title) -> str:
+    columns = [f"p{pct}" for pct in PERCENTILES] + ["max"]
+    lines = [title, f"{'metric':<18}" + "".join(f"{column:>10}" for column in columns)]
+    for metric, stats in summary.items():
+        lines.append(f"{metric:<18}" + "".join(f"{stats[column]:>10.1f}" for column in columns))
+    return "\n".join(lines)
+
+
+def git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return result.stdout.strip()
+
+
+def load_history(path=HISTORY_PATH) -> list:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+def append_history(entry, path=HISTORY_PATH):
+    history = load_history(path) + [entry]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(history, fh, indent=2)
+        fh.write("\n")
+
+
+def regressions(summary, history, scenario="startup") -> list:
+    """Metrics whose p50 is well above the recent median for the same scenario."""
+    recent = [entry for entry in history if entry.get("scenario", "startup") == scenario][-HISTORY_WINDOW:]
+    found = []
+    for metric, stats in summary.items():
+        past = [entry["summary"][metric]["p50"] for entry in recent if metric in entry["summary"]]
+        if not past or metric.endswith(("_kb", "_mb", "_count")):
+            continue
+        reference = statistics.median(past)
+        current = stats["p50"]
+        if current > reference * REGRESSION_RATIO and current - reference > REGRESSION_MIN_MS:
+            change = 100 * (current / reference - 1)
+            found.append(f"{metric} p50 {current:.0f} ms vs {reference:.0f} ms (+{change:.0f}%)")
+    return found
+
+
+def format_comparison(summaries, title) -> str:
+    """Variant x (download, requests, main-thread time, first frame) table of p50 (p95)."""
+    lines = [title, f"{'variant':<22}" + "".join(f"{heading:>20}" for _, heading in COMPARISON)]
+    for name, summary in summaries.items():
+        cells = []
+        for metric, _ in COMPARISON:
+            stats = summary.get(metric)
+            cells.append(f"{stats['p50']:.0f} ({stats['p95']:.0f})" if stats else "-")
+        lines.append(f"{name:<22}" + "".join(f"{cell:>20}" for cell in cells))
+    lines.append("p50 (p95) per variant")
+    return "\n".join(lines)
+
+
+async def run_variants(variants, iterations, headless=True) -> dict:
+    """Measure each ``(name, url, measure_startup kwargs)`` variant; returns name -> samples.
+
+    The variants take turns within each iteration.
+    """
+    samples = {name: [] for name, _, _ in variants}
+    async with BrowserPool(size=1, headless=headless) as pool:
+        async with pool.lease() as browser:
+            for number in range(1, iterations + 1):
+                for name, url, kwargs in variants:
+                    sample = await measure_startup(browser, url, **kwargs)
+                    samples[name].append(sample)
+                    label = f"{name} " if len(variants) > 1 else ""
+                    print(f"  run {number}: {label}first frame {sample['first_frame'] or 0:.0f} ms, "
+                          f"semantics {sample['first_semantics'] or 0:.0f} ms, "
+                          f"{sample['download_kb'] or 0:.0f} KB", flush=True)
+    return samples
+
+
+def parse_build(value):
+    name, sep, target = value.partition("=")
+    if not sep or not name or not target:
+        raise argparse.ArgumentTypeError(f"expected NAME=DIR_OR_URL, got {value!r}")
+    return name, target
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m harness.bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("scenario", nargs="?", choices=SCENARIOS, default="startup", help="what to compare")
+    parser.add_argument("-n", "--iterations", type=int, default=DEFAULT_ITERATIONS, help="loads per variant")
+    parser.add_argument("--url", default=APP_URL, help="app to load")
+    parser.add_argument(
+        "--build", type=parse_build, action="append", default=[], metavar="NAME=DIR_OR_URL",
+        help="a web build to compare in the renderers scenario (repeatable)",
+    )
+    parser.add_argument(
+        "--throttle", choices=THROTTLE_PROFILES, default="none", metavar="PROFILE",
+        help=f"network and CPU profile to load under ({', '.join(THROTTLE_PROFILES)})",
+    )
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--no-history", action="store_true", help=f"don't append to {HISTORY_PATH.name}")
+    parser.add_argument(
+        "--fail-on-regression", action="store_true",
+        help="exit 1 if a p50 regressed against the recent history",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    throttle = THROTTLE_PROFILES[args.throttle]
+    with contextlib.ExitStack() as stack:
+        if args.scenario == "renderers":
+            builds = args.build or [("served", args.url)]
+            targets = {
+                name: target if "://" in target else stack.enter_context(serve_build(Path(target).resolve()))
+                for name, target in builds
+            }
+            variants = [(name, url, {}) for name, url in targets.items()]
+        elif args.scenario == "cache":
+            targets = {"cold": args.url, "warm": args.url}
+            variants = [("cold", args.url, {"cache_disabled": True}), ("warm", args.url, {"warm": True})]
+        else:
+            targets = {"startup": args.url}
+            variants = [("startup", args.url, {})]
+        if throttle.throttled:
+            variants = [(name, url, {**kwargs, "setup": throttle.apply}) for name, url, kwargs in variants]
+        samples = asyncio.run(run_variants(variants, args.iterations, headless=not args.headed))
+        builds = {}
+        if not args.no_history:
+            for name, url in targets.items():
+                try:
+                    builds[name] = build_hash(url)
+                except (urllib.error.URLError, OSError):
+                    builds[name] = ""
+
+    history = load_history()
+    summaries, found, missed = {}, [], []
+    for name, _, _ in variants:
+        scenario = "startup" if args.scenario == "startup" else f"{args.scenario}:{name}"
+        if throttle.throttled:
+            scenario += f"@{throttle.name}"
+        summary = summaries[name] = summarize(samples[name])
+        renderers = sorted({sample["renderer"] for sample in samples[name] if sample.get("renderer")})
+        loaded = f", {'/'.join(renderers)} renderer" if args.scenario == "renderers" and renderers else ""
+        print(format_summary(summary, f"{scenario}, {len(samples[name])} loads of {targets[name]}{loaded} (ms)"))
+        for line in regressions(summary, history, scenario):
+            found.append(f"{scenario} {line}")
+            print(f"regression: {scenario} {line}")
+        for line in over_budget(throttle, {metric: stats["p90"] for metric, stats in summary.items()}):
+            missed.append(line)
+            print(f"over budget: {scenario} p90 {line}")
+        if not args.no_history:
+            append_history(
+                {
+                    "scenario": scenario,
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "build": builds[name],
+                    "commit": git_commit(),
+                    "iterations": len(samples[name]),
+                    "summary": summary,
+                }
+            )
+    if len(summaries) > 1:
+        print(format_comparison(summaries, f"{args.scenario} comparison"))
+    return 1 if missed or (found and args.fail_on_regression) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Keep the last few frames of a test in memory; save them only if it fails.
+
+TestSprite attaches a full ``result.webm`` to every test. Encoding every
+frame of a canvas-rendered app slows the headless browser for tests that
+pass and need no recording. With ``--capture-failures`` the runner instead
+starts a CDP screencast on each page. Chromium pushes a JPEG only when the
+page paints (every ``every_nth_frame``-th frame), and the harness keeps the
+newest ``depth`` of them in a ring buffer without decoding or writing them.
+
+The generated scripts close their context in a ``finally`` block, so the
+decision is made there: if the test is failing at that point, the frames
+go to ``tmp/failures/<TC id>/`` with an ``index.json`` of their
+timestamps and URLs, plus the context's Playwright trace when ``trace`` is
+on. If the test passes, the buffer is dropped and the trace chunk is
+discarded without being written.
+"""
+
+import asyncio
+import base64
+import json
+import shutil
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from . import TMP_DIR
+
+ARTIFACT_DIR = TMP_DIR / "failures"
+
+
+@dataclass
+class CaptureSettings:
+    # Frames kept per test.
+    depth: int = 10
+    # JPEG quality (0-100); lower is smaller and cheaper.
+    quality: int = 60
+    # Keep one of every N painted frames.
+    every_nth_frame: int = 4
+    # Frames are downscaled to at most this width.
+    max_width: int = 960
+    # Also record a Playwright trace (DOM snapshots, no screenshots).
+    trace: bool = False
+
+
+class FailureCapture:
+    """Ring buffer of recent frames for one test's contexts."""
+
+    def __init__(self, tc_id, settings: CaptureSettings):
+        self.tc_id = tc_id
+        self.settings = settings
+        self.frames = deque(maxlen=settings.depth)
+        self.saved = None
+        self._sessions = []
+
+    async def install(self, context):
+        """Context hook: screencast every page and dump on a failing close."""
+        if self.settings.trace:
+            await context.tracing.start(snapshots=True, screenshots=False)
+            await context.tracing.start_chunk(title=self.tc_id)
+        context.on("page", lambda page: asyncio.ensure_future(self._screencast(context, page)))
+        close = context.close
+        closed = False
+
+        async def close_capturing(**kwargs):
+            nonlocal closed
+            if not closed:
+                closed = True
+                failing = sys.exc_info()[1]
+                if failing is not None and not isinstance(failing, asyncio.CancelledError):
+                    await self.save(context)
+                elif self.settings.trace:
+                    await context.tracing.stop_chunk()
+            return await close(**kwargs)
+
+        context.close = close_capturing
+
+    async def _screencast(self, context, page):
+        try:
+            session = await context.new_cdp_session(page)
+        except Exception:
+            return  # the page closed first
+
+        def on_frame(frame):
+            self.frames.append((time.time(), page.url, frame["data"]))
+            asyncio.ensure_future(session.send("Page.screencastFrameAck", {"sessionId": frame["sessionId"]}))
+
+        session.on("Page.screencastFrame", on_frame)
+        self._sessions.append(session)
+        try:
+            await session.send(
+                "Page.startScreencast",
+                {
+                    "format": "jpeg",
+                    "quality": self.settings.quality,
+                    "maxWidth": self.settings.max_width,
+                    "everyNthFrame": self.settings.every_nth_frame,
+                },
+            )
+        except Exception:
+            pass
+
+    async def save(self, context=None):
+        """Write the buffered frames (and trace) to ``tmp/failures/<TC id>/``."""
+        directory = ARTIFACT_DIR / self.tc_id
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        index = []
+        for number, (stamp, url, data) in enumerate(self.frames, 1):
+            name = f"frame-{number:02d}.jpg"
+            (directory / name).write_bytes(base64.b64decode(data))
+            index.append({"file": name, "time": stamp, "url": url})
+        if context is not None and self.settings.trace:
+            try:
+                await context.tracing.stop_chunk(path=str(directory / "trace.zip"))
+                index.append({"file": "trace.zip"})
+            except Exception:
+                pass
+        (directory / "index.json").write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+        self.frames.clear()
+        self.saved = str(directory)
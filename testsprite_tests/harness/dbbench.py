@@ -0,0 +1,310 @@
+"""Backend latency benchmarks against the local stack of :mod:`harness.pgstack`.
+
+Run from the ``testsprite_tests`` directory::
+
+    python -m harness.dbbench providers              # 100 .. 10k providers
+    python -m harness.dbbench providers --sizes 1000,20000 -n 50
+    python -m harness.dbbench rls                    # 1M messages
+    python -m harness.dbbench rls --customers 20000 -n 5
+
+``providers`` grows one category (:data:`CATEGORY`) step by step up to the
+largest of ``--sizes``. At each size it times, over HTTP to PostgREST, what
+``service_providers_screen.dart`` costs:
+
+``two_query``
+    the old ``getProviders(serviceId:)``: ``provider_services?select=
+    provider_id`` and then ``profiles?id=in.(...)`` with every id in the
+    URL (its size is reported too; past a few thousand ids servers answer
+    414 or drop the connection, which is counted as an error);
+``rpc_first`` / ``rpc_last``
+    ``rpc/get_service_providers`` for the first and the last page of 20.
+
+``rls`` times admin and chat queries under the row-level-security policies
+of ``schema.sql`` / ``chat_schema.sql`` (``before``), then applies
+``rls_policies_schema.sql`` to the same database and times them again
+(``after``). It is seeded at :data:`RLS_SIZES`, about a million messages
+and notifications; the ``--customers``, ``--providers``, ... sizes change
+that. The queries (:func:`rls_queries`) run as :data:`ADMIN_ID` or as
+seeded customer 1.
+
+Latencies are medians and p95 over ``-n`` requests per size or policy set,
+in ms. The results are appended to ``tmp/bench/providers.json`` and
+``tmp/bench/rls.json``.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict
+
+from . import REPO_DIR
+from .bench import BENCH_DIR, append_history, git_commit, percentile
+from .load import SHAPES
+from .pgstack import (
+    GRANTS_SQL,
+    SeedSizes,
+    add_size_arguments,
+    booking_id,
+    customer_id,
+    run_sql,
+    sizes_from,
+    stack,
+    user_token,
+)
+from .schema import MIGRATION_FILES, read_sql
+
+PROVIDERS_HISTORY = BENCH_DIR / "providers.json"
+RLS_HISTORY = BENCH_DIR / "rls.json"
+CATEGORY = "plumber"
+DEFAULT_SIZES = (100, 1000, 5000, 10000)
+PAGE_SIZE = 20
+RATINGS_PER_PROVIDER = 10
+
+RLS_FILE = REPO_DIR / "rls_policies_schema.sql"
+RLS_SIZES = SeedSizes(customers=100_000, providers=2_000, messages_per_booking=2)
+ADMIN_ID = "00000000-0000-4000-8000-00000000ad01"
+RLS_TIMEOUT_S = 120
+
+
+def grow_category_sql(start, stop, service=CATEGORY, ratings=RATINGS_PER_PROVIDER) -> str:
+    """Add providers ``start``..``stop`` (with ratings) to ``service``."""
+    return f"""
+INSERT INTO profiles (id, full_name, role, is_online, is_verified)
+SELECT md5('category-provider-' || n)::uuid, 'Category provider ' || n, 'provider', n % 3 = 0, n % 2 = 0
+FROM generate_series({start}, {stop}) n;
+
+INSERT INTO provider_services (provider_id, service_id, hourly_rate, is_available)
+SELECT md5('category-provider-' || n)::uuid, '{service}', 50 + n % 50, n % 4 <> 0
+FROM generate_series({start}, {stop}) n;
+
+INSERT INTO ratings (target_id, rating)
+SELECT md5('category-provider-' || n)::uuid, 1 + (n * 7 + r) % 5
+FROM generate_series({start}, {stop}) n, generate_series(1, {ratings}) r;
+
+ANALYZE profiles, provider_services, ratings;
+"""
+
+
+class Client:
+    """Minimal PostgREST client signed in as ``user``, or as the anon key like a guest."""
+
+    def __init__(self, url, timeout=30, user=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.headers = {
+            "apikey": user_token(),
+            "Authorization": f"Bearer {user_token(user)}",
+            "Accept-Profile": "public",
+        }
+
+    def request(self, path, body=None, method=None, headers=None):
+        """Returns ``(ms, decoded body)``; raises ``urllib.error`` errors."""
+        data = None if body is None else json.dumps(body).encode()
+        headers = {**self.headers, **({"Content-Type": "application/json"} if data else {}), **(headers or {})}
+        request = urllib.request.Request(self.url + path, data=data, headers=headers, method=method)
+        started = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = response.read()
+        return (time.perf_counter() - started) * 1000, json.loads(payload) if payload else None
+
+
+def provider_ids_path(service=CATEGORY) -> str:
+    return f"/provider_services?select=provider_id&service_id=eq.{service}"
+
+
+def profiles_by_id_path(rows) -> str:
+    """The old getProviders' second request: ``inFilter('id', ids)``."""
+    return "/profiles?select=*&id=in.(" + ",".join(row["provider_id"] for row in rows) + ")"
+
+
+def rpc_page(client, page, service=CATEGORY):
+    ms, rows = client.request(
+        "/rpc/get_service_providers",
+        {"p_service_id": service, "p_limit": PAGE_SIZE, "p_offset": page * PAGE_SIZE},
+    )
+    return ms, rows
+
+
+def _stats(values):
+    if not values:
+        return None
+    return {"p50": round(percentile(values, 50), 1), "p95": round(percentile(values, 95), 1)}
+
+
+def measure_category(client, providers, iterations) -> dict:
+    """Time the old and new lookups ``iterations`` times each at the current category size."""
+    timings = {"two_query": [], "rpc_first": [], "rpc_last": []}
+    errors = {name: 0 for name in timings}
+    url_bytes = 0
+    last_page = max((providers - 1) // PAGE_SIZE, 0)
+    for _ in range(iterations):
+        try:
+            first, rows = client.request(provider_ids_path())
+            path = profiles_by_id_path(rows)
+            url_bytes = len(path)
+            second, _ = client.request(path)
+            timings["two_query"].append(first + second)
+        except (urllib.error.URLError, OSError):
+            errors["two_query"] += 1
+        for name, page in (("rpc_first", 0), ("rpc_last", last_page)):
+            try:
+                timings[name].append(rpc_page(client, page)[0])
+            except (urllib.error.URLError, OSError):
+                errors[name] += 1
+    return {
+        "providers": providers,
+        "url_kb": round(url_bytes / 1024, 1),
+        **{name: _stats(values) for name, values in timings.items()},
+        "errors": errors,
+    }
+
+
+def format_results(results) -> str:
+    def cell(stats):
+        return f"{stats['p50']:.1f} / {stats['p95']:.1f}" if stats else "failed"
+
+    lines = [
+        f"providers in '{CATEGORY}', p50 / p95 ms",
+        f"{'providers':>10}{'two queries':>18}{'URL KB':>9}{'rpc page 1':>16}{'rpc last page':>16}",
+    ]
+    for row in results:
+        lines.append(
+            f"{row['providers']:>10}{cell(row['two_query']):>18}{row['url_kb']:>9.1f}"
+            f"{cell(row['rpc_first']):>16}{cell(row['rpc_last']):>16}"
+        )
+    return "\n".join(lines)
+
+
+def run_providers(url, dsn, sizes, iterations) -> list:
+    client = Client(url)
+    results, seeded = [], 0
+    for size in sorted(sizes):
+        if size > seeded:
+            run_sql(dsn, grow_category_sql(seeded + 1, size))
+            seeded = size
+        # One unmeasured round so caches and plans are warm.
+        measure_category(client, size, 1)
+        results.append(measure_category(client, size, iterations))
+        print(format_results(results[-1:]).splitlines()[-1], flush=True)
+    return results
+
+
+def rls_queries() -> dict:
+    """name -> (who, method, path, body, headers) for the ``rls`` scenario."""
+    thread, _ = SHAPES["messages"].request(customer_id(1), None, booking_id(1, 1))
+    return {
+        # Admin screens: every row passes through bookings_select / profiles_update.
+        "admin_bookings": ("admin", "GET", "/bookings?select=*&order=created_at.desc.nullslast&limit=50", None, None),
+        "admin_count": ("admin", "GET", "/bookings?select=id&limit=1", None, {"Prefer": "count=exact"}),
+        "admin_verify": ("admin", "PATCH", "/profiles?role=eq.provider", {"is_verified": True}, None),
+        # Chat: one booking's thread, and the latest messages across all of them.
+        "chat_thread": ("customer", "GET", thread, None, None),
+        "chat_latest": ("customer", "GET", "/messages?select=*&order=created_at.desc.nullslast&limit=50", None, None),
+    }
+
+
+def measure_queries(clients, queries, iterations) -> dict:
+    timings = {name: [] for name in queries}
+    errors = {name: 0 for name in queries}
+    for _ in range(iterations):
+        for name, (who, method, path, body, headers) in queries.items():
+            try:
+                timings[name].append(clients[who].request(path, body, method, headers)[0])
+            except (urllib.error.URLError, OSError):
+                errors[name] += 1
+    return {**{name: _stats(values) for name, values in timings.items()}, "errors": errors}
+
+
+def format_rls(results) -> str:
+    def cell(stats):
+        return f"{stats['p50']:.1f} / {stats['p95']:.1f}" if stats else "failed"
+
+    before, after = results.get("before", {}), results.get("after", {})
+    lines = [
+        "row-level security, p50 / p95 ms",
+        f"{'query':<16}{'before':>20}{'after':>20}{'speedup':>10}",
+    ]
+    for name in rls_queries():
+        old, new = before.get(name), after.get(name)
+        speedup = f"{old['p50'] / new['p50']:.1f}x" if old and new and new["p50"] else "-"
+        lines.append(f"{name:<16}{cell(old):>20}{cell(new):>20}{speedup:>10}")
+    return "\n".join(lines)
+
+
+def run_rls(url, dsn, iterations) -> dict:
+    """Time :func:`rls_queries` under the old policies, then under ``rls_policies_schema.sql``."""
+    run_sql(dsn, f"INSERT INTO profiles (id, full_name, role) VALUES ('{ADMIN_ID}', 'Admin', 'admin');")
+    clients = {
+        "admin": Client(url, RLS_TIMEOUT_S, ADMIN_ID),
+        "customer": Client(url, RLS_TIMEOUT_S, customer_id(1)),
+    }
+    queries = rls_queries()
+    results = {}
+    for label in ("before", "after"):
+        if label == "after":
+            run_sql(dsn, read_sql([RLS_FILE]) + GRANTS_SQL)
+        # One unmeasured round so caches and plans are warm.
+        measure_queries(clients, queries, 1)
+        results[label] = measure_queries(clients, queries, iterations)
+        print(f"{label}: measured {len(queries)} queries x {iterations}", flush=True)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m harness.dbbench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("scenario", choices=("providers", "rls"))
+    parser.add_argument("--dsn", help="build into this database instead of a throwaway cluster")
+    parser.add_argument(
+        "--sizes", default=",".join(map(str, DEFAULT_SIZES)), metavar="N,N,...",
+        help="category sizes to measure at",
+    )
+    parser.add_argument("-n", "--iterations", type=int, default=20, help="requests per size and query")
+    parser.add_argument(
+        "--no-history", action="store_true",
+        help=f"don't append to {PROVIDERS_HISTORY.name} / {RLS_HISTORY.name}",
+    )
+    add_size_arguments(parser)
+    parser.set_defaults(**asdict(RLS_SIZES))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        if args.scenario == "rls":
+            # Built without the new policies; run_rls() applies them halfway.
+            migrations = [path for path in MIGRATION_FILES if path != RLS_FILE]
+            with stack(sizes_from(args), dsn=args.dsn, migrations=migrations) as (dsn, url):
+                results = run_rls(url, dsn, args.iterations)
+            print(format_rls(results))
+            history = RLS_HISTORY
+        else:
+            sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+            # The rest of the catalogue stays small; only the category grows.
+            with stack(SeedSizes(customers=100, providers=50), dsn=args.dsn) as (dsn, url):
+                results = run_providers(url, dsn, sizes, args.iterations)
+            print(format_results(results))
+            history = PROVIDERS_HISTORY
+    except (RuntimeError, subprocess.CalledProcessError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    if not args.no_history:
+        entry = {
+            "scenario": args.scenario,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": git_commit(),
+            "iterations": args.iterations,
+            "results": results,
+        }
+        if args.scenario == "rls":
+            entry["sizes"] = asdict(sizes_from(args))
+        append_history(entry, history)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
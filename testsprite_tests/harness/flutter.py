@@ -0,0 +1,101 @@
+"""Wait for the Flutter web engine to mount and stop scheduling frames.
+
+The generated scripts pause a fixed ``page.wait_for_timeout(3000)`` before
+every ``flutter-view`` click and ``asyncio.sleep(5)`` at the end. Under the
+harness those waits resolve as soon as the app has settled instead: an init
+script records Flutter's ``flutter-first-frame`` event and every
+``requestAnimationFrame`` call, and the page counts as settled once the view
+is mounted and no frame has been requested for ``quiet_ms``.
+
+Scripts can also call :func:`wait_for_flutter_settled` directly.
+"""
+
+import asyncio
+import functools
+
+from playwright import async_api
+
+from .profile import span
+
+DEFAULT_QUIET_MS = 200
+DEFAULT_TIMEOUT_MS = 10000
+
+FRAME_PROBE_JS = """
+(() => {
+  if (window.__harnessFrames) return;
+  const state = window.__harnessFrames = { requested: 0, lastRequest: 0, firstFrame: 0 };
+  const raf = window.requestAnimationFrame.bind(window);
+  window.requestAnimationFrame = (callback) => {
+    state.requested += 1;
+    state.lastRequest = performance.now();
+    return raf(callback);
+  };
+  window.addEventListener('flutter-first-frame', () => {
+    state.firstFrame = performance.now();
+  });
+})();
+"""
+
+SETTLED_JS = """
+(quietMs) => {
+  const state = window.__harnessFrames;
+  const view = document.querySelector('flutter-view, flt-glass-pane');
+  if (!state || !view) return false;
+  const mounted = state.firstFrame > 0
+    || view.shadowRoot !== null
+    || document.querySelector('flt-semantics-placeholder, flt-scene-host') !== null;
+  return mounted && performance.now() - state.lastRequest >= quietMs;
+}
+"""
+
+
+async def install_frame_probe(context):
+    """Add the frame probe to every page (and reload) of ``context``."""
+    await context.add_init_script(FRAME_PROBE_JS)
+
+
+async def wait_for_flutter_settled(page, timeout=DEFAULT_TIMEOUT_MS, quiet_ms=DEFAULT_QUIET_MS):
+    """Resolve once Flutter has mounted and been idle for ``quiet_ms``.
+
+    Raises ``playwright.async_api.TimeoutError`` after ``timeout`` ms. The
+    page's context must have had :func:`install_frame_probe` applied before
+    navigation. Polling runs on a timer rather than ``raf`` so the probe does
+    not count its own frame requests.
+    """
+    await page.wait_for_function(SETTLED_JS, arg=quiet_ms, polling=50, timeout=timeout)
+
+
+async def _settled_timeout(page, timeout):
+    # Never waits longer than the fixed timeout it replaces.
+    with span("sleep", "Page.wait_for_timeout"):
+        try:
+            await wait_for_flutter_settled(page, timeout=max(timeout, 1))
+        except async_api.Error:
+            pass
+
+
+def _patch_page(page):
+    page.wait_for_timeout = functools.partial(_settled_timeout, page)
+
+
+async def settle_waits(context):
+    """Context hook: swap fixed ``wait_for_timeout`` pauses for settle waits."""
+    await install_frame_probe(context)
+    for page in context.pages:
+        _patch_page(page)
+    context.on("page", _patch_page)
+
+
+class SleeplessAsyncio:
+    """Replaces ``asyncio`` inside a loaded TC script.
+
+    The only sleep the scripts use is the trailing ``asyncio.sleep(5)`` after
+    the assertions have already run, so it just yields to the event loop.
+    """
+
+    async def sleep(self, delay, result=None):
+        await asyncio.sleep(0)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(asyncio, name)
@@ -0,0 +1,179 @@
+"""Pick the TC scripts a change can affect, from a git diff.
+
+``tmp/code_summary.json`` maps each app feature to its Dart files and
+:data:`TEST_FEATURES` maps each test to the features it exercises (the
+frontend test plan itself carries no feature field). A feature's reach is
+its files plus the widgets, models, services and utilities they import
+inside ``lib/``, so a change to a widget selects every test whose screens use
+it. Imports of other screens are navigation targets and are not followed;
+otherwise every screen would reach every other one.
+
+Some changes are not attributable to a feature and select the whole
+suite: :data:`SHARED_FILES` such as ``lib/main.dart`` and
+``lib/utils/theme.dart``, the web shell, assets and dependencies, the
+harness itself, and any ``lib/`` file no mapped test reaches (an app change
+should never run nothing). An edited TC script, or one of its visual baselines,
+always selects itself.
+"""
+
+import json
+import re
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+
+from . import REPO_DIR, TMP_DIR
+
+CODE_SUMMARY_PATH = TMP_DIR / "code_summary.json"
+
+# Which code_summary.json features each test exercises.
+TEST_FEATURES = {
+    "TC001": ["Authentication System"],
+    "TC002": ["Authentication System"],
+    "TC003": ["Authentication System"],
+    "TC004": ["Onboarding Flow"],
+    "TC005": ["Onboarding Flow"],
+    "TC006": ["Home Screen", "Service Categories"],
+    "TC007": ["Home Screen"],
+    "TC008": ["Home Screen"],
+    "TC009": ["Home Screen", "User Profile Management"],
+    "TC010": ["Home Screen", "User Profile Management"],
+    "TC011": ["Service Management"],
+    "TC012": ["Admin Dashboard"],
+    "TC013": ["Provider Dashboard"],
+    "TC014": ["Zellij Background Widget", "Home Screen"],
+    "TC015": ["Theme System", "Authentication System"],
+    "TC016": ["App Initialization", "App Constants"],
+}
+
+# Screens code_summary.json leaves out of a feature the tests exercise.
+EXTRA_FEATURE_FILES = {
+    "User Profile Management": [
+        "lib/screens/home/profile_screen.dart",
+        "lib/screens/profile/edit_profile_screen.dart",
+    ],
+}
+
+# Changes to these touch every screen; run everything.
+SHARED_FILES = {"lib/main.dart", "lib/utils/theme.dart", "pubspec.yaml", "pubspec.lock"}
+SHARED_PREFIXES = ("web/", "Assets/", "testsprite_tests/harness/")
+
+APP_PACKAGE = "khdemti"
+SCREENS_DIR = "lib/screens/"
+
+_DIRECTIVE = re.compile(r"""^\s*(?:import|export|part)\s+['"]([^'"]+)['"]""", re.M)
+_TC_SCRIPT = re.compile(r"^testsprite_tests/(TC\d+)_[^/]*\.py$")
+_TC_BASELINE = re.compile(r"^testsprite_tests/baselines/(TC\d+)_")
+
+
+@dataclass
+class Selection:
+    # None means the whole suite.
+    tc_ids: set = None
+    reasons: list = field(default_factory=list)
+
+    @property
+    def full(self) -> bool:
+        return self.tc_ids is None
+
+
+def changed_files(since="HEAD", repo_dir=REPO_DIR) -> list:
+    """Repo-relative paths changed since ``since``, including untracked files."""
+
+    def git(*args):
+        result = subprocess.run(
+            ["git", *args], cwd=repo_dir, capture_output=True, text=True, check=True
+        )
+        return [line for line in result.stdout.splitlines() if line]
+
+    changed = git("diff", "--name-only", since)
+    changed += git("ls-files", "--others", "--exclude-standard")
+    return sorted(set(changed))
+
+
+def dart_imports(path, repo_dir=REPO_DIR) -> set:
+    """Repo-relative ``lib/`` files that ``path`` imports, exports or includes."""
+    try:
+        source = (repo_dir / path).read_text(encoding="utf-8-sig")
+    except (FileNotFoundError, UnicodeDecodeError):
+        return set()
+    found = set()
+    for uri in _DIRECTIVE.findall(source):
+        if uri.startswith(f"package:{APP_PACKAGE}/"):
+            target = PurePosixPath("lib", uri[len(f"package:{APP_PACKAGE}/"):])
+        elif ":" in uri:
+            continue  # SDK or third-party package
+        else:
+            parts = []
+            for part in (PurePosixPath(path).parent / uri).parts:
+                if part == "..":
+                    parts.pop()
+                elif part != ".":
+                    parts.append(part)
+            target = PurePosixPath(*parts)
+        found.add(str(target))
+    return found
+
+
+def import_closure(files, repo_dir=REPO_DIR) -> set:
+    """``files`` plus everything they import, stopping at other screens."""
+    seen = set()
+    pending = list(files)
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        pending.extend(
+            target
+            for target in dart_imports(path, repo_dir) - seen
+            if not target.startswith(SCREENS_DIR)
+        )
+    return seen
+
+
+def load_feature_files(path=CODE_SUMMARY_PATH) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        summary = json.load(fh)
+    features = {feature["name"]: list(feature["files"]) for feature in summary["features"]}
+    for name, files in EXTRA_FEATURE_FILES.items():
+        features.setdefault(name, []).extend(files)
+    return features
+
+
+def test_reach(feature_files, repo_dir=REPO_DIR) -> dict:
+    """TC id -> every file whose change can affect that test."""
+    closures = {name: import_closure(files, repo_dir) for name, files in feature_files.items()}
+    return {
+        tc_id: set().union(*(closures.get(name, set()) for name in features))
+        for tc_id, features in TEST_FEATURES.items()
+    }
+
+
+def select_tests(changed, reach) -> Selection:
+    selection = Selection(tc_ids=set())
+    for path in changed:
+        if path in SHARED_FILES or path.startswith(SHARED_PREFIXES):
+            return Selection(None, [f"{path} is shared by every test"])
+        script = _TC_SCRIPT.match(path)
+        if script:
+            selection.tc_ids.add(script.group(1))
+            selection.reasons.append(f"{path} is the test itself")
+            continue
+        baseline = _TC_BASELINE.match(path)
+        if baseline:
+            selection.tc_ids.add(baseline.group(1))
+            selection.reasons.append(f"{path} is a baseline of {baseline.group(1)}")
+            continue
+        hit = sorted(tc_id for tc_id, files in reach.items() if path in files)
+        if hit:
+            selection.tc_ids.update(hit)
+            selection.reasons.append(f"{path}: {' '.join(hit)}")
+        elif path.startswith("lib/"):
+            # Unmapped app code: safer to run everything than nothing.
+            return Selection(None, [f"{path} is not reached by any mapped test"])
+    return selection
+
+
+def select_changed(since="HEAD") -> Selection:
+    return select_tests(changed_files(since), test_reach(load_feature_files()))
@@ -0,0 +1,338 @@
+"""Replay ``SupabaseService``'s PostgREST requests under load.
+
+How does the backend hold up when thousands of customers open the app at
+once? This tool sends the same REST requests ``lib/services/
+supabase_service.dart`` does (:data:`SHAPES`, written as the postgrest-dart
+client encodes them), each signed in as a seeded customer. It runs them
+against a local Postgres + PostgREST built from ``schema.sql`` and
+``chat_schema.sql`` (:mod:`harness.pgstack`)::
+
+    python -m harness.load                               # 100 users for 30 s
+    python -m harness.load -u 1000 -d 120 --customers 20000
+    python -m harness.load --rate 500 --mix services=50,my_bookings=50
+    python -m harness.load --url http://127.0.0.1:3000   # a stack already up
+
+Without ``--url`` a throwaway stack is built and seeded first (the
+``--customers``, ``--providers``, ... sizes); with it, the sizes must match
+how that stack was seeded. Requests go through one pooled ``aiohttp``
+session (``--connections`` sockets). By default ``--users`` virtual users
+each send their next request as soon as the last one returns. With
+``--rate`` requests instead arrive at that many per second whatever the
+latency, and each is timed from its scheduled start, so queueing behind a
+slow server counts against it.
+
+Requests started in the first ``--warmup`` seconds are not counted. The
+report gives throughput, errors and p50/p95/p99 latency per endpoint, and
+the run is appended to ``tmp/load/history.json``.
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+try:
+    import aiohttp
+except ImportError:  # only the load tool needs it
+    aiohttp = None
+
+from . import TMP_DIR
+from .bench import append_history, git_commit, percentile
+from .pgstack import SeedSizes, add_size_arguments, booking_id, customer_id, provider_id, sizes_from, stack, user_token
+
+HISTORY_PATH = TMP_DIR / "load" / "history.json"
+
+PERCENTILES = (50, 95, 99)
+REQUEST_TIMEOUT_S = 30
+MAX_ERROR_RATE = 0.01
+
+SINGLE_OBJECT = "application/vnd.pgrst.object+json"
+
+
+@dataclass(frozen=True)
+class Shape:
+    """One ``SupabaseService`` call as the postgrest-dart client sends it.
+
+    ``{user}``, ``{provider}`` and ``{booking}`` in the parameters are
+    replaced with the signed-in customer's id, a seeded provider's id and
+    one of the customer's bookings.
+    """
+
+    call: str
+    table: str
+    params: tuple
+    # maybeSingle(): ask for one object instead of an array.
+    single: bool = False
+
+    def request(self, user, provider, booking=None):
+        query = urlencode(
+            [(key, value.format(user=user, provider=provider, booking=booking)) for key, value in self.params],
+            safe="*,()!:.",
+        )
+        return f"/{self.table}?{query}", {"Accept": SINGLE_OBJECT} if self.single else {}
+
+
+# postgrest-dart's order() defaults to ascending: false, so .order('name')
+# is name.desc.nullslast on the wire.
+SHAPES = {
+    "services": Shape("getServices", "services", (("select", "*"), ("order", "name.desc.nullslast"))),
+    "my_bookings": Shape(
+        "getMyBookings",
+        "bookings",
+        (
+            ("select", "*,services(*),profiles!bookings_provider_id_fkey(*)"),
+            ("customer_id", "eq.{user}"),
+            ("order", "created_at.desc.nullslast"),
+        ),
+    ),
+    "notifications": Shape(
+        "getNotifications",
+        "notifications",
+        (("select", "*"), ("user_id", "eq.{user}"), ("order", "created_at.desc.nullslast")),
+    ),
+    "ads": Shape("getAds", "ads", (("select", "*"), ("is_active", "eq.true"))),
+    "profile": Shape("getUserProfileById", "profiles", (("select", "*"), ("id", "eq.{user}")), single=True),
+    "providers": Shape("getProviders", "profiles", (("select", "*"), ("role", "eq.provider"))),
+    "provider_rating": Shape(
+        "getProviderRating", "profiles", (("select", "rating_count,rating_sum"), ("id", "eq.{provider}")), single=True
+    ),
+    "saved_addresses": Shape("getSavedAddresses", "saved_addresses", (("select", "*"), ("user_id", "eq.{user}"))),
+    # The initial fetch of the realtime stream.
+    "messages": Shape(
+        "getMessages",
+        "messages",
+        (("select", "*"), ("booking_id", "eq.{booking}"), ("order", "created_at.asc.nullslast")),
+    ),
+    # The app POSTs the arguments; STABLE functions answer GET the same way.
+    "service_providers": Shape(
+        "getProviders",
+        "rpc/get_service_providers",
+        (("p_service_id", "plumber"), ("p_limit", "20"), ("p_offset", "0")),
+    ),
+}
+
+# Roughly what opening the app and its home and bookings tabs sends.
+DEFAULT_MIX = {"services": 25, "my_bookings": 20, "notifications": 20, "ads": 15, "profile": 10, "provider_rating": 10}
+
+
+def _aiohttp():
+    if aiohttp is None:
+        raise RuntimeError("the load tool needs aiohttp: pip install aiohttp")
+    return aiohttp
+
+
+def parse_mix(text) -> dict:
+    """``"services=30,ads=10"`` -> {"services": 30.0, "ads": 10.0}."""
+    mix = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, sep, weight = item.partition("=")
+        if name not in SHAPES:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; known: {', '.join(SHAPES)}")
+        try:
+            mix[name] = float(weight) if sep else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad weight in {item!r}") from None
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("the mix needs at least one endpoint with a positive weight")
+    return mix
+
+
+@dataclass
+class EndpointStats:
+    latencies: list = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+    bytes: int = 0
+
+    def summary(self, seconds) -> dict:
+        total = len(self.latencies) + sum(self.errors.values())
+        summary = {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "rps": round(len(self.latencies) / seconds, 1),
+            "kb_per_request": round(self.bytes / 1024 / max(len(self.latencies), 1), 1),
+            "error_kinds": dict(self.errors),
+        }
+        if self.latencies:
+            summary.update({f"p{pct}": round(percentile(self.latencies, pct), 1) for pct in PERCENTILES})
+            summary["max"] = round(max(self.latencies), 1)
+        return summary
+
+
+class LoadRun:
+    """Issues the mix against ``url`` and collects per-endpoint stats."""
+
+    def __init__(self, url, mix, sizes: SeedSizes, warmup=5.0, seed=0):
+        self.url = url.rstrip("/")
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.sizes = sizes
+        self.warmup = warmup
+        self.rng = random.Random(seed)
+        self.stats = {name: EndpointStats() for name in self.names}
+        self.anon_key = user_token()
+        self._tokens = {}
+        self.measured_from = self.until = 0.0
+
+    def _identity(self, number):
+        customer = 1 + number % self.sizes.customers
+        if customer not in self._tokens:
+            self._tokens[customer] = user_token(customer_id(customer), lifetime=24 * 3600)
+        return customer, self._tokens[customer]
+
+    async def issue(self, session, name, number, scheduled=None):
+        """One request as customer ``number``; timed from ``scheduled`` if given."""
+        customer, token = self._identity(number)
+        provider = provider_id(1 + self.rng.randrange(self.sizes.providers))
+        booking = booking_id(customer, 1 + self.rng.randrange(max(self.sizes.bookings_per_customer, 1)))
+        path, headers = SHAPES[name].request(customer_id(customer), provider, booking)
+        headers.update({"apikey": self.anon_key, "Authorization": f"Bearer {token}", "Accept-Profile": "public"})
+        started = scheduled if scheduled is not None else time.perf_counter()
+        counted = started >= self.measured_from
+        stats = self.stats[name]
+        try:
+            async with session.get(self.url + path, headers=headers) as response:
+                body = await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            if counted:
+                stats.errors[type(exc).__name__] += 1
+            return
+        if not counted:
+            return
+        if status >= 400:
+            stats.errors[f"HTTP {status}"] += 1
+        else:
+            stats.latencies.append((time.perf_counter() - started) * 1000)
+            stats.bytes += len(body)
+
+    def _pick(self):
+        return self.rng.choices(self.names, self.weights)[0]
+
+    async def run(self, duration, users=100, rate=None, connections=None, think=0.0) -> float:
+        """Run for ``warmup + duration`` seconds; returns the measured seconds."""
+        client = _aiohttp()
+        connector = client.TCPConnector(limit=connections or (users if rate is None else 200))
+        timeout = client.ClientTimeout(total=REQUEST_TIMEOUT_S)
+        async with client.ClientSession(connector=connector, timeout=timeout) as session:
+            start = time.perf_counter()
+            self.measured_from = start + self.warmup
+            self.until = self.measured_from + duration
+            if rate is None:
+                await asyncio.gather(*(self._user(session, number, think) for number in range(users)))
+            else:
+                await self._arrivals(session, rate)
+        return min(time.perf_counter(), self.until) - self.measured_from
+
+    async def _user(self, session, number, think):
+        while time.perf_counter() < self.until:
+            await self.issue(session, self._pick(), number)
+            if think:
+                await asyncio.sleep(self.rng.expovariate(1 / think))
+
+    async def _arrivals(self, session, rate):
+        """Open loop: Poisson arrivals at ``rate`` per second."""
+        pending = set()
+        scheduled = time.perf_counter()
+        number = 0
+        while scheduled < self.until:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.ensure_future(self.issue(session, self._pick(), number, scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            number += 1
+            scheduled += self.rng.expovariate(rate)
+        if pending:
+            await asyncio.wait(pending)
+
+    def summary(self, seconds) -> dict:
+        return {name: stats.summary(seconds) for name, stats in self.stats.items()}
+
+
+def format_report(summary, seconds) -> str:
+    columns = ["requests", "errors", "rps"] + [f"p{pct}" for pct in PERCENTILES] + ["max", "kb_per_request"]
+    lines = [
+        f"{seconds:.0f} s measured, latency in ms",
+        f"{'endpoint':<18}{'call':<22}" + "".join(f"{column:>10}" for column in columns[:-1]) + f"{'KB/req':>10}",
+    ]
+    for name, stats in summary.items():
+        cells = [stats.get(column, "-") for column in columns]
+        lines.append(f"{name:<18}{SHAPES[name].call:<22}" + "".join(f"{cell:>10}" for cell in cells))
+    ok = sum(stats["requests"] - stats["errors"] for stats in summary.values())
+    errors = sum(stats["errors"] for stats in summary.values())
+    lines.append(f"{'total':<40}{ok + errors:>10}{errors:>10}{ok / seconds:>10.1f}")
+    for name, stats in summary.items():
+        for kind, count in stats["error_kinds"].items():
+            lines.append(f"  {name}: {count} x {kind}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m harness.load", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="PostgREST base URL (default: build a throwaway stack)")
+    parser.add_argument("--dsn", help="build the throwaway stack's database here instead of a new cluster")
+    parser.add_argument("-u", "--users", type=int, default=100, help="closed-loop virtual users")
+    parser.add_argument("--rate", type=float, help="open loop: requests per second instead of --users")
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds before measuring")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between a user's requests (s)")
+    parser.add_argument("--connections", type=int, help="pooled sockets (default: one per user)")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX, metavar="NAME=WEIGHT,...",
+        help=f"endpoint weights; endpoints: {', '.join(SHAPES)}",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the mix")
+    parser.add_argument("--no-history", action="store_true", help=f"don't append to {HISTORY_PATH.name}")
+    add_size_arguments(parser)
+    return parser.parse_args(argv)
+
+
+async def _load(args, url) -> tuple:
+    run = LoadRun(url, args.mix, sizes_from(args), warmup=args.warmup, seed=args.seed)
+    seconds = await run.run(
+        args.duration, users=args.users, rate=args.rate, connections=args.connections, think=args.think
+    )
+    return run.summary(seconds), seconds
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        _aiohttp()
+        if args.url:
+            summary, seconds = asyncio.run(_load(args, args.url))
+        else:
+            print("building the local stack...", flush=True)
+            with stack(sizes_from(args), dsn=args.dsn) as (_, url):
+                summary, seconds = asyncio.run(_load(args, url))
+    except (RuntimeError, subprocess.CalledProcessError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    print(format_report(summary, seconds))
+    if not args.no_history:
+        append_history(
+            {
+                "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "commit": git_commit(),
+                "users": None if args.rate else args.users,
+                "rate": args.rate,
+                "duration": round(seconds, 1),
+                "mix": args.mix,
+                "sizes": vars(sizes_from(args)),
+                "endpoints": summary,
+            },
+            HISTORY_PATH,
+        )
+    requests = sum(stats["requests"] for stats in summary.values())
+    errors = sum(stats["errors"] for stats in summary.values())
+    return 1 if not requests or errors / requests > MAX_ERROR_RATE else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Discover TC scripts and load their ``run_test`` coroutines without running them."""
+
+import ast
+import re
+import types
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import TESTS_DIR
+
+TC_PATTERN = re.compile(r"^(TC\d{3})_(.+)\.py$")
+
+
+@dataclass(frozen=True)
+class TestCase:
+    tc_id: str
+    title: str
+    path: Path
+
+
+def discover(tests_dir: Path = TESTS_DIR, only=None) -> list:
+    """Return the TC scripts in ``tests_dir`` ordered by id.
+
+    ``only`` optionally restricts the result to a collection of ids such as
+    ``{"TC004", "TC005"}``.
+    """
+    cases = []
+    for path in sorted(tests_dir.glob("TC*.py")):
+        match = TC_PATTERN.match(path.name)
+        if not match:
+            continue
+        tc_id = match.group(1)
+        if only and tc_id not in only:
+            continue
+        cases.append(TestCase(tc_id, match.group(2).replace("_", " "), path))
+    return cases
+
+
+def _is_module_level_run(node) -> bool:
+    # Matches the trailing ``asyncio.run(run_test())`` every script ends with.
+    if not isinstance(node, ast.Expr) or not isinstance(node.value, ast.Call):
+        return False
+    func = node.value.func
+    return (
+        isinstance(func, ast.Attribute)
+        and func.attr == "run"
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "asyncio"
+    )
+
+
+def load_module(case: TestCase) -> types.ModuleType:
+    """Execute a TC script as a module, minus its top-level ``asyncio.run``."""
+    source = case.path.read_text(encoding="utf-8")
+    tree = ast.parse(source, filename=str(case.path))
+    tree.body = [node for node in tree.body if not _is_module_level_run(node)]
+
+    module = types.ModuleType(f"testsprite_{case.tc_id}")
+    module.__file__ = str(case.path)
+    # The generated assertions call ``expect`` without importing it.
+    from playwright.async_api import expect
+
+    module.expect = expect
+    exec(compile(tree, str(case.path), "exec"), module.__dict__)
+    return module
+
+
+def load_run_test(case: TestCase):
+    module = load_module(case)
+    run_test = getattr(module, "run_test", None)
+    if run_test is None:
+        raise AttributeError(f"{case.path.name} does not define run_test()")
+    return module, run_test
@@ -0,0 +1,387 @@
+"""A local Postgres + PostgREST built from the repo's SQL files.
+
+The backend benchmarks need the app's real database, not the in-process
+stand-in of :mod:`harness.supabase_stub`. This module builds one:
+
+1. :func:`local_postgres` creates a throwaway cluster under ``tmp/pgstack/``
+   with ``initdb`` and ``pg_ctl``, or you pass ``--dsn`` for a server you
+   already run.
+2. :func:`build_database` applies :data:`SUPABASE_SHIM_SQL`, then
+   ``schema.sql`` and ``chat_schema.sql``, the migrations in
+   :data:`~harness.schema.MIGRATION_FILES`, then :data:`GRANTS_SQL`. The
+   shim adds the Supabase pieces the schema relies on: the ``auth`` schema,
+   ``auth.users``, ``auth.uid()``, and the ``anon`` / ``authenticated`` /
+   ``authenticator`` roles.
+3. :func:`seed` fills the tables with ``generate_series``. Seeded customers,
+   providers and bookings have predictable ids (:func:`customer_id`,
+   :func:`provider_id`, :func:`booking_id`), so load tools can sign in as
+   them with :func:`user_token` and address their rows without querying
+   first.
+4. :func:`postgrest` starts the ``postgrest`` binary against it. PostgREST
+   checks JWTs signed with :data:`JWT_SECRET`, the same way Supabase does.
+
+To keep a stack up for manual use, run from the ``testsprite_tests``
+directory::
+
+    python -m harness.pgstack --customers 5000 --providers 500
+
+It prints the DSN and the REST URL and runs until Ctrl-C. ``initdb``
+refuses to run as root; use ``--dsn`` there (set ``PGRST_DB_URI`` too if
+the ``authenticator`` role needs a password on that server).
+"""
+
+import argparse
+import base64
+import glob
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+
+from . import TMP_DIR
+from .schema import MIGRATION_FILES, read_sql
+
+STACK_DIR = TMP_DIR / "pgstack"
+DATABASE = "khdemti"
+# PostgREST wants at least 32 characters. Local only; never deploy this.
+JWT_SECRET = "khdemti-local-postgrest-jwt-secret-not-for-deploy"
+STARTUP_TIMEOUT_S = 30
+
+SUPABASE_SHIM_SQL = """
+DO $$
+DECLARE
+    name TEXT;
+BEGIN
+    FOREACH name IN ARRAY ARRAY['anon', 'authenticated', 'service_role'] LOOP
+        IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = name) THEN
+            EXECUTE format('CREATE ROLE %I NOLOGIN', name);
+        END IF;
+    END LOOP;
+    IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'authenticator') THEN
+        CREATE ROLE authenticator LOGIN NOINHERIT;
+    END IF;
+END
+$$;
+GRANT anon, authenticated, service_role TO authenticator;
+ALTER ROLE service_role BYPASSRLS;
+
+CREATE SCHEMA IF NOT EXISTS auth;
+CREATE TABLE IF NOT EXISTS auth.users (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    phone TEXT,
+    email TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- As Supabase defines them: the caller's id and role from the JWT claims
+-- PostgREST puts in request.jwt.claims.
+CREATE OR REPLACE FUNCTION auth.uid() RETURNS UUID LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(
+        NULLIF(current_setting('request.jwt.claim.sub', true), ''),
+        (NULLIF(current_setting('request.jwt.claims', true), '')::jsonb ->> 'sub')
+    )::uuid
+$$;
+CREATE OR REPLACE FUNCTION auth.role() RETURNS TEXT LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(
+        NULLIF(current_setting('request.jwt.claim.role', true), ''),
+        (NULLIF(current_setting('request.jwt.claims', true), '')::jsonb ->> 'role')
+    )::text
+$$;
+"""
+
+GRANTS_SQL = """
+GRANT USAGE ON SCHEMA public, auth TO anon, authenticated, service_role;
+GRANT ALL ON ALL TABLES IN SCHEMA public TO anon, authenticated, service_role;
+GRANT ALL ON ALL SEQUENCES IN SCHEMA public TO anon, authenticated, service_role;
+GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public, auth TO anon, authenticated, service_role;
+NOTIFY pgrst, 'reload schema';
+"""
+
+
+@dataclass
+class SeedSizes:
+    customers: int = 2000
+    providers: int = 200
+    # Services each provider offers.
+    services_per_provider: int = 2
+    bookings_per_customer: int = 5
+    notifications_per_customer: int = 10
+    saved_addresses_per_customer: int = 2
+    ratings_per_provider: int = 20
+    messages_per_booking: int = 0
+    ads: int = 20
+
+
+def _seeded_id(kind, number) -> uuid.UUID:
+    # Same as md5('<kind>-' || n)::uuid in seed_sql().
+    return uuid.UUID(hashlib.md5(f"{kind}-{number}".encode()).hexdigest())
+
+
+def customer_id(number) -> uuid.UUID:
+    """Id of seeded customer ``number`` (1-based)."""
+    return _seeded_id("customer", number)
+
+
+def provider_id(number) -> uuid.UUID:
+    """Id of seeded provider ``number`` (1-based)."""
+    return _seeded_id("provider", number)
+
+
+def booking_id(customer, number) -> uuid.UUID:
+    """Id of seeded customer ``customer``'s booking ``number`` (both 1-based)."""
+    return _seeded_id("booking", f"{customer}-{number}")
+
+
+def seed_sql(sizes: SeedSizes) -> str:
+    """SQL that fills every table ``SupabaseService`` reads, sized by ``sizes``."""
+    s = sizes
+    return f"""
+TRUNCATE profiles, provider_services, bookings, ratings, notifications, ads, saved_addresses, messages CASCADE;
+
+INSERT INTO profiles (id, phone, full_name, role, created_at)
+SELECT md5('customer-' || n)::uuid, '+2126' || lpad(n::text, 8, '0'), 'Customer ' || n, 'customer',
+       NOW() - n * INTERVAL '1 minute'
+FROM generate_series(1, {s.customers}) n;
+
+INSERT INTO profiles (id, phone, full_name, role, bio, age, manual_rating, is_online, is_verified, created_at)
+SELECT md5('provider-' || n)::uuid, '+2127' || lpad(n::text, 8, '0'), 'Provider ' || n, 'provider',
+       'Provider ' || n || ' bio', 20 + n % 40, 1 + (n % 40) / 10.0, n % 3 = 0, n % 2 = 0,
+       NOW() - n * INTERVAL '1 minute'
+FROM generate_series(1, {s.providers}) n;
+
+WITH catalog AS (SELECT array_agg(id ORDER BY id) AS ids FROM services)
+INSERT INTO provider_services (provider_id, service_id, hourly_rate, is_available)
+SELECT DISTINCT ON (p, catalog.ids[1 + (p * 7 + k * 3) % array_length(catalog.ids, 1)])
+       md5('provider-' || p)::uuid, catalog.ids[1 + (p * 7 + k * 3) % array_length(catalog.ids, 1)],
+       50 + (p % 20) * 5, p % 4 <> 0
+FROM catalog, generate_series(1, {s.providers}) p, generate_series(1, {s.services_per_provider}) k;
+
+WITH catalog AS (SELECT array_agg(id ORDER BY id) AS ids FROM services)
+INSERT INTO bookings (id, customer_id, provider_id, service_id, status, scheduled_at, address, is_urgent, price, created_at)
+SELECT md5('booking-' || c || '-' || k)::uuid, md5('customer-' || c)::uuid,
+       md5('provider-' || (1 + (c * 31 + k) % {s.providers}))::uuid,
+       catalog.ids[1 + (c + k) % array_length(catalog.ids, 1)],
+       (ARRAY['pending', 'accepted', 'in_progress', 'completed', 'cancelled', 'rejected'])[1 + (c + k) % 6],
+       NOW() + k * INTERVAL '1 day', c || ' Rue Example, Casablanca', k % 7 = 0, 100 + k * 10,
+       NOW() - (c * {s.bookings_per_customer} + k) * INTERVAL '1 minute'
+FROM catalog, generate_series(1, {s.customers}) c, generate_series(1, {s.bookings_per_customer}) k;
+
+INSERT INTO ratings (rater_id, target_id, rating, comment, created_at)
+SELECT md5('customer-' || (1 + (p * 17 + r) % {s.customers}))::uuid, md5('provider-' || p)::uuid,
+       1 + (p + r) % 5, 'Rating ' || r, NOW() - r * INTERVAL '1 hour'
+FROM generate_series(1, {s.providers}) p, generate_series(1, {s.ratings_per_provider}) r;
+
+INSERT INTO notifications (user_id, title, body, type, is_read, created_at)
+SELECT md5('customer-' || c)::uuid, 'Notification ' || k, 'Booking update ' || k, 'booking', k % 3 = 0,
+       NOW() - (c * {s.notifications_per_customer} + k) * INTERVAL '1 minute'
+FROM generate_series(1, {s.customers}) c, generate_series(1, {s.notifications_per_customer}) k;
+
+INSERT INTO saved_addresses (user_id, label, address, latitude, longitude, is_default, created_at)
+SELECT md5('customer-' || c)::uuid, (ARRAY['Home', 'Work', 'Other'])[1 + k % 3], k || ' Rue Example, Casablanca',
+       33.5 + (c % 1000) / 10000.0, -7.6 - (c % 1000) / 10000.0, k = 1, NOW() - k * INTERVAL '1 day'
+FROM generate_series(1, {s.customers}) c, generate_series(1, {s.saved_addresses_per_customer}) k;
+
+INSERT INTO messages (booking_id, sender_id, content, created_at)
+SELECT b.id, CASE WHEN m % 2 = 0 THEN b.customer_id ELSE b.provider_id END, 'Message ' || m,
+       b.created_at + m * INTERVAL '1 minute'
+FROM bookings b, generate_series(1, {s.messages_per_booking}) m;
+
+INSERT INTO ads (title, description, is_active, priority, created_at)
+SELECT 'Ad ' || n, 'Promotion ' || n, n % 4 <> 0, n % 5, NOW() - n * INTERVAL '1 hour'
+FROM generate_series(1, {s.ads}) n;
+
+ANALYZE;
+"""
+
+
+def pg_bin(name) -> str:
+    """Path of a Postgres client/server program, also outside ``PATH`` on Debian."""
+    found = shutil.which(name) or (sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}")) or [None])[-1]
+    if not found:
+        raise RuntimeError(f"{name} not found; install PostgreSQL or pass --dsn for an existing server")
+    return found
+
+
+def with_user(dsn, user) -> str:
+    """``dsn`` connecting as ``user`` instead (keeps host, port, database)."""
+    parts = urllib.parse.urlsplit(dsn)
+    host = parts.hostname or ""
+    if parts.port:
+        host += f":{parts.port}"
+    return urllib.parse.urlunsplit(parts._replace(netloc=f"{user}@{host}"))
+
+
+def run_sql(dsn, sql, capture=False) -> str:
+    """Run ``sql`` through ``psql``; stops at the first error."""
+    result = subprocess.run(
+        [pg_bin("psql"), "-X", "-q", "-v", "ON_ERROR_STOP=1", "-d", dsn, *(["-At"] if capture else [])],
+        input=sql, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"psql failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def build_database(dsn, extra_sql=(), migrations=MIGRATION_FILES):
+    """Apply the Supabase shim, the schema files, ``migrations``, ``extra_sql`` and the grants, in order."""
+    run_sql(dsn, SUPABASE_SHIM_SQL)
+    run_sql(dsn, read_sql())
+    for path in migrations:
+        run_sql(dsn, read_sql([path]))
+    for sql in extra_sql:
+        run_sql(dsn, sql)
+    run_sql(dsn, GRANTS_SQL)
+
+
+def seed(dsn, sizes: SeedSizes):
+    run_sql(dsn, seed_sql(sizes))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_postgres(directory=STACK_DIR / "pgdata", port=None):
+    """Run a throwaway Postgres cluster; yields the DSN of a fresh database."""
+    if not (directory / "PG_VERSION").exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        subprocess.run(
+            [pg_bin("initdb"), "-D", str(directory), "-U", "postgres", "--auth=trust", "-E", "UTF8", "--no-sync"],
+            check=True, capture_output=True,
+        )
+    port = port or free_port()
+    options = f"-p {port} -k {directory} -c listen_addresses=127.0.0.1 -c fsync=off -c synchronous_commit=off"
+    log = directory.parent / "postgres.log"
+    subprocess.run(
+        [pg_bin("pg_ctl"), "-D", str(directory), "-o", options, "-l", str(log), "-w", "start"],
+        check=True, capture_output=True,
+    )
+    try:
+        server = f"postgresql://postgres@127.0.0.1:{port}"
+        run_sql(f"{server}/postgres", f"DROP DATABASE IF EXISTS {DATABASE}; CREATE DATABASE {DATABASE};")
+        yield f"{server}/{DATABASE}"
+    finally:
+        subprocess.run([pg_bin("pg_ctl"), "-D", str(directory), "-m", "fast", "-w", "stop"], capture_output=True)
+
+
+@contextmanager
+def postgrest(dsn, port=None, pool=20, binary="postgrest"):
+    """Run PostgREST against ``dsn``; yields its base URL."""
+    if not shutil.which(binary):
+        raise RuntimeError(f"{binary} not found; see https://postgrest.org/en/stable/explanations/install.html")
+    port = port or free_port()
+    env = {
+        **os.environ,
+        # An existing server may need a password for authenticator.
+        "PGRST_DB_URI": os.environ.get("PGRST_DB_URI") or with_user(dsn, "authenticator"),
+        "PGRST_DB_SCHEMAS": "public",
+        "PGRST_DB_ANON_ROLE": "anon",
+        "PGRST_DB_POOL": str(pool),
+        "PGRST_JWT_SECRET": JWT_SECRET,
+        "PGRST_SERVER_HOST": "127.0.0.1",
+        "PGRST_SERVER_PORT": str(port),
+        "PGRST_LOG_LEVEL": "error",
+        # EXPLAIN through the API, for harness.plans. Local only.
+        "PGRST_DB_PLAN_ENABLED": "true",
+    }
+    STACK_DIR.mkdir(parents=True, exist_ok=True)
+    with open(STACK_DIR / "postgrest.log", "w") as log:
+        process = subprocess.Popen([binary], env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        while True:
+            try:
+                urllib.request.urlopen(f"{url}/services?select=id&limit=1", timeout=1).close()
+                break
+            except (urllib.error.URLError, OSError):
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"PostgREST did not start; see {STACK_DIR / 'postgrest.log'}") from None
+                time.sleep(0.2)
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@contextmanager
+def stack(sizes: SeedSizes = None, dsn=None, extra_sql=(), rest=True, migrations=MIGRATION_FILES):
+    """Build, seed and serve the database; yields ``(dsn, rest_url)``.
+
+    Without ``dsn`` a throwaway cluster is started; ``rest=False`` skips
+    PostgREST for callers that only need SQL.
+    """
+    with local_postgres() if dsn is None else nullcontext(dsn) as dsn:
+        build_database(dsn, extra_sql, migrations)
+        seed(dsn, sizes or SeedSizes())
+        if not rest:
+            yield dsn, None
+            return
+        with postgrest(dsn) as url:
+            yield dsn, url
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def sign_jwt(claims, secret=JWT_SECRET) -> str:
+    """HS256 JWT, as GoTrue issues and PostgREST verifies them."""
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = _b64(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64(signature)}"
+
+
+def user_token(user_id=None, lifetime=3600, secret=JWT_SECRET) -> str:
+    """Access token for ``user_id``, or the anon key without one."""
+    if user_id is None:
+        return sign_jwt({"role": "anon", "iss": "supabase"}, secret)
+    now = int(time.time())
+    claims = {"sub": str(user_id), "role": "authenticated", "aud": "authenticated", "iat": now, "exp": now + lifetime}
+    return sign_jwt(claims, secret)
+
+
+def add_size_arguments(parser):
+    """``--customers``, ``--providers``, ... for every :class:`SeedSizes` field."""
+    for name, default in asdict(SeedSizes()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default, metavar="N")
+
+
+def sizes_from(args) -> SeedSizes:
+    return SeedSizes(**{name: getattr(args, name) for name in asdict(SeedSizes())})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m harness.pgstack", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dsn", help="build into this database instead of a throwaway cluster")
+    add_size_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        with stack(sizes_from(args), dsn=args.dsn) as (dsn, url):
+            print(f"postgres:  {dsn}\npostgrest: {url}\nanon key:  {user_token()}", flush=True)
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        return 0
+    except (RuntimeError, subprocess.CalledProcessError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
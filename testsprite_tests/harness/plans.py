@@ -0,0 +1,185 @@
+"""Query-plan checks for every ``SupabaseService`` query on a large database.
+
+Run from the ``testsprite_tests`` directory::
+
+    python -m harness.plans                                  # 100k customers
+    python -m harness.plans --customers 20000                # quicker
+    python -m harness.plans --without indexes_schema.sql     # what it catches
+
+A stack from :mod:`harness.pgstack` is built and seeded at
+:data:`PLAN_SIZES` (about a million notifications and messages; the usual
+``--customers``, ``--providers``, ... override it). Each request in
+:data:`harness.load.SHAPES` is then sent to PostgREST as seeded customer 1,
+asking for ``EXPLAIN (ANALYZE, BUFFERS)`` instead of rows (PostgREST's
+``application/vnd.pgrst.plan+json``), so the plans are those of the SQL
+PostgREST really generates, row-level security included.
+
+A query fails if its plan
+
+* reads a table with a ``Seq Scan`` of more than ``--seq-scan-rows`` rows
+  (lookup tables such as ``services`` and ``ads`` stay under it), or
+* spills to disk: an ``external merge`` sort or a multi-batch hash, or
+* sorts the rows of a query whose order an index provides
+  (:data:`INDEX_ORDERED`).
+
+The admin screens' ``getAllUsers()`` / ``getAllBookings()`` read whole
+tables by design and are not checked. Plans are saved to
+``tmp/plans/<query>.json``. Exits 1 if any query fails, 2 if the stack
+could not be built.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import urllib.error
+import urllib.request
+from dataclasses import asdict
+
+from . import TMP_DIR
+from .load import SHAPES
+from .pgstack import SeedSizes, add_size_arguments, booking_id, customer_id, provider_id, sizes_from, stack, user_token
+from .schema import MIGRATION_FILES
+
+PLANS_DIR = TMP_DIR / "plans"
+PLAN_SIZES = SeedSizes(customers=100_000, providers=2_000, messages_per_booking=2)
+SEQ_SCAN_ROWS = 1000
+PLAN_MEDIA = 'application/vnd.pgrst.plan+json; for="{media}"; options=analyze|buffers'
+REQUEST_TIMEOUT_S = 120
+# Migrations --without may skip. The others create objects SHAPES query
+# (get_service_providers, profiles.rating_count), so without them requests
+# would fail with 4xx instead of showing a plan.
+OPTIONAL_MIGRATIONS = ("indexes_schema.sql", "rls_policies_schema.sql")
+# Shapes whose ORDER BY an index in indexes_schema.sql returns presorted.
+INDEX_ORDERED = {
+    "my_bookings": "idx_bookings_customer_created",
+    "notifications": "idx_notifications_user_created",
+    "messages": "idx_messages_booking_created",
+}
+
+
+def explain(url, shape, token) -> dict:
+    """EXPLAIN (ANALYZE, BUFFERS) output of ``shape`` as customer 1, in JSON."""
+    path, headers = shape.request(customer_id(1), provider_id(1), booking_id(1, 1))
+    media = headers.pop("Accept", "application/json")
+    headers.update(
+        {
+            "apikey": user_token(),
+            "Authorization": f"Bearer {token}",
+            "Accept-Profile": "public",
+            "Accept": PLAN_MEDIA.format(media=media),
+        }
+    )
+    request = urllib.request.Request(url.rstrip("/") + path, headers=headers)
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_S) as response:
+        plan = json.loads(response.read())
+    return plan[0] if isinstance(plan, list) else plan
+
+
+def nodes(node, subplans=True):
+    """``node`` and its descendants; ``subplans=False`` leaves out SubPlans and InitPlans."""
+    yield node
+    for child in node.get("Plans", ()):
+        if subplans or child.get("Parent Relationship") not in ("SubPlan", "InitPlan"):
+            yield from nodes(child, subplans)
+
+
+def problems(plan, seq_scan_rows=SEQ_SCAN_ROWS, index=None) -> list:
+    """What in ``plan`` fails the check, as readable strings.
+
+    With ``index``, the query's own rows must come back in index order: a
+    Sort outside subplans (policies, embeds) means ``index`` no longer
+    matches the ORDER BY.
+    """
+    found = []
+    if index:
+        for node in nodes(plan["Plan"], subplans=False):
+            if node["Node Type"] in ("Sort", "Incremental Sort"):
+                keys = ", ".join(node.get("Sort Key", ()))
+                found.append(f"sorts on {keys} instead of reading {index} in order")
+    for node in nodes(plan["Plan"]):
+        if node["Node Type"] == "Seq Scan":
+            per_loop = node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)
+            scanned = per_loop * node.get("Actual Loops", 1)
+            if scanned > seq_scan_rows:
+                found.append(f"Seq Scan on {node.get('Relation Name')} read {scanned:,} rows")
+        if node.get("Sort Space Type") == "Disk" or "external" in node.get("Sort Method", ""):
+            keys = ", ".join(node.get("Sort Key", ()))
+            found.append(f"sort on {keys} spilled to disk ({node.get('Sort Space Used')} kB)")
+        if node.get("Hash Batches", 1) > 1:
+            found.append(f"hash spilled to disk ({node['Hash Batches']} batches)")
+    return found
+
+
+def check_all(url, seq_scan_rows=SEQ_SCAN_ROWS) -> list:
+    """Explain and check every shape; one result dict per shape."""
+    PLANS_DIR.mkdir(parents=True, exist_ok=True)
+    token = user_token(customer_id(1))
+    results = []
+    for name, shape in SHAPES.items():
+        result = {"name": name, "call": shape.call, "ms": None, "hit": None, "read": None}
+        try:
+            plan = explain(url, shape, token)
+        except urllib.error.HTTPError as exc:
+            result["problems"] = [f"HTTP {exc.code}: {exc.read().decode(errors='replace')[:200]}"]
+            results.append(result)
+            continue
+        (PLANS_DIR / f"{name}.json").write_text(json.dumps(plan, indent=2))
+        top = plan["Plan"]
+        result.update(
+            ms=plan.get("Execution Time"),
+            hit=top.get("Shared Hit Blocks"),
+            read=top.get("Shared Read Blocks"),
+            problems=problems(plan, seq_scan_rows, INDEX_ORDERED.get(name)),
+        )
+        results.append(result)
+    return results
+
+
+def format_results(results) -> str:
+    def number(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    lines = [f"{'query':<18}{'call':<22}{'ms':>9}{'hit':>8}{'read':>8}  result"]
+    for row in results:
+        lines.append(
+            f"{row['name']:<18}{row['call']:<22}{number(row['ms'], '.2f'):>9}"
+            f"{number(row['hit'], 'd'):>8}{number(row['read'], 'd'):>8}  {'FAIL' if row['problems'] else 'ok'}"
+        )
+        lines.extend(f"{'':<18}  - {problem}" for problem in row["problems"])
+    failed = sum(1 for row in results if row["problems"])
+    lines.append(f"{len(results) - failed} passed, {failed} failed; plans in {PLANS_DIR}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m harness.plans", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dsn", help="build into this database instead of a throwaway cluster")
+    parser.add_argument(
+        "--seq-scan-rows", type=int, default=SEQ_SCAN_ROWS, metavar="N",
+        help="fail on sequential scans reading more rows than this",
+    )
+    parser.add_argument(
+        "--without", action="append", default=[], choices=OPTIONAL_MIGRATIONS,
+        help="skip this migration, e.g. to see what the suite catches without it",
+    )
+    add_size_arguments(parser)
+    parser.set_defaults(**asdict(PLAN_SIZES))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    migrations = [path for path in MIGRATION_FILES if path.name not in args.without]
+    try:
+        with stack(sizes_from(args), dsn=args.dsn, migrations=migrations) as (dsn, url):
+            results = check_all(url, args.seq_scan_rows)
+    except (RuntimeError, subprocess.CalledProcessError, urllib.error.URLError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    print(format_results(results))
+    return 1 if any(row["problems"] for row in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
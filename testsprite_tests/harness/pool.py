@@ -0,0 +1,144 @@
+"""A pool of warm Chromium instances shared by the TC scripts.
+
+Each generated script starts Playwright, launches Chromium, opens a context
+and tears everything down again. The classes below stand in for the objects
+a script gets back from ``async_api.async_playwright().start()`` and
+``pw.chromium.launch()`` so the script runs unmodified while the browser it
+"launches" is really one leased from the pool. Contexts are still created
+fresh per test, which keeps cookies, storage and service workers isolated.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from playwright import async_api
+
+from . import LAUNCH_ARGS
+
+
+class BrowserPool:
+    def __init__(self, size=1, headless=True, launch_args=None):
+        self.size = max(1, size)
+        self.headless = headless
+        self.launch_args = list(launch_args or LAUNCH_ARGS)
+        self.launches = 0
+        self._playwright = None
+        self._idle = asyncio.Queue()
+        self._browsers = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _launch(self):
+        browser = await self._playwright.chromium.launch(
+            headless=self.headless, args=self.launch_args
+        )
+        self.launches += 1
+        self._browsers.append(browser)
+        return browser
+
+    async def start(self):
+        self._playwright = await async_api.async_playwright().start()
+        browsers = await asyncio.gather(*(self._launch() for _ in range(self.size)))
+        for browser in browsers:
+            self._idle.put_nowait(browser)
+
+    async def close(self):
+        for browser in self._browsers:
+            try:
+                await browser.close()
+            except async_api.Error:
+                pass
+        self._browsers.clear()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    @asynccontextmanager
+    async def lease(self, context_hooks=(), context_options=None):
+        """Borrow a browser for one test; a crashed browser is replaced.
+
+        ``context_hooks`` are awaited with every context the test opens, and
+        ``context_options`` are default ``new_context()`` keyword arguments.
+        """
+        browser = await self._idle.get()
+        try:
+            if not browser.is_connected():
+                self._browsers.remove(browser)
+                browser = await self._launch()
+            leased = LeasedBrowser(browser, context_hooks, context_options)
+            try:
+                yield leased
+            finally:
+                await leased.close()
+        finally:
+            self._idle.put_nowait(browser)
+
+
+class LeasedBrowser:
+    """A pooled browser whose ``close()`` only closes the contexts it opened."""
+
+    def __init__(self, browser, context_hooks=(), context_options=None):
+        self._browser = browser
+        self._context_hooks = list(context_hooks)
+        self._context_options = dict(context_options or {})
+        self.opened_contexts = []
+
+    async def new_context(self, **kwargs):
+        context = await self._browser.new_context(**{**self._context_options, **kwargs})
+        self.opened_contexts.append(context)
+        for hook in self._context_hooks:
+            await hook(context)
+        return context
+
+    async def close(self, **kwargs):
+        while self.opened_contexts:
+            context = self.opened_contexts.pop()
+            try:
+                await context.close()
+            except async_api.Error:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._browser, name)
+
+
+class _LeasedBrowserType:
+    def __init__(self, browser):
+        self._browser = browser
+
+    async def launch(self, **kwargs):
+        # Launch options from the script are ignored; the pool owns them.
+        return self._browser
+
+
+class _LeasedPlaywright:
+    def __init__(self, browser):
+        self.chromium = _LeasedBrowserType(browser)
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+class AsyncApiShim:
+    """Replaces the ``async_api`` module inside a loaded TC script.
+
+    ``async_playwright()`` hands back the leased browser; every other name
+    (``Error``, ``expect``, ...) resolves to the real Playwright module.
+    """
+
+    def __init__(self, browser):
+        self._playwright = _LeasedPlaywright(browser)
+
+    def async_playwright(self):
+        return self._playwright
+
+    def __getattr__(self, name):
+        return getattr(async_api, name)
@@ -0,0 +1,310 @@
+"""Run the TC scripts as one tree of shared action prefixes.
+
+The frontend test plan's steps mostly share a prefix -- open the app, get
+through onboarding, reach login or home -- and every generated script
+replays it from scratch. The plan's steps are prose; the scripts are their
+executable form. So the planner compiles the statements that follow
+``page = await context.new_page()`` in each script into a trie keyed by the
+statement's AST (comments and line numbers don't matter). Each trie node
+runs once.
+
+Where the trie branches, the page is forked. The storage state (cookies,
+localStorage, IndexedDB) and URL are captured and opened in a new context
+for each further branch, and the last branch carries on in the original
+page. The app's in-memory state, such as a carousel position, does not
+survive that. So after loading, a fork has to show the same URL and
+semantics labels as the page it was taken from. Otherwise the branch replays
+the prefix in a fresh context, as it also does when its remaining statements
+read a local (``elem``, ``frame``, ...) that the prefix bound. With
+``--offline``, each fork gets a copy of its parent's Supabase stand-in.
+
+Tests whose script doesn't follow the generated layout, or that start from
+a different auth snapshot, get their own tree or run as usual.
+"""
+
+import ast
+import copy
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from .asset_cache import AssetCache
+from .flutter import SleeplessAsyncio, settle_waits, wait_for_flutter_settled
+from .loader import load_module
+from .pool import BrowserPool
+from .runner import Outcome, RunOptions, describe_error, format_timestamp, record_outcome, run_case
+from .semantics import semantics_on
+from .supabase_stub import SupabaseStub
+from .throttle import get_profile
+
+FINGERPRINT_JS = """
+() => Array.from(document.querySelectorAll('flt-semantics'))
+  .map((node) => node.getAttribute('aria-label') || '')
+  .filter(Boolean)
+  .join('\\n')
+"""
+
+# Bound by the runner itself rather than by actions.
+RUNNER_NAMES = {"context", "page"}
+
+
+@dataclass
+class Action:
+    key: str
+    code: object
+    loads: frozenset
+    stores: frozenset
+
+
+@dataclass
+class Node:
+    action: Action = None
+    children: dict = field(default_factory=dict)
+    # Tests whose last action is this node.
+    cases: list = field(default_factory=list)
+    # Names read by the subtree before it binds them.
+    needs: frozenset = frozenset()
+
+    def all_cases(self) -> list:
+        found = list(self.cases)
+        for child in self.children.values():
+            found.extend(child.all_cases())
+        return found
+
+    def size(self) -> int:
+        return (self.action is not None) + sum(child.size() for child in self.children.values())
+
+
+def _opens_page(stmt) -> bool:
+    return (
+        isinstance(stmt, ast.Assign)
+        and [getattr(target, "id", None) for target in stmt.targets] == ["page"]
+        and isinstance(stmt.value, ast.Await)
+        and isinstance(stmt.value.value, ast.Call)
+        and getattr(stmt.value.value.func, "attr", None) == "new_page"
+    )
+
+
+def script_actions(case) -> list:
+    """The statements after ``page = await context.new_page()`` in ``run_test``."""
+    tree = ast.parse(case.path.read_text(encoding="utf-8"), filename=str(case.path))
+    for node in tree.body:
+        if isinstance(node, ast.AsyncFunctionDef) and node.name == "run_test":
+            for stmt in node.body:
+                if isinstance(stmt, ast.Try):
+                    for index, inner in enumerate(stmt.body):
+                        if _opens_page(inner):
+                            return stmt.body[index + 1:]
+    raise ValueError(f"{case.path.name} does not follow the generated script layout")
+
+
+def compile_action(stmt, filename) -> Action:
+    names = [node for node in ast.walk(stmt) if isinstance(node, ast.Name)]
+    stores = frozenset(node.id for node in names if isinstance(node.ctx, ast.Store))
+    loads = frozenset(node.id for node in names if isinstance(node.ctx, ast.Load)) - stores
+    # Run as ``async def __action__(): global <stored names>; <stmt>`` so bound
+    # names live in the branch namespace and later actions can read them.
+    module = ast.parse("async def __action__():\n    pass")
+    func = module.body[0]
+    func.body = ([ast.Global(names=sorted(stores))] if stores else []) + [stmt]
+    ast.copy_location(func, stmt)
+    ast.fix_missing_locations(module)
+    return Action(ast.dump(stmt), compile(module, filename, "exec"), loads, stores)
+
+
+def _set_needs(node):
+    needs = set()
+    for child in node.children.values():
+        needs |= _set_needs(child)
+    if node.action:
+        needs = (needs - node.action.stores) | node.action.loads
+    node.needs = frozenset(needs)
+    return node.needs
+
+
+def build_tree(cases):
+    """Compile ``cases`` into a trie; returns ``(root, cases that don't fit)``."""
+    root, standalone = Node(), []
+    for case in cases:
+        try:
+            statements = script_actions(case)
+        except (ValueError, SyntaxError):
+            standalone.append(case)
+            continue
+        node = root
+        for stmt in statements:
+            key = ast.dump(stmt)
+            if key not in node.children:
+                node.children[key] = Node(compile_action(stmt, str(case.path)))
+            node = node.children[key]
+        node.cases.append(case)
+    _set_needs(root)
+    return root, standalone
+
+
+@dataclass
+class Branch:
+    context: object
+    page: object
+    namespace: dict
+    stub: object = None
+    # Actions run so far, for replaying the prefix.
+    path: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class TreeRunner:
+    def __init__(self, browser, options: RunOptions, on_outcome=None):
+        self.browser = browser
+        self.options = options
+        self.on_outcome = on_outcome
+        self.outcomes = []
+        self.forks = 0
+        self.replays = 0
+        self._modules = {}
+
+    def _globals(self, case) -> dict:
+        if case.tc_id not in self._modules:
+            module = load_module(case)
+            if not self.options.fixed_waits:
+                module.asyncio = SleeplessAsyncio()
+            self._modules[case.tc_id] = {
+                name: value for name, value in vars(module).items() if name != "run_test"
+            }
+        return self._modules[case.tc_id]
+
+    def _finish(self, case, branch, error=None):
+        # Cases share the tree's run, so each is dated by its own elapsed
+        # time (prefix included): historical_durations() reads modified - created.
+        finished = datetime.now(timezone.utc)
+        created = format_timestamp(finished - timedelta(seconds=branch.elapsed))
+        outcome = Outcome(case.tc_id, case.title, created=created, duration=branch.elapsed)
+        if error:
+            outcome.status, outcome.error = "FAILED", error
+        outcome.modified = format_timestamp(finished)
+        self.outcomes.append(outcome)
+        record_outcome(outcome, self.options, self.on_outcome)
+
+    async def _open(self, case, storage_state=None, stub=None) -> Branch:
+        context = await self.browser.new_context(
+            **({"storage_state": storage_state} if storage_state else {})
+        )
+        if self.options.offline:
+            stub = stub or SupabaseStub()
+            await stub.install(context)
+        context.set_default_timeout(5000)
+        page = await context.new_page()
+        namespace = {**self._globals(case), "context": context, "page": page}
+        return Branch(context, page, namespace, stub)
+
+    async def _run_action(self, branch, action):
+        started = time.perf_counter()
+        try:
+            exec(action.code, branch.namespace)
+            await branch.namespace.pop("__action__")()
+        finally:
+            branch.elapsed += time.perf_counter() - started
+            branch.path.append(action)
+
+    async def _fingerprint(self, page):
+        try:
+            return page.url, await page.evaluate(FINGERPRINT_JS)
+        except Exception:
+            return page.url, None
+
+    async def _fork(self, parent, snapshot, fingerprint, child, case) -> Branch:
+        """Open ``child``'s branch from ``snapshot``, or replay the prefix if it doesn't match."""
+        started = time.perf_counter()
+        bound = set().union(*(action.stores for action in parent.path)) - RUNNER_NAMES
+        stub = copy.deepcopy(parent.stub) if parent.stub else None
+        if fingerprint[1] and not (child.needs & bound):
+            branch = await self._open(case, snapshot, stub)
+            await branch.page.goto(fingerprint[0], wait_until="commit")
+            if not self.options.fixed_waits:
+                try:
+                    await wait_for_flutter_settled(branch.page)
+                except Exception:
+                    pass
+            if await self._fingerprint(branch.page) == fingerprint:
+                self.forks += 1
+                branch.path = list(parent.path)
+                branch.elapsed = parent.elapsed + time.perf_counter() - started
+                return branch
+            await branch.context.close()
+        self.replays += 1
+        branch = await self._open(case)
+        for action in parent.path:
+            await self._run_action(branch, action)
+        return branch
+
+    async def run(self, node, branch):
+        for name, value in self._globals(node.all_cases()[0]).items():
+            branch.namespace.setdefault(name, value)
+        if node.action is not None:
+            try:
+                await self._run_action(branch, node.action)
+            except Exception as exc:
+                error = describe_error(exc)
+                for case in node.all_cases():
+                    self._finish(case, branch, error)
+                await branch.context.close()
+                return
+        for case in node.cases:
+            self._finish(case, branch)
+        children = list(node.children.values())
+        if not children:
+            await branch.context.close()
+            return
+        if len(children) > 1:
+            snapshot = await branch.context.storage_state()
+            fingerprint = await self._fingerprint(branch.page)
+            for child in children[:-1]:
+                forked = await self._fork(branch, snapshot, fingerprint, child, child.all_cases()[0])
+                await self.run(child, forked)
+        await self.run(children[-1], branch)
+
+
+async def run_tree(cases, options=None, on_outcome=None) -> list:
+    """Run ``cases`` as prefix trees, one per starting auth snapshot; outcomes in case order."""
+    options = options or RunOptions()
+    hooks = []
+    cache = AssetCache(options.asset_cache) if options.asset_cache else None
+    if cache:
+        hooks.append(cache.install)
+    if not options.fixed_waits:
+        hooks.append(settle_waits)
+    if options.semantics:
+        hooks.append(semantics_on)
+    if options.throttle:
+        hooks.append(get_profile(options.throttle).install)
+
+    groups = {}
+    for case in cases:
+        groups.setdefault(options.storage_states.get(case.tc_id), []).append(case)
+
+    outcomes = []
+    try:
+        async with BrowserPool(size=1, headless=options.headless) as pool:
+            for storage_state, group in groups.items():
+                root, standalone = build_tree(group)
+                context_options = {"storage_state": storage_state} if storage_state else {}
+                async with pool.lease(context_hooks=hooks, context_options=context_options) as browser:
+                    runner = TreeRunner(browser, options, on_outcome)
+                    first = root.all_cases()
+                    if first:
+                        await runner.run(root, await runner._open(first[0]))
+                    outcomes.extend(runner.outcomes)
+                    scripted = sum(len(script_actions(case)) for case in first)
+                    print(
+                        f"prefix tree: {root.size()} actions instead of {scripted}, "
+                        f"{runner.forks} forks, {runner.replays} replays"
+                    )
+                for case in standalone:
+                    outcome = await run_case(pool, case, options, [cache.install] if cache else [])
+                    record_outcome(outcome, options, on_outcome)
+                    outcomes.append(outcome)
+    finally:
+        if cache:
+            cache.save()
+    order = {case.tc_id: index for index, case in enumerate(cases)}
+    return sorted(outcomes, key=lambda o: order[o.tc_id])
@@ -0,0 +1,173 @@
+"""Check that the app can boot at all before spending time on tests.
+
+In the 2026-01-31 run every test spent minutes discovering that the web
+build's JS files were served as empty 404s. The pre-flight stage finds that
+out once, concurrently, before any test browser starts:
+
+1. fetch ``index.html`` and HEAD every script, module preload, stylesheet
+   and manifest it references on the app origin, plus the ``main.dart.js``
+   named in ``flutter_bootstrap.js``; each must answer 200 with a non-empty
+   body;
+2. check the Supabase auth health endpoint (skipped with ``--offline``);
+3. only if those pass, load the page once and wait for ``window._flutter``
+   and the ``flutter-view`` host to appear (``hasFlutter``).
+
+All failures are reported together as one diagnosis.
+"""
+
+import asyncio
+import re
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from . import APP_URL
+from .pool import BrowserPool
+from .supabase_stub import SUPABASE_ANON_KEY, SUPABASE_URL
+
+HTTP_TIMEOUT = 2
+FLUTTER_TIMEOUT_MS = 15000
+
+_MAIN_JS_PATH = re.compile(r'"mainJsPath"\s*:\s*"([^"]+)"')
+
+HAS_FLUTTER_JS = "() => Boolean(window._flutter) && document.querySelector('flutter-view, flt-glass-pane') !== null"
+
+
+@dataclass
+class Check:
+    name: str
+    ok: bool
+    detail: str = ""
+
+
+@dataclass
+class PreflightReport:
+    checks: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return all(check.ok for check in self.checks)
+
+    def diagnosis(self) -> str:
+        failed = [check for check in self.checks if not check.ok]
+        if not failed:
+            return f"pre-flight: {len(self.checks)} checks passed"
+        lines = [f"pre-flight: {len(failed)} of {len(self.checks)} checks failed; not running tests"]
+        lines += [f"  - {check.name}: {check.detail}" for check in failed]
+        return "\n".join(lines)
+
+
+class _AssetCollector(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and attrs.get("src"):
+            self.urls.append(attrs["src"])
+        elif tag == "link" and attrs.get("href") and attrs.get("rel") in (
+            "modulepreload",
+            "preload",
+            "stylesheet",
+            "manifest",
+        ):
+            self.urls.append(attrs["href"])
+
+
+def _request(url, method="GET", headers=None):
+    request = urllib.request.Request(url, method=method, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+        return response.status, response.headers, response.read() if method == "GET" else b""
+
+
+def bootstrap_assets(index_html, app_url=APP_URL) -> list:
+    """Same-origin assets ``index.html`` references, as absolute URLs."""
+    collector = _AssetCollector()
+    collector.feed(index_html)
+    origin = urlsplit(app_url).netloc
+    base = app_url.rstrip("/") + "/"
+    urls = []
+    for ref in collector.urls:
+        url = urljoin(base, ref)
+        if urlsplit(url).netloc == origin and url not in urls:
+            urls.append(url)
+    return urls
+
+
+def check_asset(url) -> Check:
+    name = urlsplit(url).path
+    try:
+        try:
+            status, headers, _ = _request(url, "HEAD")
+        except urllib.error.HTTPError as exc:
+            if exc.code != 405:
+                raise
+            status, headers, _ = _request(url)
+    except urllib.error.HTTPError as exc:
+        length = exc.headers.get("Content-Length")
+        return Check(name, False, f"HTTP {exc.code}" + (f", Content-Length {length}" if length else ""))
+    except (urllib.error.URLError, OSError) as exc:
+        return Check(name, False, f"unreachable ({exc})")
+    if headers.get("Content-Length") == "0":
+        return Check(name, False, f"HTTP {status} with an empty body")
+    return Check(name, True, f"HTTP {status}")
+
+
+def check_supabase() -> Check:
+    try:
+        status, _, _ = _request(f"{SUPABASE_URL}/auth/v1/health", headers={"apikey": SUPABASE_ANON_KEY})
+    except urllib.error.HTTPError as exc:
+        return Check("supabase", False, f"{SUPABASE_URL}/auth/v1/health returned HTTP {exc.code}")
+    except (urllib.error.URLError, OSError) as exc:
+        return Check("supabase", False, f"{SUPABASE_URL} unreachable ({exc})")
+    return Check("supabase", True, f"HTTP {status}")
+
+
+def collect_asset_urls(app_url=APP_URL):
+    """Return (asset URLs, failed checks) discovered from the served page."""
+    try:
+        _, _, body = _request(app_url.rstrip("/") + "/")
+    except urllib.error.HTTPError as exc:
+        return [], [Check("index.html", False, f"HTTP {exc.code}")]
+    except (urllib.error.URLError, OSError) as exc:
+        return [], [Check("index.html", False, f"{app_url} unreachable ({exc})")]
+    urls = bootstrap_assets(body.decode("utf-8", "replace"), app_url)
+    bootstrap = next((url for url in urls if url.endswith("flutter_bootstrap.js")), None)
+    if bootstrap:
+        try:
+            _, _, script = _request(bootstrap)
+            main_js = _MAIN_JS_PATH.search(script.decode("utf-8", "replace"))
+            if main_js:
+                urls.append(urljoin(app_url.rstrip("/") + "/", main_js.group(1)))
+        except (urllib.error.URLError, OSError):
+            pass  # reported by the asset check itself
+    return urls, []
+
+
+async def check_flutter_boots(headless=True, timeout=FLUTTER_TIMEOUT_MS) -> Check:
+    async with BrowserPool(size=1, headless=headless) as pool:
+        async with pool.lease() as browser:
+            context = await browser.new_context()
+            page = await context.new_page()
+            try:
+                await page.goto(APP_URL, wait_until="commit")
+                await page.wait_for_function(HAS_FLUTTER_JS, polling=100, timeout=timeout)
+            except Exception as exc:
+                return Check("hasFlutter", False, f"Flutter did not mount within {timeout} ms ({type(exc).__name__})")
+    return Check("hasFlutter", True)
+
+
+async def run_preflight(check_backend=True, check_browser=True, headless=True) -> PreflightReport:
+    report = PreflightReport()
+    urls, failures = await asyncio.to_thread(collect_asset_urls)
+    report.checks += failures
+    probes = [asyncio.to_thread(check_asset, url) for url in urls]
+    if check_backend:
+        probes.append(asyncio.to_thread(check_supabase))
+    report.checks += await asyncio.gather(*probes)
+    if report.ok and check_browser:
+        report.checks.append(await check_flutter_boots(headless=headless))
+    return report
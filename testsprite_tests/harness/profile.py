@@ -0,0 +1,203 @@
+"""Attribute each test's wall-clock time to the Playwright calls it makes.
+
+With profiling on, the Page/Frame/Locator/assertion methods the scripts use
+are wrapped so every call records a span (category, name, start, duration)
+against the test running in the current asyncio task. After the test the
+spans are written to ``tmp/profiles/<TC>.json`` and, in collapsed-stack form
+for flamegraph.pl or speedscope, ``tmp/profiles/<TC>.folded``. Time not
+covered by any span is reported as ``script``.
+"""
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from playwright import async_api
+
+from . import TMP_DIR
+
+PROFILES_DIR = TMP_DIR / "profiles"
+
+# (class, method names, category). Only what the generated scripts and the
+# harness call; anything else shows up as ``script`` time.
+INSTRUMENTED = [
+    (async_api.Page, ("goto", "reload", "go_back", "set_viewport_size"), "navigation"),
+    (async_api.Page, ("wait_for_load_state",), "load_wait"),
+    (async_api.Frame, ("wait_for_load_state",), "load_wait"),
+    (async_api.Page, ("wait_for_timeout",), "sleep"),
+    (async_api.Page, ("wait_for_function", "wait_for_selector"), "wait"),
+    (async_api.Locator, ("wait_for",), "wait"),
+    (async_api.Page, ("evaluate", "screenshot"), "evaluate"),
+    (async_api.Locator, ("click", "fill", "type", "press", "hover", "screenshot"), "action"),
+    (async_api.Page, ("click", "fill", "press"), "action"),
+    (async_api.LocatorAssertions, ("to_be_visible", "to_have_text", "to_contain_text"), "assertion"),
+    (async_api.BrowserContext, ("new_page", "close"), "setup"),
+]
+
+_active = ContextVar("harness_profile", default=None)
+
+
+@dataclass
+class Span:
+    category: str
+    name: str
+    start: float
+    depth: int
+    stack: tuple
+    duration: float = 0.0
+    error: bool = False
+
+
+@dataclass
+class Profile:
+    tc_id: str
+    started: float = field(default_factory=time.perf_counter)
+    total: float = 0.0
+    spans: list = field(default_factory=list)
+    _stack: list = field(default_factory=list)
+
+    def by_category(self) -> dict:
+        totals = {}
+        for span in self.spans:
+            if span.depth == 0:
+                totals[span.category] = totals.get(span.category, 0.0) + span.duration
+        totals["script"] = max(self.total - sum(totals.values()), 0.0)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def folded(self) -> list:
+        """Collapsed stacks with self time in milliseconds."""
+        child_time = {}
+        for span in self.spans:
+            if span.depth:
+                parent = span.stack[:-1]
+                child_time[parent] = child_time.get(parent, 0.0) + span.duration
+        weights = {}
+        for span in self.spans:
+            self_time = span.duration - child_time.get(span.stack, 0.0)
+            key = ";".join((self.tc_id,) + span.stack)
+            weights[key] = weights.get(key, 0.0) + self_time
+        weights[f"{self.tc_id};script"] = self.by_category()["script"]
+        return [f"{key} {round(ms * 1000)}" for key, ms in weights.items() if ms > 0]
+
+    def to_json(self) -> dict:
+        return {
+            "testId": self.tc_id,
+            "total": round(self.total, 4),
+            "byCategory": {k: round(v, 4) for k, v in self.by_category().items()},
+            "spans": [
+                {
+                    "category": s.category,
+                    "name": s.name,
+                    "start": round(s.start - self.started, 4),
+                    "duration": round(s.duration, 4),
+                    "depth": s.depth,
+                    "error": s.error,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+@contextmanager
+def span(category, name):
+    """Record a span on the current test's profile; a no-op when not profiling."""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    frame = f"{category}:{name}"
+    stack = tuple(s.category + ":" + s.name for s in profile._stack) + (frame,)
+    record = Span(category, name, time.perf_counter(), len(profile._stack), stack)
+    profile._stack.append(record)
+    try:
+        yield
+    except BaseException:
+        record.error = True
+        raise
+    finally:
+        profile._stack.pop()
+        record.duration = time.perf_counter() - record.start
+        profile.spans.append(record)
+
+
+def _wrap(method, category, name):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with span(category, name):
+            return await method(*args, **kwargs)
+
+    wrapper.__harness_profiled__ = True
+    return wrapper
+
+
+def instrument():
+    """Wrap the instrumented Playwright methods once per process."""
+    for cls, names, category in INSTRUMENTED:
+        for name in names:
+            method = getattr(cls, name, None)
+            if method is None or getattr(method, "__harness_profiled__", False):
+                continue
+            setattr(cls, name, _wrap(method, category, f"{cls.__name__}.{name}"))
+
+
+@contextmanager
+def profiling(tc_id):
+    """Collect a :class:`Profile` for the test running in this task."""
+    instrument()
+    profile = Profile(tc_id)
+    token = _active.set(profile)
+    try:
+        yield profile
+    finally:
+        profile.total = time.perf_counter() - profile.started
+        _active.reset(token)
+
+
+class ProfiledAsyncio:
+    """Wraps the ``asyncio`` a TC script sees so its sleeps are recorded."""
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    async def sleep(self, delay, result=None):
+        with span("sleep", "asyncio.sleep"):
+            return await self._inner.sleep(delay, result)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+def write_profile(profile, directory=PROFILES_DIR):
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / f"{profile.tc_id}.json", "w", encoding="utf-8") as fh:
+        json.dump(profile.to_json(), fh, indent=2)
+        fh.write("\n")
+    with open(directory / f"{profile.tc_id}.folded", "w", encoding="utf-8") as fh:
+        fh.write("\n".join(profile.folded()) + "\n")
+
+
+def write_summary(breakdowns, directory=PROFILES_DIR) -> dict:
+    """Aggregate per-test category totals into ``summary.json``; returns the totals."""
+    totals = {}
+    for breakdown in breakdowns.values():
+        for category, seconds in breakdown.items():
+            totals[category] = totals.get(category, 0.0) + seconds
+    totals = dict(sorted(totals.items(), key=lambda item: -item[1]))
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "summary.json", "w", encoding="utf-8") as fh:
+        json.dump(
+            {
+                "byCategory": {k: round(v, 4) for k, v in totals.items()},
+                "tests": {
+                    tc_id: {k: round(v, 4) for k, v in breakdown.items()}
+                    for tc_id, breakdown in sorted(breakdowns.items())
+                },
+            },
+            fh,
+            indent=2,
+        )
+        fh.write("\n")
+    return totals
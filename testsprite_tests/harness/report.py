@@ -0,0 +1,438 @@
+"""Incremental renderer for the MCP markdown and HTML test reports.
+
+``testsprite-mcp-test-report.md`` and ``.html`` keep the layout TestSprite
+gave them: one section per requirement, a card per test, the coverage
+metrics and the key gaps write-up. The harness re-renders only the test
+sections whose latest result in the results log changed; every other
+section is reused as written. Rendered sections are cached under
+``tmp/report_fragments/`` by a hash of the result they show, so flipping
+back to a result seen before costs nothing either.
+
+While a run is in progress (``python -m harness --report``) the reports are
+redrawn whenever the log grows, with tests that have not finished yet shown
+as pending, so a partial report is readable while shards are still running.
+
+When a test's status changes, its severity and analysis are replaced with
+the ``{{TODO:AI_ANALYSIS}}`` placeholder TestSprite uses for unanalysed
+results; a new error alone, or a pending run, keeps the existing analysis.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from . import RESULTS_PATH, TESTS_DIR, TMP_DIR
+from .results_log import ResultsIndex
+from .runner import utc_now
+
+REPORT_MD_PATH = TESTS_DIR / "testsprite-mcp-test-report.md"
+REPORT_HTML_PATH = TESTS_DIR / "testsprite-mcp-test-report.html"
+FRAGMENTS_DIR = TMP_DIR / "report_fragments"
+
+# Bump when a fragment template changes so cached fragments are redone.
+RENDER_VERSION = 1
+
+DASHBOARD_URL = "https://www.testsprite.com/dashboard/mcp/tests/{project}/{test}"
+ANALYSIS_TODO = "{{TODO:AI_ANALYSIS}}."
+PENDING = "PENDING"
+
+STATUS_MD = {"PASSED": "✅ Passed", "FAILED": "❌ Failed", PENDING: "⏳ Pending"}
+STATUS_FROM_MD = {label: status for status, label in STATUS_MD.items()}
+
+_FIELD = re.compile(r"^- \*\*(.+?):\*\* ?(.*)$")
+_SECTION = re.compile(r"(?m)^(?=### Requirement: |#### Test |## 3️⃣)")
+_CARD = re.compile(r"(?m)^(?=<div class=\"test-card\">)")
+_CARD_ID = re.compile(r'<h4 class="text-body-medium">(TC\d+) ')
+_REQUIREMENT_HTML = re.compile(r"(?m)^(?=[ \t]*<div class=\"requirement-wrapper)")
+_STATUS_TAG = re.compile(r'<div class="requirement-status-tag status-\w+">.*?</div>', re.S)
+_COVERAGE = re.compile(r'(<span class="coverage-highlight">)\d+/\d+(</span> of tests passed)')
+_HTML_CELL = r'(</span></div>\s*<div class="table-cell"><span class="text-body">)\d+'
+
+# Closes a requirement's test-wrapper, accordion-content and wrapper divs.
+REQUIREMENT_CLOSE = "            </div>\n          </div>\n        </div>\n"
+
+STATUS_TAG_HTML = """<div class="requirement-status-tag status-{kind}">
+              <svg width="18" height="18" viewBox="0 0 16 16" fill="none" xmlns="http://www.w3.org/2000/svg">
+{icon}
+              </svg>
+              <span>{passed}/{total}</span>
+            </div>"""
+
+TAG_ICONS = {
+    "success": (
+        '                <circle cx="7.99961" cy="7.99998" r="6.4" fill="#10A363" fill-opacity="0.2"/>\n'
+        '                <path d="M5.59961 8.00002L7.19961 9.60002L10.3996 6.40002" stroke="#19C379"'
+        ' stroke-width="1.28" stroke-linecap="round" stroke-linejoin="round"/>'
+    ),
+    "error": (
+        '                <circle cx="7.99961" cy="7.99998" r="6.4" fill="#C23539" fill-opacity="0.2"/>\n'
+        '                <path d="M8 5.59998V7.99698" stroke="#EF4146" stroke-width="1.38478"'
+        ' stroke-linecap="round" stroke-linejoin="round"/><path d="M8 10.394V10.3995" stroke="#EF4146"'
+        ' stroke-width="1.38478" stroke-linecap="round" stroke-linejoin="round"/>'
+    ),
+}
+
+STATUS_HTML = {
+    "PASSED": """<div class="status-wrapper">
+                <div class="status-icon">
+                    <svg width="18" height="18" viewBox="0 0 16 16" fill="none" xmlns="http://www.w3.org/2000/svg">
+                        <circle cx="7.99961" cy="7.99998" r="6.4" fill="#10A363" fill-opacity="0.2"/>
+                        <path d="M5.59961 8.00002L7.19961 9.60002L10.3996 6.40002" stroke="#19C379" stroke-width="1.28" stroke-linecap="round" stroke-linejoin="round"/>
+                    </svg>
+                </div>
+                <span class="text-body status-pass">Pass</span>
+            </div>""",
+    "FAILED": """<div class="status-wrapper">
+                <div class="status-icon">
+                    <svg width="18" height="18" viewBox="0 0 16 16" fill="none" xmlns="http://www.w3.org/2000/svg">
+<circle cx="7.99961" cy="7.99998" r="6.4" fill="#C23539" fill-opacity="0.2"/>
+<path d="M8 5.59998V7.99698" stroke="#EF4146" stroke-width="1.38478" stroke-linecap="round" stroke-linejoin="round"/>
+<path d="M8 10.394V10.3995" stroke="#EF4146" stroke-width="1.38478" stroke-linecap="round" stroke-linejoin="round"/>
+</svg>
+                </div>
+                <span class="text-body status-fail">Failed</span>
+            </div>""",
+    PENDING: """<div class="status-wrapper">
+                <span class="text-body">Pending</span>
+            </div>""",
+}
+
+FIELD_HTML = """                  <div class="test-field">
+                    <div class="test-field-label text-body-medium">{label}</div>
+                    <div class="test-field-value{value_class}">{value}</div>
+                  </div>
+"""
+
+_LINK_HTML = '\n                      <a href="{href}" class="text-link">{text}</a>\n                    '
+
+
+@dataclass
+class TestSection:
+    tc_id: str
+    title: str
+    markdown: str
+    html: str = ""
+    fields: dict = field(default_factory=dict)
+
+    @property
+    def status(self):
+        return STATUS_FROM_MD.get(self.fields.get("Status"))
+
+
+@dataclass
+class Requirement:
+    name: str
+    markdown: str
+    html_header: str = ""
+    html_closing: str = ""
+    tests: list = field(default_factory=list)
+
+
+@dataclass
+class ReportLayout:
+    preamble: str
+    requirements: list
+    gaps: str
+    html_prefix: str = ""
+    html_suffix: str = ""
+
+    @property
+    def has_html(self) -> bool:
+        return bool(self.html_prefix)
+
+
+def _parse_fields(text) -> dict:
+    fields, name = {}, None
+    for line in text.splitlines()[1:]:
+        match = _FIELD.match(line)
+        if match:
+            name = match.group(1)
+            fields[name] = match.group(2)
+        elif name and line != "---":
+            fields[name] += "\n" + line
+    return {name: value.strip() for name, value in fields.items()}
+
+
+def parse_markdown(text) -> ReportLayout:
+    chunks = _SECTION.split(text)
+    layout = ReportLayout(preamble=chunks[0], requirements=[], gaps="")
+    for chunk in chunks[1:]:
+        if chunk.startswith("### Requirement: "):
+            name = chunk.splitlines()[0][len("### Requirement: "):]
+            layout.requirements.append(Requirement(name, chunk))
+        elif chunk.startswith("#### Test "):
+            tc_id, _, title = chunk.splitlines()[0][len("#### Test "):].partition(" ")
+            section = TestSection(tc_id, title, chunk, fields=_parse_fields(chunk))
+            layout.requirements[-1].tests.append(section)
+        else:
+            gaps_at = chunk.find("## 4️⃣")
+            layout.gaps = chunk[gaps_at:] if gaps_at != -1 else ""
+    return layout
+
+
+def attach_html(layout, text):
+    """Split the HTML report into the same sections as the markdown one."""
+    chunks = _REQUIREMENT_HTML.split(text)
+    if len(chunks) - 1 != len(layout.requirements):
+        return  # not the layout we know how to update; leave the HTML alone
+    layout.html_prefix = chunks[0]
+    for requirement, chunk in zip(layout.requirements, chunks[1:]):
+        close_at = chunk.rfind(REQUIREMENT_CLOSE)
+        cards = _CARD.split(chunk[:close_at])
+        requirement.html_header = cards[0]
+        requirement.html_closing = chunk[close_at:]
+        by_id = {}
+        for card in cards[1:]:
+            match = _CARD_ID.search(card)
+            if match:
+                by_id[match.group(1)] = card
+        for test in requirement.tests:
+            test.html = by_id.get(test.tc_id, "")
+    last = layout.requirements[-1]
+    closing_end = last.html_closing.find(REQUIREMENT_CLOSE) + len(REQUIREMENT_CLOSE)
+    layout.html_suffix = last.html_closing[closing_end:]
+    last.html_closing = last.html_closing[:closing_end]
+
+
+def load_layout(md_path=REPORT_MD_PATH, html_path=REPORT_HTML_PATH) -> ReportLayout:
+    with open(md_path, encoding="utf-8") as fh:
+        layout = parse_markdown(fh.read())
+    try:
+        with open(html_path, encoding="utf-8") as fh:
+            attach_html(layout, fh.read())
+    except FileNotFoundError:
+        pass
+    return layout
+
+
+def _percent(passed, total) -> str:
+    return f"{100 * passed / total:.2f}".rstrip("0").rstrip(".") if total else "0"
+
+
+def render_metrics_md(rows) -> str:
+    """``rows`` are ``(requirement, total, passed, failed)``."""
+    passed = sum(row[2] for row in rows)
+    total = sum(row[1] for row in rows)
+    lines = [
+        "## 3️⃣ Coverage & Matching Metrics",
+        "",
+        f"- **{_percent(passed, total)}%** of tests passed ({passed} out of {total} tests)",
+        "",
+        "| Requirement                    | Total Tests | ✅ Passed | ❌ Failed |",
+        "|--------------------------------|-------------|-----------|-----------|",
+    ]
+    for name, count, ok, failed in rows:
+        lines.append(f"| {name:<30} | {count:<11} | {ok:<9} | {failed:<9} |")
+    return "\n".join(lines) + "\n\n---\n\n"
+
+
+def _code_file(section) -> str:
+    return f"{section.tc_id}_{re.sub(r'[^0-9A-Za-z]+', '_', section.title).strip('_')}.py"
+
+
+def render_test_md(section, status, error, url, analysis, severity) -> str:
+    code = _code_file(section)
+    lines = [
+        f"#### Test {section.tc_id} {section.title}",
+        f"- **Test Code:** [{code}](./{code})",
+        f"- **Test Error:** {error}",
+        f"- **Test Visualization and Result:** {url}",
+        f"- **Status:** {STATUS_MD[status]}",
+    ]
+    if severity:
+        lines.append(f"- **Severity:** {severity}")
+    lines.append(f"- **Analysis / Findings:** {analysis}")
+    return "\n".join(lines) + "\n---\n\n"
+
+
+def render_test_html(section, status, error, url, analysis, severity) -> str:
+    code = _code_file(section)
+    fields = [
+        ("Test Code", _LINK_HTML.format(href=f"./{code}", text=code)),
+        ("Test Error", html.escape(error, quote=False)),
+        ("Test Visualization and Result", _LINK_HTML.format(href=url, text="View Results")),
+        ("Status", f"\n                      {STATUS_HTML[status]}\n                    "),
+    ]
+    if severity:
+        fields.append(("Severity", html.escape(severity, quote=False)))
+    fields.append(("Analysis / Findings", html.escape(analysis, quote=False)))
+    body = "".join(
+        FIELD_HTML.format(label=label, value=value, value_class="" if label == "Status" else " text-body")
+        for label, value in fields
+    )
+    return (
+        '<div class="test-card">\n'
+        '                <div class="test-header">\n'
+        f'                  <h4 class="text-body-medium">{section.tc_id} {html.escape(section.title, quote=False)}</h4>\n'
+        "                </div>\n"
+        '                <div class="test-content">\n'
+        f"{body}"
+        "                </div>\n"
+        "              </div>\n"
+    )
+
+
+def patch_requirement_html(header, passed, total) -> str:
+    kind = "success" if passed == total else "error"
+    tag = STATUS_TAG_HTML.format(kind=kind, icon=TAG_ICONS[kind], passed=passed, total=total)
+    return _STATUS_TAG.sub(lambda _: tag, header, count=1)
+
+
+def patch_coverage_html(prefix, rows) -> str:
+    passed = sum(row[2] for row in rows)
+    total = sum(row[1] for row in rows)
+    prefix = _COVERAGE.sub(lambda m: f"{m.group(1)}{passed}/{total}{m.group(2)}", prefix)
+    for name, count, ok, failed in rows:
+        label = re.escape(f"Requirement: {html.escape(name, quote=False)}")
+        row = re.compile(f"({label}){_HTML_CELL * 3}")
+        prefix = row.sub(
+            lambda m: f"{m.group(1)}{m.group(2)}{count}{m.group(3)}{ok}{m.group(4)}{failed}", prefix, count=1
+        )
+    return prefix
+
+
+def _write_atomic(path, parts):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        fh.writelines(parts)
+    os.replace(tmp_path, path)
+
+
+class ReportRenderer:
+    """Keeps the report layout in memory and redraws it from the results log."""
+
+    def __init__(
+        self,
+        results_path=RESULTS_PATH,
+        md_path=REPORT_MD_PATH,
+        html_path=REPORT_HTML_PATH,
+        fragments_dir=FRAGMENTS_DIR,
+    ):
+        self.md_path = md_path
+        self.html_path = html_path
+        self.fragments_dir = fragments_dir
+        self.layout = load_layout(md_path, html_path)
+        self.index = ResultsIndex(results_path)
+        self.index.refresh()
+        self.rendered = 0
+        self.reused = 0
+
+    def _state(self, section, running):
+        """(status, index entry) for a section; status None means "as written"."""
+        test_id = self.index.test_id(section.tc_id)
+        entry = self.index.tests.get(test_id, {}) if test_id else {}
+        if section.tc_id in running:
+            return PENDING, test_id, entry
+        if entry.get("result") is None:
+            return None, test_id, entry
+        return entry["testStatus"], test_id, entry
+
+    def _fragment(self, kind, section, status, test_id, entry) -> str:
+        shown = [RENDER_VERSION, kind, section.markdown, test_id, status, entry.get("result")]
+        key = hashlib.sha256(json.dumps(shown).encode("utf-8")).hexdigest()
+        path = self.fragments_dir / f"{key}.{kind}"
+        try:
+            text = path.read_text(encoding="utf-8")
+            self.reused += 1
+            return text
+        except FileNotFoundError:
+            pass
+        event = self.index.latest_result(test_id) if status != PENDING and test_id else None
+        error = (event or {}).get("testError", "")
+        if status in (section.status, PENDING):
+            analysis = section.fields.get("Analysis / Findings", ANALYSIS_TODO)
+            severity = section.fields.get("Severity")
+        else:
+            analysis, severity = ANALYSIS_TODO, None
+        url = DASHBOARD_URL.format(project=self.index.project_id, test=test_id or "")
+        render = render_test_md if kind == "md" else render_test_html
+        text = render(section, status, error, url, analysis, severity)
+        self.fragments_dir.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        self.rendered += 1
+        return text
+
+    def _sections(self, running):
+        """Yield ``(requirement, [(section, status, markdown, html)])`` for the current results."""
+        for requirement in self.layout.requirements:
+            tests = []
+            for section in requirement.tests:
+                status, test_id, entry = self._state(section, running)
+                if status is None:
+                    tests.append((section, section.status, section.markdown, section.html))
+                    continue
+                markdown = self._fragment("md", section, status, test_id, entry)
+                card = self._fragment("html", section, status, test_id, entry) if self.layout.has_html else ""
+                tests.append((section, status, markdown, card))
+            yield requirement, tests
+
+    def render(self, running=()):
+        """Rewrite both reports; tests in ``running`` are shown as pending."""
+        sections = list(self._sections(set(running)))
+        rows = [
+            (
+                requirement.name,
+                len(tests),
+                sum(status == "PASSED" for _, status, _, _ in tests),
+                sum(status == "FAILED" for _, status, _, _ in tests),
+            )
+            for requirement, tests in sections
+        ]
+
+        def markdown():
+            yield self.layout.preamble
+            for requirement, tests in sections:
+                yield requirement.markdown
+                for _, _, text, _ in tests:
+                    yield text
+            yield render_metrics_md(rows)
+            yield self.layout.gaps
+
+        _write_atomic(self.md_path, markdown())
+        if not self.layout.has_html:
+            return
+
+        def page():
+            yield patch_coverage_html(self.layout.html_prefix, rows)
+            for (requirement, tests), (_, total, passed, _) in zip(sections, rows):
+                yield patch_requirement_html(requirement.html_header, passed, total)
+                for _, _, _, card in tests:
+                    yield card
+                yield requirement.html_closing
+            yield self.layout.html_suffix
+
+        _write_atomic(self.html_path, page())
+
+    def _running(self, tc_ids, started):
+        return {
+            tc_id
+            for tc_id in tc_ids
+            if self.index.tests.get(self.index.test_id(tc_id), {}).get("modified", "") < started
+        }
+
+    @contextmanager
+    def following(self, tc_ids, interval=1.0):
+        """Redraw the reports as results for ``tc_ids`` are appended to the log."""
+        started = utc_now()
+        stop = threading.Event()
+        self.render(running=tc_ids)
+
+        def follow():
+            while not stop.wait(interval):
+                if self.index.refresh():
+                    self.render(running=self._running(tc_ids, started))
+
+        thread = threading.Thread(target=follow, name="report-follow", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+            self.index.refresh()
+            self.render(running=self._running(tc_ids, started))
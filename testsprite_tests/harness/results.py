@@ -0,0 +1,93 @@
+"""Read and update ``tmp/test_results.json`` in the schema TestSprite writes."""
+
+import json
+import os
+import uuid
+from datetime import datetime
+
+from . import RESULTS_PATH
+
+
+def load_results(path=RESULTS_PATH) -> list:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return []
+
+
+def write_results(records, path=RESULTS_PATH):
+    """Write atomically so a concurrent reader never sees a half-written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(records, fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+    os.replace(tmp_path, path)
+
+
+def record_tc_id(record) -> str:
+    # Titles look like "TC004-Multi-page onboarding flow completion".
+    return record.get("title", "").split("-", 1)[0]
+
+
+def parse_timestamp(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def historical_durations(records) -> dict:
+    """Seconds each TC took on its last recorded run, keyed by TC id."""
+    durations = {}
+    for record in records:
+        try:
+            elapsed = parse_timestamp(record["modified"]) - parse_timestamp(record["created"])
+        except (KeyError, ValueError):
+            continue
+        durations[record_tc_id(record)] = max(elapsed.total_seconds(), 0.0)
+    return durations
+
+
+def new_record(tc_id, title, project_id="", user_id="", case=None) -> dict:
+    """A results entry for a test TestSprite has not recorded yet.
+
+    The ``testId`` is derived from the project and TC id, so every process
+    that creates the entry agrees on it.
+    """
+    return {
+        "projectId": project_id,
+        "testId": str(uuid.uuid5(uuid.NAMESPACE_URL, f"khdemti:{project_id}:{tc_id}")),
+        "userId": user_id,
+        "title": f"{tc_id}-{title}",
+        "description": "",
+        "code": case.path.read_text(encoding="utf-8") if case else "",
+        "testType": "FRONTEND",
+        "createFrom": "harness",
+    }
+
+
+def merge_outcomes(records, outcomes, cases=None) -> list:
+    """Fold run outcomes into the existing records, keeping unrelated fields.
+
+    Existing entries are matched by TC id so ``testId`` and the dashboard
+    links stay stable; tests without an entry get a new record.
+    """
+    by_id = {record_tc_id(record): record for record in records}
+    sources = {case.tc_id: case for case in cases or ()}
+    template = records[0] if records else {}
+
+    for outcome in outcomes:
+        record = by_id.get(outcome.tc_id)
+        if record is None:
+            record = new_record(
+                outcome.tc_id,
+                outcome.title,
+                template.get("projectId", ""),
+                template.get("userId", ""),
+                sources.get(outcome.tc_id),
+            )
+            records.append(record)
+            by_id[outcome.tc_id] = record
+        record["testStatus"] = outcome.status
+        record["testError"] = outcome.error
+        record["created"] = outcome.created
+        record["modified"] = outcome.modified
+    return records
@@ -0,0 +1,248 @@
+"""Append-only JSONL log of test results, with a compact index by ``testId``.
+
+``tmp/test_results.json`` embeds every test's source and full error text in
+one array, so it can only be rewritten whole once a run ends; a crashed run
+loses everything. The harness instead appends one line per event to
+``tmp/test_results.jsonl`` as each test finishes, from any number of shard
+processes:
+
+* ``{"event": "record", "record": {...}}`` -- a test's static fields
+  (``testId``, title, description, code, ...), written once when the log is
+  seeded from the existing results file;
+* ``{"event": "result", "tcId": ..., "testStatus": ..., ...}`` -- one run
+  of one test.
+
+``tmp/test_results.index.json`` maps each ``testId`` to the byte offsets of
+its record and latest result, plus how much of the log it has read, so
+refreshing it only reads what was appended since. The results array (and
+the reports built from it) is derived from the index on demand.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from . import RESULTS_PATH
+from .results import load_results, new_record, record_tc_id, write_results
+
+# Fields a result event overrides on the test's record.
+RESULT_FIELDS = ("testStatus", "testError", "created", "modified")
+
+
+def log_path_for(results_path=RESULTS_PATH) -> Path:
+    return Path(results_path).with_suffix(".jsonl")
+
+
+def index_path_for(results_path=RESULTS_PATH) -> Path:
+    return Path(results_path).with_suffix(".index.json")
+
+
+def result_event(outcome) -> dict:
+    event = {
+        "event": "result",
+        "tcId": outcome.tc_id,
+        "title": outcome.title,
+        "testStatus": outcome.status,
+        "testError": outcome.error,
+        "created": outcome.created,
+        "modified": outcome.modified,
+        "duration": round(outcome.duration, 3),
+        "attempt": outcome.attempts,
+    }
+    if outcome.artifacts:
+        event["artifacts"] = outcome.artifacts
+    return event
+
+
+def append_events(path, events):
+    """Append events as whole lines with a single ``O_APPEND`` write.
+
+    Each line lands intact even with several processes appending to the
+    same log at once.
+    """
+    data = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events).encode("utf-8")
+    if not data:
+        return
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def repair_log(path):
+    """Terminate a line cut short by a crash so the next append starts clean."""
+    try:
+        with open(path, "rb") as fh:
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) == b"\n":
+                return
+    except (FileNotFoundError, OSError):
+        return
+    with open(path, "ab") as fh:
+        fh.write(b"\n")
+
+
+def seed_log(log_path, records):
+    """Start a new log from an existing results array, once."""
+    if Path(log_path).exists():
+        return
+    append_events(log_path, [{"event": "record", "record": record} for record in records])
+
+
+def _read_event(fh, offset):
+    fh.seek(offset)
+    return json.loads(fh.readline())
+
+
+class ResultsIndex:
+    def __init__(self, results_path=RESULTS_PATH):
+        self.log_path = log_path_for(results_path)
+        self.path = index_path_for(results_path)
+        self.log_size = 0
+        self.project_id = ""
+        self.user_id = ""
+        self.tests = {}  # testId -> {"tcId", "title", "record", "result", ...}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return
+        self.log_size = data.get("logSize", 0)
+        self.project_id = data.get("projectId", "")
+        self.user_id = data.get("userId", "")
+        self.tests = data.get("tests", {})
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "logSize": self.log_size,
+                    "projectId": self.project_id,
+                    "userId": self.user_id,
+                    "tests": self.tests,
+                },
+                fh,
+                indent=2,
+                ensure_ascii=False,
+            )
+            fh.write("\n")
+        os.replace(tmp_path, self.path)
+
+    def test_id(self, tc_id):
+        for test_id, entry in self.tests.items():
+            if entry["tcId"] == tc_id:
+                return test_id
+        return None
+
+    def refresh(self) -> bool:
+        """Read events appended since the last refresh; returns whether any were."""
+        try:
+            size = self.log_path.stat().st_size
+        except FileNotFoundError:
+            return False
+        if size < self.log_size:
+            # The log was replaced; start over.
+            self.log_size, self.tests = 0, {}
+        if size == self.log_size:
+            return False
+        with open(self.log_path, "rb") as fh:
+            fh.seek(self.log_size)
+            offset = self.log_size
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break  # still being written
+                try:
+                    self._apply(json.loads(line), offset)
+                except ValueError:
+                    pass  # a line cut short by a crash
+                offset += len(line)
+        self.log_size = offset
+        return True
+
+    def _apply(self, event, offset):
+        if event.get("event") == "record":
+            record = event["record"]
+            self.project_id = self.project_id or record.get("projectId", "")
+            self.user_id = self.user_id or record.get("userId", "")
+            self.tests[record["testId"]] = {
+                "tcId": record_tc_id(record),
+                "title": record.get("title", ""),
+                "record": offset,
+                "result": None,
+                "testStatus": record.get("testStatus"),
+                "created": record.get("created"),
+                "modified": record.get("modified"),
+            }
+        elif event.get("event") == "result":
+            test_id = self.test_id(event["tcId"])
+            if test_id is None:
+                test_id = new_record(event["tcId"], event["title"], self.project_id, self.user_id)["testId"]
+                self.tests[test_id] = {
+                    "tcId": event["tcId"],
+                    "title": f"{event['tcId']}-{event['title']}",
+                    "record": None,
+                }
+            self.tests[test_id].update(
+                {field: event[field] for field in ("testStatus", "created", "modified")},
+                duration=event.get("duration"),
+                result=offset,
+            )
+
+    def latest_result(self, test_id):
+        """The test's most recent result event, or None if it has not run since seeding."""
+        offset = self.tests[test_id].get("result")
+        if offset is None:
+            return None
+        with open(self.log_path, "rb") as fh:
+            return _read_event(fh, offset)
+
+    def records(self, cases=None) -> list:
+        """Rebuild the results array from the log, in first-seen order."""
+        sources = {case.tc_id: case for case in cases or ()}
+        records = []
+        with open(self.log_path, "rb") as fh:
+            for entry in self.tests.values():
+                if entry["record"] is not None:
+                    record = _read_event(fh, entry["record"])["record"]
+                else:
+                    tc_id = entry["tcId"]
+                    title = entry["title"].split("-", 1)[-1]
+                    record = new_record(tc_id, title, self.project_id, self.user_id, sources.get(tc_id))
+                if entry["result"] is not None:
+                    event = _read_event(fh, entry["result"])
+                    record.update({field: event[field] for field in RESULT_FIELDS})
+                records.append(record)
+        return records
+
+
+def open_log(results_path=RESULTS_PATH) -> Path:
+    """Make sure the log exists (seeded from the results file) and is appendable."""
+    log_path = log_path_for(results_path)
+    seed_log(log_path, load_results(results_path))
+    repair_log(log_path)
+    return log_path
+
+
+def materialize(results_path=RESULTS_PATH, cases=None) -> list:
+    """Refresh the index and, if the log moved on, rewrite the results array."""
+    index = ResultsIndex(results_path)
+    changed = index.refresh()
+    if not changed and Path(results_path).exists() or not index.log_path.exists():
+        return load_results(results_path)
+    records = index.records(cases)
+    write_results(records, results_path)
+    index.save()
+    return records
+
+
+def last_runs(results_path=RESULTS_PATH) -> list:
+    """Latest status and timestamps per test, without reading the full array."""
+    index = ResultsIndex(results_path)
+    if index.refresh():
+        index.save()
+    return list(index.tests.values()) if index.tests else load_results(results_path)
@@ -0,0 +1,203 @@
+"""Run TC scripts concurrently against a pool of warm browsers."""
+
+import asyncio
+import time
+import traceback
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from .asset_cache import AssetCache
+from .capture import CaptureSettings, FailureCapture
+from .flutter import SleeplessAsyncio, settle_waits
+from .loader import load_run_test
+from .pool import AsyncApiShim, BrowserPool
+from .profile import ProfiledAsyncio, profiling, write_profile
+from .results_log import append_events, result_event
+from .schedule import TRANSIENT, RetryBudget, classify_failure, failing_step, failure_kind, longest_first
+from .semantics import semantics_on
+from .supabase_stub import SupabaseStub
+from .throttle import get_profile
+
+
+def format_timestamp(moment) -> str:
+    """``moment`` (UTC) in the format used by ``tmp/test_results.json``."""
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def utc_now() -> str:
+    return format_timestamp(datetime.now(timezone.utc))
+
+
+@dataclass
+class RunOptions:
+    """How the harness drives the scripts; shared by every worker process."""
+
+    headless: bool = True
+    # Keep the scripts' fixed sleeps instead of waiting for Flutter to settle.
+    fixed_waits: bool = False
+    # Turn on the Flutter semantics tree so text and role locators can match.
+    semantics: bool = True
+    # Record per-call spans into tmp/profiles/ (see harness.profile).
+    profile: bool = False
+    # Answer Supabase auth/REST calls in-process (harness.supabase_stub).
+    offline: bool = False
+    # Build hash to record/replay static assets under (harness.asset_cache).
+    asset_cache: str = None
+    # TC id -> storage-state file to open its contexts from (harness.auth_state).
+    storage_states: dict = field(default_factory=dict)
+    # JSONL log each outcome is appended to as it finishes (harness.results_log).
+    results_log: str = None
+    # Reruns of transient failures allowed per run (harness.schedule).
+    retries: int = 0
+    # TC id -> duration and recent runs, from tmp/test_history.json.
+    history: dict = field(default_factory=dict)
+    # Keep recent frames in memory and save them for failures (harness.capture).
+    capture: CaptureSettings = None
+    # Network and CPU throttling profile for every page (harness.throttle).
+    throttle: str = None
+
+
+@dataclass
+class Outcome:
+    tc_id: str
+    title: str
+    status: str = "PASSED"
+    error: str = ""
+    created: str = field(default_factory=utc_now)
+    modified: str = ""
+    duration: float = 0.0
+    # Seconds per step category when profiling, e.g. {"sleep": 12.1, ...}.
+    profile: dict = None
+    # Where and how a failed run stopped: script line and failure_kind().
+    step: int = None
+    kind: str = ""
+    attempts: int = 1
+    # Directory of frames saved when the test failed (harness.capture).
+    artifacts: str = None
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "PASSED"
+
+    @property
+    def flaky(self) -> bool:
+        return self.passed and self.attempts > 1
+
+
+def describe_error(exc: BaseException) -> str:
+    if isinstance(exc, AssertionError):
+        return str(exc)
+    return "".join(traceback.format_exception_only(type(exc), exc)).strip()
+
+
+def format_outcome(outcome) -> str:
+    mark = "PASS" if outcome.passed else "FAIL"
+    line = f"[{mark}] {outcome.tc_id} {outcome.title} ({outcome.duration:.1f}s)"
+    if outcome.flaky:
+        line += f" on attempt {outcome.attempts}"
+    if not outcome.passed and outcome.error:
+        line += f"\n       {outcome.error.splitlines()[0]}"
+    if outcome.artifacts:
+        line += f"\n       frames: {outcome.artifacts}"
+    return line
+
+
+async def run_case(pool: BrowserPool, case, options: RunOptions, suite_hooks=()) -> Outcome:
+    outcome = Outcome(case.tc_id, case.title)
+    started = None
+    profile = None
+    hooks = list(suite_hooks)
+    capture = FailureCapture(case.tc_id, options.capture) if options.capture else None
+    if capture:
+        hooks.append(capture.install)
+    if options.throttle:
+        hooks.append(get_profile(options.throttle).install)
+    try:
+        module, run_test = load_run_test(case)
+        if not options.fixed_waits:
+            module.asyncio = SleeplessAsyncio()
+            hooks.append(settle_waits)
+        if options.semantics:
+            hooks.append(semantics_on)
+        if options.offline:
+            hooks.append(SupabaseStub().install)
+        if options.profile:
+            module.asyncio = ProfiledAsyncio(module.asyncio)
+        context_options = {}
+        if case.tc_id in options.storage_states:
+            context_options["storage_state"] = options.storage_states[case.tc_id]
+        async with pool.lease(context_hooks=hooks, context_options=context_options) as browser:
+            module.async_api = AsyncApiShim(browser)
+            # Time spent queueing for a browser is not the test's own.
+            outcome.created = utc_now()
+            started = time.perf_counter()
+            with profiling(case.tc_id) if options.profile else nullcontext() as profile:
+                await run_test()
+    except Exception as exc:
+        outcome.status = "FAILED"
+        outcome.error = describe_error(exc)
+        outcome.step = failing_step(exc, case.path)
+        outcome.kind = failure_kind(exc)
+        outcome.artifacts = capture.saved if capture else None
+    outcome.duration = time.perf_counter() - started if started else 0.0
+    outcome.modified = utc_now()
+    if profile:
+        write_profile(profile)
+        outcome.profile = profile.by_category()
+    return outcome
+
+
+def record_outcome(outcome, options, on_outcome=None):
+    """Log a finished test's outcome and pass it to the caller's callback."""
+    if options.results_log:
+        append_events(options.results_log, [result_event(outcome)])
+    if on_outcome:
+        on_outcome(outcome)
+
+
+async def run_suite(cases, workers=1, options=None, on_outcome=None, estimates=None, budget=None) -> list:
+    """Run ``cases`` with one warm browser per worker; returns outcomes in case order.
+
+    Cases start longest first by ``estimates`` (seconds per TC id). Transient
+    failures are rerun while ``budget`` (by default ``options.retries``
+    spread over the estimated suite time) lasts.
+    """
+    options = options or RunOptions()
+    estimates = estimates or {}
+    if budget is None:
+        budget = RetryBudget.for_suite(options.retries, estimates)
+    # Context hooks whose state is shared by every test in this process.
+    suite_hooks = []
+    cache = AssetCache(options.asset_cache) if options.asset_cache else None
+    if cache:
+        suite_hooks.append(cache.install)
+
+    async def run_one(case):
+        outcome = await run_case(pool, case, options, suite_hooks)
+        runs = options.history.get(case.tc_id, {}).get("runs", ())
+        while (
+            not outcome.passed
+            and classify_failure(outcome, runs) == TRANSIENT
+            and budget.take(estimates.get(case.tc_id, outcome.duration))
+        ):
+            record_outcome(outcome, options)
+            print(
+                f"[RETRY] {case.tc_id} {outcome.kind} at line {outcome.step}"
+                f" (retry {budget.used} of {budget.retries})"
+            )
+            attempts = outcome.attempts + 1
+            outcome = await run_case(pool, case, options, suite_hooks)
+            outcome.attempts = attempts
+        record_outcome(outcome, options, on_outcome)
+        return outcome
+
+    try:
+        async with BrowserPool(size=min(workers, len(cases)) or 1, headless=options.headless) as pool:
+            # The pool hands out browsers first come, first served.
+            outcomes = await asyncio.gather(*(run_one(case) for case in longest_first(cases, estimates)))
+    finally:
+        if cache:
+            cache.save()
+    order = {case.tc_id: index for index, case in enumerate(cases)}
+    return sorted(outcomes, key=lambda o: order[o.tc_id])
@@ -0,0 +1,185 @@
+"""Duration and flake history, longest-first ordering and bounded retries.
+
+TC003 and TC005 fail on and off when the click that opens ``flutter-view``
+times out, and rerunning the whole suite to find out is expensive. The
+harness keeps a small per-test history in ``tmp/test_history.json``: a
+smoothed duration and the last few runs' status, failing step (line in the
+script) and number of attempts.
+
+* Tests are started longest first, so the slowest one isn't left for last
+  on an otherwise idle pool (the same rule :func:`harness.shard.plan_shards`
+  uses across processes).
+* A failure is retried only if :func:`classify_failure` calls it transient:
+  the browser or network dropped out, or a step timed out and the test has
+  not failed at that same step on every recent run. An assertion that
+  fails without a timeout, or a timeout that is simply where the test
+  always stops, is not retried.
+* Retries come out of a per-run :class:`RetryBudget`: at most ``retries``
+  reruns, and no more than :data:`RETRY_TIME_SHARE` of the suite's
+  estimated time, so flakes can't double a run.
+"""
+
+import json
+import os
+import re
+import traceback
+
+from . import TMP_DIR
+
+HISTORY_PATH = TMP_DIR / "test_history.json"
+
+# Runs kept per test.
+HISTORY_RUNS = 10
+# Weight of the newest duration in the smoothed estimate.
+DURATION_SMOOTHING = 0.3
+# Retries may add at most this share of the suite's estimated time.
+RETRY_TIME_SHARE = 0.25
+# A timeout at the same step on this many consecutive runs is a real failure.
+STABLE_FAILURE_RUNS = 3
+
+TRANSIENT = "transient"
+DETERMINISTIC = "deterministic"
+
+_TIMEOUT = re.compile(r"Timeout \d+ms exceeded|with timeout \d+ms|TimeoutError")
+_DROPPED = re.compile(
+    r"Target page, context or browser has been closed|Browser has been closed|"
+    r"browser has disconnected|net::ERR_|Shard worker crashed"
+)
+
+
+def _chain(exc):
+    """``exc`` and the exceptions it was raised from or while handling."""
+    seen = []
+    while exc is not None and exc not in seen:
+        seen.append(exc)
+        exc = exc.__cause__ or exc.__context__
+    return seen
+
+
+def failure_kind(exc) -> str:
+    """``"timeout"``, ``"dropped"`` or ``"error"`` for an exception and its causes.
+
+    The scripts turn a timed-out ``expect`` into their own
+    ``AssertionError``, so the chain is searched, not just the outer error.
+    """
+    text = "\n".join(f"{type(e).__name__}: {e}" for e in _chain(exc))
+    if _DROPPED.search(text):
+        return "dropped"
+    if _TIMEOUT.search(text):
+        return "timeout"
+    return "error"
+
+
+def failing_step(exc, path):
+    """Line in the script at ``path`` where the innermost cause was raised."""
+    for cause in reversed(_chain(exc)):
+        lines = [
+            frame.lineno
+            for frame in traceback.extract_tb(cause.__traceback__)
+            if frame.filename == str(path)
+        ]
+        if lines:
+            return lines[-1]
+    return None
+
+
+def classify_failure(outcome, runs=()) -> str:
+    """Whether a failed ``outcome`` is worth rerunning, given the test's past ``runs``."""
+    if outcome.kind == "dropped":
+        return TRANSIENT
+    if outcome.kind != "timeout":
+        return DETERMINISTIC
+    recent = list(runs)[-STABLE_FAILURE_RUNS:]
+    stuck = len(recent) == STABLE_FAILURE_RUNS and all(
+        run["status"] != "PASSED" and run.get("step") == outcome.step for run in recent
+    )
+    return DETERMINISTIC if stuck else TRANSIENT
+
+
+class RetryBudget:
+    """At most ``retries`` reruns costing no more than ``seconds`` in total."""
+
+    def __init__(self, retries=0, seconds=0.0):
+        self.retries = retries
+        self.seconds = seconds
+        self.used = 0
+        self.spent = 0.0
+
+    @classmethod
+    def for_suite(cls, retries, estimates):
+        if not estimates:
+            return cls(retries, float("inf"))
+        return cls(retries, RETRY_TIME_SHARE * sum(estimates.values()))
+
+    def take(self, estimate) -> bool:
+        """Reserve one rerun expected to take ``estimate`` seconds, if it fits."""
+        if self.used >= self.retries or self.spent + estimate > self.seconds:
+            return False
+        self.used += 1
+        self.spent += estimate
+        return True
+
+    def split(self, parts) -> list:
+        """Divide the budget between ``parts`` lists of estimates (one per shard)."""
+        total = sum(sum(part) for part in parts) or 1.0
+        budgets = []
+        for index, part in enumerate(parts):
+            count = self.retries // len(parts) + (index < self.retries % len(parts))
+            budgets.append(RetryBudget(count, self.seconds * sum(part) / total))
+        return budgets
+
+
+def longest_first(cases, estimates) -> list:
+    return sorted(cases, key=lambda case: (-estimates.get(case.tc_id, 0.0), case.tc_id))
+
+
+def load_history(path=HISTORY_PATH) -> dict:
+    """TC id -> {"duration": smoothed seconds, "runs": [{"status", "step", "attempts"}, ...]}."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def history_durations(history) -> dict:
+    return {tc_id: entry["duration"] for tc_id, entry in history.items() if entry.get("duration")}
+
+
+def update_history(outcomes, path=HISTORY_PATH) -> dict:
+    history = load_history(path)
+    for outcome in outcomes:
+        entry = history.setdefault(outcome.tc_id, {"duration": None, "runs": []})
+        if outcome.duration:
+            previous = entry.get("duration")
+            entry["duration"] = round(
+                outcome.duration
+                if previous is None
+                else DURATION_SMOOTHING * outcome.duration + (1 - DURATION_SMOOTHING) * previous,
+                3,
+            )
+        entry["runs"] = (
+            entry["runs"]
+            + [{"status": outcome.status, "step": outcome.step, "attempts": outcome.attempts}]
+        )[-HISTORY_RUNS:]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(history, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+    os.replace(tmp_path, path)
+    return history
+
+
+def flaky_tests(history) -> dict:
+    """TC id -> share of recent runs that needed a retry or flipped status."""
+    rates = {}
+    for tc_id, entry in history.items():
+        runs = entry.get("runs", [])
+        if len(runs) < 2:
+            continue
+        flips = sum(a["status"] != b["status"] for a, b in zip(runs, runs[1:]))
+        retried = sum(run["attempts"] > 1 and run["status"] == "PASSED" for run in runs)
+        rate = (flips + retried) / len(runs)
+        if rate:
+            rates[tc_id] = round(rate, 2)
+    return rates
@@ -0,0 +1,105 @@
+"""Table definitions read from the repo's SQL files.
+
+``schema.sql`` and ``chat_schema.sql`` (plus the columns later migrations
+add) are the source of truth for the database; this module pulls out just enough of them (columns, simple
+defaults, foreign keys, seeded services) for the harness's in-process
+Supabase stand-in and data generators to stay in step with the real schema.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from . import REPO_DIR
+
+SCHEMA_FILES = (REPO_DIR / "schema.sql", REPO_DIR / "chat_schema.sql")
+# Applied after the schema files, in order (functions, indexes, triggers,
+# policies and ``ALTER TABLE ... ADD COLUMN``).
+MIGRATION_FILES = (
+    REPO_DIR / "provider_lookup_schema.sql",
+    REPO_DIR / "rating_aggregates_schema.sql",
+    REPO_DIR / "indexes_schema.sql",
+    REPO_DIR / "rls_policies_schema.sql",
+)
+
+_CREATE_TABLE = re.compile(
+    r"CREATE TABLE (?:IF NOT EXISTS )?(\w+)\s*\((.*?)\n\);", re.DOTALL | re.IGNORECASE
+)
+_COLUMN = re.compile(r"^\s*(\w+)\s+([A-Z]+(?:\([\d,]+\))?)(.*)$", re.IGNORECASE)
+_ADD_COLUMNS = re.compile(r"ALTER TABLE (\w+)\s+(ADD COLUMN .*?);", re.DOTALL | re.IGNORECASE)
+_ADD_COLUMN = re.compile(r"ADD COLUMN (?:IF NOT EXISTS )?(\w+\s+[^,]*)", re.IGNORECASE)
+_REFERENCES = re.compile(r"REFERENCES (\w+)\((\w+)\)", re.IGNORECASE)
+_DEFAULT = re.compile(r"DEFAULT ('(?:[^']*)'|TRUE|FALSE|-?\d+(?:\.\d+)?)", re.IGNORECASE)
+_SERVICE_ROW = re.compile(r"\('([^']*)', '([^']*)', '([^']*)', (\d+(?:\.\d+)?)\)")
+_ADMIN_PHONE = re.compile(r"IF NEW\.phone = '([^']+)'")
+
+_NOT_COLUMNS = {"PRIMARY", "UNIQUE", "CONSTRAINT", "FOREIGN", "CHECK"}
+
+
+@dataclass
+class Table:
+    name: str
+    columns: list = field(default_factory=list)
+    # Literal defaults only; NOW()/uuid defaults are filled in by callers.
+    defaults: dict = field(default_factory=dict)
+    # column -> referenced table
+    foreign_keys: dict = field(default_factory=dict)
+
+
+def _literal(token):
+    upper = token.upper()
+    if upper in ("TRUE", "FALSE"):
+        return upper == "TRUE"
+    if token.startswith("'"):
+        return token.strip("'")
+    return float(token) if "." in token else int(token)
+
+
+def read_sql(paths=SCHEMA_FILES) -> str:
+    return "\n".join(path.read_text(encoding="utf-8-sig") for path in paths)
+
+
+def _add_column(table, line):
+    match = _COLUMN.match(line)
+    if not match or match.group(1).upper() in _NOT_COLUMNS:
+        return
+    column, rest = match.group(1), match.group(3)
+    if column not in table.columns:
+        table.columns.append(column)
+    reference = _REFERENCES.search(rest)
+    if reference:
+        table.foreign_keys[column] = reference.group(1)
+    default = _DEFAULT.search(rest)
+    if default:
+        table.defaults[column] = _literal(default.group(1))
+
+
+def parse_tables(sql=None) -> dict:
+    sql = read_sql(SCHEMA_FILES + MIGRATION_FILES) if sql is None else sql
+    tables = {}
+    for name, body in _CREATE_TABLE.findall(sql):
+        table = Table(name)
+        for line in body.splitlines():
+            _add_column(table, line.split("--", 1)[0].strip().rstrip(","))
+        tables[name] = table
+    for name, clauses in _ADD_COLUMNS.findall(sql):
+        if name in tables:
+            for line in _ADD_COLUMN.findall(clauses):
+                _add_column(tables[name], line.strip())
+    return tables
+
+
+def seed_services(sql=None) -> list:
+    """The default rows ``schema.sql`` inserts into ``services``."""
+    sql = read_sql() if sql is None else sql
+    insert = sql[sql.index("INSERT INTO services"):]
+    insert = insert[: insert.index(";")]
+    return [
+        {"id": sid, "name": name, "description": description, "base_price": float(price)}
+        for sid, name, description, price in _SERVICE_ROW.findall(insert)
+    ]
+
+
+def super_admin_phone(sql=None):
+    """Phone number ``handle_new_user()`` promotes to super_admin."""
+    match = _ADMIN_PHONE.search(read_sql() if sql is None else sql)
+    return match.group(1) if match else None
@@ -0,0 +1,112 @@
+"""Locate Flutter widgets through the web accessibility (semantics) tree.
+
+Flutter web paints onto a canvas inside ``flutter-view``, so the generated
+scripts can only click the host element and hope the centre lands on the
+right control. Once accessibility is switched on, the engine mirrors the
+widget tree as ``flt-semantics`` nodes carrying ARIA roles and labels, which
+Playwright's role and label locators can target directly::
+
+    from harness.semantics import tap
+
+    await tap(page, "Skip")                 # TextButton("Skip")
+    await tap(page, "Next")
+    await semantic(page, "Login").wait_for()
+
+Semantics are enabled by clicking the engine's ``flt-semantics-placeholder``
+button, either on demand (:func:`enable_semantics`) or for every page of a
+context via the :func:`semantics_on` hook the runner installs.
+"""
+
+from . import flutter
+from .profile import span
+
+DEFAULT_TIMEOUT_MS = 10000
+
+# Older engines keep their DOM in the glass pane's shadow root; newer ones
+# put it directly under ``flutter-view``.
+_ROOTS_JS = """
+const roots = [document].concat(
+  Array.from(document.querySelectorAll('flt-glass-pane, flutter-view'))
+    .map((host) => host.shadowRoot)
+    .filter(Boolean));
+"""
+
+ENABLE_JS = (
+    "() => {"
+    + _ROOTS_JS
+    + """
+  if (roots.some((root) => root.querySelector('flt-semantics'))) return true;
+  for (const root of roots) {
+    const placeholder = root.querySelector('flt-semantics-placeholder');
+    if (placeholder) placeholder.click();
+  }
+  return false;
+}"""
+)
+
+# Same check as ENABLE_JS, run from an init script so every navigation in a
+# context turns semantics on without the test asking.
+SEMANTICS_INIT_JS = (
+    "(() => { const enable = "
+    + ENABLE_JS
+    + """;
+  const timer = setInterval(() => { if (enable()) clearInterval(timer); }, 100);
+})();"""
+)
+
+
+async def enable_semantics(page, timeout=DEFAULT_TIMEOUT_MS):
+    """Switch on the semantics tree and wait until its first node exists."""
+    with span("wait", "semantics.enable"):
+        await page.wait_for_function(ENABLE_JS, polling=100, timeout=timeout)
+
+
+async def semantics_on(context):
+    """Context hook: enable semantics on every page load of ``context``."""
+    await context.add_init_script(SEMANTICS_INIT_JS)
+
+
+def semantic(page, label, role=None, exact=True):
+    """Locator for the semantics node with accessible name ``label``.
+
+    With ``role`` (``"button"``, ``"textbox"``, ``"link"``, ...) this is
+    Playwright's role locator; without it, any node labelled ``label`` or
+    whose text is ``label``.
+    """
+    if role:
+        return page.get_by_role(role, name=label, exact=exact)
+    nodes = page.locator("flt-semantics")
+    return nodes.get_by_label(label, exact=exact).or_(nodes.get_by_text(label, exact=exact)).first
+
+
+async def scroll_to(page, label, exact=True, step=300, max_scrolls=40):
+    """Wheel-scroll the view until the widget labelled ``label`` is shown.
+
+    Lazy lists and grids only build the children on screen, so a node
+    further down has no semantics until it is scrolled to. Raises the
+    harness's usual ``AssertionError`` if it never shows up.
+    """
+    with span("action", f"semantics.scroll_to({label})"):
+        await enable_semantics(page)
+        locator = semantic(page, label, exact=exact)
+        viewport = page.viewport_size or {"width": 800, "height": 600}
+        await page.mouse.move(viewport["width"] / 2, viewport["height"] / 2)
+        for _ in range(max_scrolls):
+            if await locator.count() and await locator.is_visible():
+                return locator
+            await page.mouse.wheel(0, step)
+            await page.wait_for_timeout(100)
+        raise AssertionError(f"Test case failed: {label!r} not found after scrolling")
+
+
+async def tap(page, label, role="button", exact=True, timeout=DEFAULT_TIMEOUT_MS, settle=True):
+    """Click the widget labelled ``label``, then wait for Flutter to settle.
+
+    The settle wait needs the frame probe from :mod:`harness.flutter`; pages
+    without it simply skip that step.
+    """
+    with span("action", f"semantics.tap({label})"):
+        await enable_semantics(page, timeout=timeout)
+        await semantic(page, label, role=role, exact=exact).click(timeout=timeout)
+        if settle and await page.evaluate("() => Boolean(window.__harnessFrames)"):
+            await flutter.wait_for_flutter_settled(page, timeout=timeout)
@@ -0,0 +1,84 @@
+"""Spread TC scripts over worker processes, balanced by past durations."""
+
+import asyncio
+import multiprocessing
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from .results_log import append_events, result_event
+from .runner import Outcome, format_outcome, run_suite, utc_now
+from .schedule import RetryBudget, longest_first
+
+# Used for every test when there is no history at all (first run).
+DEFAULT_DURATION = 60.0
+
+
+def estimate_durations(cases, history) -> dict:
+    """Known durations from ``history``; unknown tests get the median."""
+    known = [history[case.tc_id] for case in cases if case.tc_id in history]
+    fallback = statistics.median(known) if known else DEFAULT_DURATION
+    return {case.tc_id: history.get(case.tc_id, fallback) for case in cases}
+
+
+def plan_shards(cases, shard_count, history=None) -> list:
+    """Longest-processing-time-first assignment to the least loaded shard.
+
+    Returns ``shard_count`` lists of cases (some may be empty when there are
+    fewer tests than shards) with each shard's total estimate as balanced
+    as the greedy heuristic allows.
+    """
+    shard_count = max(1, shard_count)
+    estimates = estimate_durations(cases, history or {})
+    shards = [[] for _ in range(shard_count)]
+    loads = [0.0] * shard_count
+    for case in sorted(cases, key=lambda c: (-estimates[c.tc_id], c.tc_id)):
+        index = loads.index(min(loads))
+        shards[index].append(case)
+        loads[index] += estimates[case.tc_id]
+    return [longest_first(shard, estimates) for shard in shards]
+
+
+def _run_shard(cases, options, verbose, estimates, budget):
+    on_outcome = (lambda o: print(format_outcome(o), flush=True)) if verbose else None
+    return asyncio.run(
+        run_suite(cases, workers=1, options=options, on_outcome=on_outcome, estimates=estimates, budget=budget)
+    )
+
+
+def _shard_failure(cases, exc):
+    error = f"Shard worker crashed: {type(exc).__name__}: {exc}"
+    return [
+        Outcome(case.tc_id, case.title, status="FAILED", error=error, modified=utc_now())
+        for case in cases
+    ]
+
+
+def run_sharded(cases, shard_count, history=None, options=None, verbose=True) -> list:
+    """Run each shard in its own process (and browser); outcomes come back in case order.
+
+    The run's retry budget is split between the shards by their estimated time.
+    """
+    shards = [shard for shard in plan_shards(cases, shard_count, history) if shard]
+    estimates = estimate_durations(cases, history or {})
+    budgets = RetryBudget.for_suite(options.retries if options else 0, estimates).split(
+        [[estimates[case.tc_id] for case in shard] for shard in shards]
+    )
+    # Spawn rather than fork: Playwright's driver and event loop don't survive a fork.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+        futures = [
+            (shard, pool.submit(_run_shard, shard, options, verbose, estimates, budget))
+            for shard, budget in zip(shards, budgets)
+        ]
+        outcomes = []
+        for shard, future in futures:
+            try:
+                outcomes.extend(future.result())
+            except Exception as exc:
+                # A dead worker fails its own shard, not the whole run.
+                failures = _shard_failure(shard, exc)
+                if options and options.results_log:
+                    append_events(options.results_log, [result_event(o) for o in failures])
+                outcomes.extend(failures)
+    order = {case.tc_id: index for index, case in enumerate(cases)}
+    return sorted(outcomes, key=lambda o: order[o.tc_id])
@@ -0,0 +1,473 @@
+"""In-process stand-in for the Supabase auth and REST APIs.
+
+With ``--offline`` every request the app sends to the Supabase project in
+``lib/utils/constants.dart`` is answered from memory via ``context.route``:
+
+* GoTrue ``/auth/v1/otp`` accepts any phone and ``/auth/v1/verify`` signs in
+  with :data:`FIXED_OTP` (any other code gets GoTrue's 403). New users get a
+  ``profiles`` row the way ``handle_new_user()`` in ``schema.sql`` does.
+* PostgREST ``/rest/v1/<table>`` supports the subset ``SupabaseService``
+  uses: column and embedded selects (``services(*)``,
+  ``profiles!bookings_provider_id_fkey(*)``), ``eq``/``neq``/``gt``/``in``/
+  ``is`` style filters, ``order``, ``limit``/``offset``, single-object
+  responses, inserts, upserts, updates and deletes.
+* PostgREST ``/rest/v1/rpc/<function>`` for the functions the SQL
+  migrations add, reimplemented in :meth:`SupabaseStub.rpc`.
+
+Each test gets its own :class:`SupabaseStub`, seeded with the services
+``schema.sql`` inserts, so state never leaks between tests. Realtime
+(websocket) subscriptions are not emulated.
+"""
+
+import base64
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlsplit
+
+from . import REPO_DIR
+from .schema import Table, parse_tables, seed_services, super_admin_phone
+
+FIXED_OTP = "123456"
+
+_CONSTANTS = (REPO_DIR / "lib" / "utils" / "constants.dart").read_text(encoding="utf-8-sig")
+SUPABASE_URL = re.search(r"supabaseUrl\s*=\s*'([^']+)'", _CONSTANTS).group(1)
+SUPABASE_ANON_KEY = re.search(r"supabaseAnonKey\s*=\s*'([^']+)'", _CONSTANTS).group(1)
+
+# Tables the app queries that the SQL files don't create.
+EXTRA_TABLES = {
+    "favorites": Table("favorites", ["id", "user_id", "target_id", "created_at"], {}, {"user_id": "profiles"}),
+}
+
+SINGLE_OBJECT = "application/vnd.pgrst.object+json"
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+CORS_HEADERS = {
+    "access-control-allow-origin": "*",
+    "access-control-allow-headers": "*",
+    "access-control-allow-methods": "GET, POST, PATCH, PUT, DELETE, OPTIONS, HEAD",
+    "access-control-expose-headers": "content-range, x-total-count",
+}
+
+
+@dataclass
+class StubResponse:
+    status: int = 200
+    body: object = None
+    headers: dict = field(default_factory=dict)
+
+    def encoded(self) -> bytes:
+        return b"" if self.body is None else json.dumps(self.body).encode()
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _b64(data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+
+def fake_jwt(claims) -> str:
+    # Unsigned, but shaped like a JWT so client-side decoding of exp/sub works.
+    return f"{_b64({'alg': 'HS256', 'typ': 'JWT'})}.{_b64(claims)}.stub"
+
+
+def split_top_level(text, sep=","):
+    """Split on ``sep`` outside parentheses."""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == sep and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _compare(value, literal):
+    try:
+        return (float(value) > float(literal)) - (float(value) < float(literal))
+    except (TypeError, ValueError):
+        left = _as_text(value)
+        return (left > literal) - (left < literal)
+
+
+def _like(value, pattern, ignore_case):
+    regex = "^" + ".*".join(re.escape(part) for part in pattern.replace("%", "*").split("*")) + "$"
+    return re.match(regex, _as_text(value), re.IGNORECASE if ignore_case else 0) is not None
+
+
+def matches(row, column, expression) -> bool:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, literal = expression.partition(".")
+    value = row.get(column)
+    if op == "eq":
+        result = _as_text(value) == literal
+    elif op == "neq":
+        result = _as_text(value) != literal
+    elif op in ("gt", "gte", "lt", "lte"):
+        if value is None:
+            result = False
+        else:
+            cmp = _compare(value, literal)
+            result = {"gt": cmp > 0, "gte": cmp >= 0, "lt": cmp < 0, "lte": cmp <= 0}[op]
+    elif op in ("like", "ilike"):
+        result = value is not None and _like(value, literal, op == "ilike")
+    elif op == "is":
+        result = _as_text(value) == literal
+    elif op == "in":
+        options = [item.strip().strip('"') for item in literal.strip("()").split(",")]
+        result = _as_text(value) in options
+    else:
+        raise ValueError(f"unsupported filter operator: {op}")
+    return result != negate
+
+
+class SupabaseStub:
+    def __init__(self, otp=FIXED_OTP):
+        self.otp = otp
+        self.tables = {**parse_tables(), **EXTRA_TABLES}
+        self.rows = {name: [] for name in self.tables}
+        self.users = {}
+        self.sessions = {}
+        self.otp_requests = []
+        self._admin_phone = super_admin_phone()
+        for service in seed_services():
+            self.insert("services", service)
+
+    # -- storage ---------------------------------------------------------
+
+    def table(self, name):
+        if name not in self.rows:
+            # Unknown tables behave like empty ones rather than 404ing.
+            self.tables[name] = Table(name)
+            self.rows[name] = []
+        return self.rows[name]
+
+    def _complete(self, name, row):
+        table = self.tables[name]
+        full = {column: table.defaults.get(column) for column in table.columns}
+        full.update(row)
+        if "id" in table.columns and full.get("id") is None:
+            full["id"] = str(uuid.uuid4())
+        for column in ("created_at", "updated_at"):
+            if column in table.columns and full.get(column) is None:
+                full[column] = now_iso()
+        return full
+
+    def insert(self, name, row, upsert=False, on_conflict="id"):
+        rows = self.table(name)
+        if upsert and row.get(on_conflict) is not None:
+            for existing in rows:
+                if existing.get(on_conflict) == row[on_conflict]:
+                    existing.update(row)
+                    return existing
+        full = self._complete(name, row)
+        rows.append(full)
+        return full
+
+    # -- PostgREST -------------------------------------------------------
+
+    def _relation(self, source, target, hint):
+        """Return (fk column, direction) linking ``source`` to ``target``."""
+        if hint:
+            column = hint
+            if column.startswith(f"{source}_") and column.endswith("_fkey"):
+                return column[len(source) + 1 : -len("_fkey")], "one"
+            if column.startswith(f"{target}_") and column.endswith("_fkey"):
+                return column[len(target) + 1 : -len("_fkey")], "many"
+            return column, "one"
+        for column, referenced in self.tables[source].foreign_keys.items():
+            if referenced == target:
+                return column, "one"
+        for column, referenced in self.tables.get(target, Table(target)).foreign_keys.items():
+            if referenced == source:
+                return column, "many"
+        raise ValueError(f"no relationship between {source} and {target}")
+
+    def project(self, name, rows, select):
+        items = split_top_level(select or "*")
+        result = []
+        for row in rows:
+            out = {}
+            for item in items:
+                alias, spec = item.split(":", 1) if ":" in item.split("(")[0] else ("", item)
+                if "(" not in spec:
+                    if spec == "*":
+                        out.update(row)
+                    else:
+                        out[alias or spec] = row.get(spec)
+                    continue
+                head, inner = spec.split("(", 1)
+                inner = inner[:-1]
+                target, _, hint = head.partition("!")
+                column, direction = self._relation(name, target, hint)
+                if direction == "one":
+                    linked = [r for r in self.table(target) if r.get("id") == row.get(column)]
+                    projected = self.project(target, linked[:1], inner)
+                    out[alias or target] = projected[0] if projected else None
+                else:
+                    linked = [r for r in self.table(target) if r.get(column) == row.get("id")]
+                    out[alias or target] = self.project(target, linked, inner)
+            result.append(out)
+        return result
+
+    def query(self, name, params):
+        rows = [
+            row
+            for row in self.table(name)
+            if all(matches(row, column, expr) for column, expr in params if column not in _RESERVED_PARAMS)
+        ]
+        options = dict(params)
+        for term in reversed(split_top_level(options.get("order", ""))):
+            column, *flags = term.split(".")
+            descending = "desc" in flags
+            nulls_first = "nullsfirst" in flags or ("nullslast" not in flags and descending)
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=descending)
+            rows = missing + present if nulls_first else present + missing
+        offset = int(options.get("offset", 0))
+        limit = options.get("limit")
+        rows = rows[offset : offset + int(limit)] if limit is not None else rows[offset:]
+        return rows
+
+    def rest(self, method, name, params, headers, body):
+        response = self._rest(method, name, params, headers, body)
+        # Clients can't set the totals on profiles either; the triggers own them.
+        if name in ("ratings", "profiles") and method in ("POST", "PATCH", "DELETE"):
+            self._sync_rating_totals()
+        return response
+
+    def _rest(self, method, name, params, headers, body):
+        prefer = headers.get("prefer", "")
+        single = SINGLE_OBJECT in headers.get("accept", "")
+        options = dict(params)
+
+        if method in ("GET", "HEAD"):
+            rows = self.project(name, self.query(name, params), options.get("select"))
+        elif method == "POST":
+            payload = body if isinstance(body, list) else [body]
+            upsert = "resolution=merge-duplicates" in prefer
+            on_conflict = options.get("on_conflict", "id")
+            rows = [self.insert(name, row, upsert, on_conflict) for row in payload]
+            if "return=representation" not in prefer:
+                return StubResponse(201)
+            rows = self.project(name, rows, options.get("select"))
+        elif method == "PATCH":
+            rows = self.query(name, params)
+            for row in rows:
+                row.update(body or {})
+            if "return=representation" not in prefer:
+                return StubResponse(204)
+            rows = self.project(name, rows, options.get("select"))
+        elif method == "DELETE":
+            rows = self.query(name, params)
+            ids = {id(row) for row in rows}
+            self.rows[name] = [row for row in self.table(name) if id(row) not in ids]
+            if "return=representation" not in prefer:
+                return StubResponse(204)
+        else:
+            return StubResponse(405, {"message": f"{method} not supported"})
+
+        headers = {"content-range": f"0-{max(len(rows) - 1, 0)}/{len(rows)}"}
+        if single:
+            if len(rows) != 1:
+                return StubResponse(
+                    406,
+                    {
+                        "code": "PGRST116",
+                        "details": f"The result contains {len(rows)} rows",
+                        "hint": None,
+                        "message": "JSON object requested, multiple (or no) rows returned",
+                    },
+                )
+            return StubResponse(200, rows[0], headers)
+        return StubResponse(200 if method != "POST" else 201, rows, headers)
+
+    # -- RPC -------------------------------------------------------------
+
+    def rpc(self, name, args):
+        handler = getattr(self, f"_rpc_{name}", None)
+        if handler is None:
+            return StubResponse(
+                404, {"code": "PGRST202", "message": f"Could not find the function public.{name}"}
+            )
+        return StubResponse(200, handler(**args))
+
+    def _rpc_get_service_providers(self, p_service_id, p_limit=20, p_offset=0):
+        """Mirrors get_service_providers() in rating_aggregates_schema.sql."""
+        profiles = {row["id"]: row for row in self.table("profiles")}
+        result = []
+        for listing in self.table("provider_services"):
+            profile = profiles.get(listing.get("provider_id"))
+            if listing.get("service_id") != p_service_id or profile is None:
+                continue
+            count, total = profile.get("rating_count") or 0, profile.get("rating_sum") or 0
+            score = (
+                (total + 3.5 * 5) / (count + 5)
+                + (1 if listing.get("is_available") else 0)
+                + (0.5 if profile.get("is_online") else 0)
+                + (0.25 if profile.get("is_verified") else 0)
+            )
+            result.append(
+                {
+                    **profile,
+                    "hourly_rate": listing.get("hourly_rate"),
+                    "is_available": listing.get("is_available"),
+                    "rating_avg": round(total / count, 2) if count else None,
+                    "rating_count": count,
+                    "rank_score": round(score, 3),
+                }
+            )
+        result.sort(key=lambda row: (-row["rank_score"], row["id"]))
+        offset = max(int(p_offset), 0)
+        return result[offset : offset + min(max(int(p_limit), 1), 100)]
+
+    def _rpc_get_provider_ratings(self, p_provider_ids):
+        """Mirrors get_provider_ratings() in rating_aggregates_schema.sql."""
+        wanted = set(p_provider_ids or ())
+        return [
+            {
+                "provider_id": row["id"],
+                "rating_count": row.get("rating_count") or 0,
+                "rating_avg": round(row["rating_sum"] / row["rating_count"], 2) if row.get("rating_count") else None,
+            }
+            for row in self.table("profiles")
+            if row["id"] in wanted
+        ]
+
+    def _sync_rating_totals(self):
+        """What the ratings triggers in rating_aggregates_schema.sql maintain."""
+        totals = {}
+        for row in self.table("ratings"):
+            if row.get("target_id") is not None and row.get("rating") is not None:
+                count, total = totals.get(row["target_id"], (0, 0))
+                totals[row["target_id"]] = (count + 1, total + row["rating"])
+        for profile in self.table("profiles"):
+            profile["rating_count"], profile["rating_sum"] = totals.get(profile["id"], (0, 0))
+
+    # -- GoTrue ----------------------------------------------------------
+
+    def _session(self, user):
+        expires_in = 3600
+        expires_at = int(time.time()) + expires_in
+        access_token = fake_jwt(
+            {"sub": user["id"], "phone": user["phone"], "role": "authenticated", "exp": expires_at}
+        )
+        refresh_token = uuid.uuid4().hex
+        self.sessions[access_token] = user
+        self.sessions[refresh_token] = user
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "expires_in": expires_in,
+            "expires_at": expires_at,
+            "refresh_token": refresh_token,
+            "user": user,
+        }
+
+    def _user_for_phone(self, phone):
+        user = self.users.get(phone)
+        if user is None:
+            user = {
+                "id": str(uuid.uuid4()),
+                "aud": "authenticated",
+                "role": "authenticated",
+                "phone": phone,
+                "phone_confirmed_at": now_iso(),
+                "app_metadata": {"provider": "phone", "providers": ["phone"]},
+                "user_metadata": {},
+                "created_at": now_iso(),
+            }
+            self.users[phone] = user
+            # Mirrors the on_auth_user_created trigger.
+            if phone == self._admin_phone:
+                profile = {"id": user["id"], "phone": phone, "role": "super_admin", "full_name": "Super Admin"}
+            else:
+                profile = {"id": user["id"], "phone": phone, "role": "customer"}
+            self.insert("profiles", profile, upsert=True)
+        return user
+
+    def auth(self, method, endpoint, params, headers, body):
+        body = body or {}
+        if endpoint == "otp" and method == "POST":
+            self.otp_requests.append(body.get("phone"))
+            return StubResponse(200, {})
+        if endpoint == "verify" and method == "POST":
+            if body.get("token") != self.otp:
+                return StubResponse(
+                    403,
+                    {"code": 403, "error_code": "otp_expired", "msg": "Token has expired or is invalid"},
+                )
+            return StubResponse(200, self._session(self._user_for_phone(body.get("phone"))))
+        if endpoint == "token" and method == "POST":
+            user = self.sessions.get(body.get("refresh_token"))
+            if user is None:
+                return StubResponse(400, {"error": "invalid_grant", "error_description": "Invalid Refresh Token"})
+            return StubResponse(200, self._session(user))
+        if endpoint == "user" and method == "GET":
+            token = headers.get("authorization", "").removeprefix("Bearer ").strip()
+            user = self.sessions.get(token)
+            return StubResponse(200, user) if user else StubResponse(401, {"msg": "invalid JWT"})
+        if endpoint == "logout":
+            return StubResponse(204)
+        return StubResponse(404, {"msg": f"{endpoint} is not emulated"})
+
+    # -- dispatch --------------------------------------------------------
+
+    def handle(self, method, url, headers=None, body=None) -> StubResponse:
+        """Answer one request; ``body`` is the raw request body (str/bytes) or None."""
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        if method == "OPTIONS":
+            response = StubResponse(204)
+        else:
+            parts = urlsplit(url)
+            params = parse_qsl(parts.query, keep_blank_values=True)
+            payload = json.loads(body) if body else None
+            segments = parts.path.strip("/").split("/")
+            if segments[:2] == ["auth", "v1"] and len(segments) == 3:
+                response = self.auth(method, segments[2], params, headers, payload)
+            elif segments[:3] == ["rest", "v1", "rpc"] and len(segments) == 4:
+                args = payload if method == "POST" else dict(params)
+                try:
+                    response = self.rpc(segments[3], args or {})
+                except (TypeError, ValueError) as exc:
+                    response = StubResponse(400, {"code": "PGRST100", "message": str(exc)})
+            elif segments[:2] == ["rest", "v1"] and len(segments) == 3:
+                try:
+                    response = self.rest(method, segments[2], params, headers, payload)
+                except ValueError as exc:
+                    response = StubResponse(400, {"code": "PGRST100", "message": str(exc)})
+            else:
+                response = StubResponse(404, {"message": f"{parts.path} is not emulated"})
+        response.headers = {**CORS_HEADERS, "content-type": "application/json", **response.headers}
+        return response
+
+    async def fulfill(self, route, request):
+        response = self.handle(request.method, request.url, request.headers, request.post_data)
+        await route.fulfill(status=response.status, headers=response.headers, body=response.encoded())
+
+    async def install(self, context):
+        """Context hook: serve every Supabase request of ``context`` from this stub."""
+        await context.route(f"{SUPABASE_URL}/**", self.fulfill)
@@ -0,0 +1,149 @@
+"""Run pages on emulated mid-range phones and slow mobile networks.
+
+Most khdemti customers use mid-range Android phones on 3G/4G, while the
+harness runs at desktop speed. A :class:`ThrottleProfile` names a network
+(CDP ``Network.emulateNetworkConditions``: latency and throughput) and a CPU
+slowdown (CDP ``Emulation.setCPUThrottlingRate``)::
+
+    python -m harness --throttle slow-4g           # every TC's pages
+    python -m harness.bench --throttle fast-3g     # startup benchmark
+
+With ``--throttle`` the runner throttles every page a test opens, before
+its first navigation (:meth:`ThrottleProfile.install`). The benchmark does
+the same through ``measure_startup``'s ``setup`` hook.
+
+Each profile also sets latency budgets in milliseconds for named milestones.
+A script wraps a milestone in :func:`budget`, which fails the test when the
+milestone takes longer than the active profile allows::
+
+    from harness.throttle import budget
+
+    async with budget(page, "home_categories", since_navigation=True):
+        await tap(page, "Skip for Now (Demo Mode)")
+        await semantic(page, "Plumber", exact=False).wait_for()
+
+Without a budget for the active profile the milestone is only timed. The
+active profile's name comes from ``HARNESS_THROTTLE``; ``--throttle`` sets it
+for the scripts and shard workers.
+"""
+
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from .profile import span
+
+THROTTLE_ENV = "HARNESS_THROTTLE"
+
+
+@dataclass(frozen=True)
+class ThrottleProfile:
+    name: str
+    # Round-trip latency added to every request, in ms.
+    latency: float = 0.0
+    # Throughput in kbit/s; 0 means unthrottled.
+    download_kbps: float = 0.0
+    upload_kbps: float = 0.0
+    # CPU slowdown factor; 1 is the host's speed.
+    cpu_rate: float = 1.0
+    # Milestone -> latency budget in ms, checked by budget().
+    budgets: dict = field(default_factory=dict, compare=False, hash=False)
+
+    @property
+    def throttled(self) -> bool:
+        return bool(self.latency or self.download_kbps or self.upload_kbps) or self.cpu_rate > 1
+
+    def network_conditions(self) -> dict:
+        """Parameters for CDP ``Network.emulateNetworkConditions``."""
+        return {
+            "offline": False,
+            "latency": self.latency,
+            # CDP takes bytes per second, -1 for no limit.
+            "downloadThroughput": self.download_kbps * 1000 / 8 if self.download_kbps else -1,
+            "uploadThroughput": self.upload_kbps * 1000 / 8 if self.upload_kbps else -1,
+        }
+
+    async def apply(self, cdp):
+        """Throttle the page behind the CDP session ``cdp``."""
+        await cdp.send("Network.enable")
+        await cdp.send("Network.emulateNetworkConditions", self.network_conditions())
+        await cdp.send("Emulation.setCPUThrottlingRate", {"rate": self.cpu_rate})
+
+    async def install(self, context):
+        """Context hook: throttle every page of ``context`` before it navigates."""
+        new_page = context.new_page
+
+        async def new_throttled_page(**kwargs):
+            page = await new_page(**kwargs)
+            await self.apply(await context.new_cdp_session(page))
+            return page
+
+        context.new_page = new_throttled_page
+
+
+# Network figures follow Chrome DevTools' and Lighthouse's presets; the CPU
+# rates approximate a mid-range Android phone (4x) and a low-end one (6x)
+# against a developer laptop.
+PROFILES = {
+    profile.name: profile
+    for profile in [
+        ThrottleProfile("none"),
+        ThrottleProfile(
+            "fast-4g", latency=165, download_kbps=8100, upload_kbps=1350, cpu_rate=2,
+            budgets={"first_frame": 2500, "first_semantics": 3000, "home_categories": 3000},
+        ),
+        ThrottleProfile(
+            "slow-4g", latency=150, download_kbps=1600, upload_kbps=750, cpu_rate=4,
+            budgets={"first_frame": 3500, "first_semantics": 4000, "home_categories": 4000},
+        ),
+        ThrottleProfile(
+            "fast-3g", latency=562.5, download_kbps=1440, upload_kbps=675, cpu_rate=4,
+            budgets={"first_frame": 6000, "first_semantics": 7000, "home_categories": 7000},
+        ),
+        ThrottleProfile(
+            "slow-3g", latency=2000, download_kbps=400, upload_kbps=400, cpu_rate=6,
+            budgets={"first_frame": 20000, "first_semantics": 22000, "home_categories": 22000},
+        ),
+    ]
+}
+
+
+def get_profile(name) -> ThrottleProfile:
+    if name not in PROFILES:
+        raise ValueError(f"unknown throttle profile: {name}; known: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def active_profile() -> ThrottleProfile:
+    """The profile named in ``HARNESS_THROTTLE``, or ``none``."""
+    return get_profile(os.environ.get(THROTTLE_ENV) or "none")
+
+
+def over_budget(profile, measured) -> list:
+    """Descriptions of the milestones in ``measured`` (name -> ms) over ``profile``'s budgets."""
+    return [
+        f"{milestone} took {measured[milestone]:.0f} ms on {profile.name}, budget {limit} ms"
+        for milestone, limit in profile.budgets.items()
+        if measured.get(milestone) is not None and measured[milestone] > limit
+    ]
+
+
+@asynccontextmanager
+async def budget(page, milestone, since_navigation=False, profile=None):
+    """Time the block as ``milestone`` and fail if it is over the active budget.
+
+    With ``since_navigation`` the time is the page's ``performance.now()`` at
+    the end of the block, i.e. counted from the start of the page load.
+    """
+    profile = profile or active_profile()
+    started = time.perf_counter()
+    with span("wait", f"budget({milestone})"):
+        yield
+    if since_navigation:
+        elapsed = await page.evaluate("() => performance.now()")
+    else:
+        elapsed = (time.perf_counter() - started) * 1000
+    failures = over_budget(profile, {milestone: elapsed})
+    if failures:
+        raise AssertionError(f"Test case failed: {failures[0]}")
@@ -0,0 +1,165 @@
+"""Step one page through a matrix of device sizes and orientations.
+
+TC014 is meant to check the Zellij background "across different screen
+sizes and orientations", but a test only gets the ``--window-size=1280,720``
+launch. Relaunching per device would pay the Flutter bootstrap every time.
+:func:`sweep` reuses the page it is given instead. For each
+:class:`DeviceProfile` it sets the viewport with ``set_viewport_size``, then
+sets the device scale factor, mobile flag and screen orientation through
+CDP ``Emulation.setDeviceMetricsOverride``. It waits for Flutter to re-lay
+out (see :data:`RELAYOUT_JS`), saves a screenshot to
+``tmp/viewports/<name>/<profile>.png`` and runs the test's check::
+
+    from harness.viewports import sweep
+
+    await sweep(page, "TC014", check=lambda page, profile: expect_screen(
+        page, f"TC014_urgent_help_{profile.name}"))
+
+Every profile is tried; the failures are reported together at the end, and
+the page is put back to its original viewport.
+
+The profiles come from :data:`PROFILES`. A comma-separated list of names
+in ``HARNESS_VIEWPORTS`` (``python -m harness --viewports ...``) narrows a
+sweep down.
+"""
+
+import os
+from dataclasses import dataclass
+
+from . import TMP_DIR
+from .profile import span
+
+ARTIFACT_DIR = TMP_DIR / "viewports"
+VIEWPORTS_ENV = "HARNESS_VIEWPORTS"
+RELAYOUT_TIMEOUT_MS = 10000
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    name: str
+    width: int
+    height: int
+    scale: float = 1.0
+    mobile: bool = False
+
+    @property
+    def landscape(self) -> bool:
+        return self.width > self.height
+
+    def rotated(self):
+        suffix = "portrait" if self.landscape else "landscape"
+        return DeviceProfile(f"{self.name}-{suffix}", self.height, self.width, self.scale, self.mobile)
+
+    def metrics(self) -> dict:
+        """Parameters for CDP ``Emulation.setDeviceMetricsOverride``."""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "deviceScaleFactor": self.scale,
+            "mobile": self.mobile,
+            "screenWidth": self.width,
+            "screenHeight": self.height,
+            "screenOrientation": {
+                "type": "landscapePrimary" if self.landscape else "portraitPrimary",
+                "angle": 90 if self.landscape and self.mobile else 0,
+            },
+        }
+
+
+# Phones and tablets in portrait; each also runs rotated.
+DEVICES = [
+    DeviceProfile("small-phone", 360, 640, 2.0, mobile=True),
+    DeviceProfile("iphone-se", 375, 667, 2.0, mobile=True),
+    DeviceProfile("pixel-7", 412, 915, 2.625, mobile=True),
+    DeviceProfile("iphone-15-pro-max", 430, 932, 3.0, mobile=True),
+    DeviceProfile("galaxy-tab", 800, 1280, 1.5, mobile=True),
+    DeviceProfile("ipad-pro-11", 834, 1194, 2.0, mobile=True),
+]
+DESKTOPS = [
+    DeviceProfile("laptop", 1280, 720),
+    DeviceProfile("desktop-hidpi", 1440, 900, 2.0),
+    DeviceProfile("full-hd", 1920, 1080),
+]
+PROFILES = {
+    profile.name: profile
+    for profile in [p for device in DEVICES for p in (device, device.rotated())] + DESKTOPS
+}
+
+# Resolves once the window, the flutter-view host and its canvas backing
+# store all have the new size and pixel ratio, i.e. Flutter has handled the
+# resize and repainted at the new metrics.
+RELAYOUT_JS = """
+([width, height, scale]) => {
+  if (window.innerWidth !== width || window.innerHeight !== height) return false;
+  if (Math.abs(window.devicePixelRatio - scale) > 0.001) return false;
+  const view = document.querySelector('flutter-view, flt-glass-pane');
+  if (!view) return false;
+  const rect = view.getBoundingClientRect();
+  if (Math.round(rect.width) !== width || Math.round(rect.height) !== height) return false;
+  const canvas = (view.shadowRoot || view).querySelector('canvas') || view.querySelector('canvas');
+  return !canvas || Math.abs(canvas.width - Math.round(width * scale)) <= 1;
+}
+"""
+
+# Two animation frames: the one Flutter paints in, and the one after it.
+NEXT_FRAMES_JS = "() => new Promise((r) => requestAnimationFrame(() => requestAnimationFrame(() => r(true))))"
+
+
+def selected_profiles(names=None) -> list:
+    """Profiles named in ``names`` (or ``HARNESS_VIEWPORTS``), default all."""
+    if names is None:
+        names = [name.strip() for name in os.environ.get(VIEWPORTS_ENV, "").split(",") if name.strip()]
+    if not names:
+        return list(PROFILES.values())
+    unknown = [name for name in names if name not in PROFILES]
+    if unknown:
+        raise ValueError(f"unknown viewport profile(s): {', '.join(unknown)}; known: {', '.join(PROFILES)}")
+    return [PROFILES[name] for name in names]
+
+
+async def apply_profile(page, cdp, profile, timeout=RELAYOUT_TIMEOUT_MS):
+    """Resize ``page`` to ``profile`` and wait until Flutter has re-laid out."""
+    with span("action", f"viewport({profile.name})"):
+        await page.set_viewport_size({"width": profile.width, "height": profile.height})
+        await cdp.send("Emulation.setDeviceMetricsOverride", profile.metrics())
+    with span("wait", f"viewport.relayout({profile.name})"):
+        await page.wait_for_function(
+            RELAYOUT_JS, arg=[profile.width, profile.height, profile.scale], polling="raf", timeout=timeout
+        )
+        await page.evaluate(NEXT_FRAMES_JS)
+
+
+async def sweep(page, name, check=None, profiles=None) -> list:
+    """Run ``check(page, profile)`` at each profile; returns the profiles that passed.
+
+    Raises ``AssertionError`` naming every profile that failed, after all of
+    them have been tried.
+    """
+    profiles = profiles or selected_profiles()
+    original = page.viewport_size
+    cdp = await page.context.new_cdp_session(page)
+    directory = ARTIFACT_DIR / name
+    directory.mkdir(parents=True, exist_ok=True)
+    passed, failures = [], []
+    try:
+        for profile in profiles:
+            try:
+                await apply_profile(page, cdp, profile)
+                await page.screenshot(path=str(directory / f"{profile.name}.png"))
+                if check:
+                    await check(page, profile)
+            except Exception as exc:
+                detail = str(exc).removeprefix("Test case failed: ")
+                failures.append(f"{profile.name} ({profile.width}x{profile.height}@{profile.scale}x): {detail}")
+            else:
+                passed.append(profile)
+    finally:
+        await cdp.send("Emulation.clearDeviceMetricsOverride")
+        await cdp.detach()
+        if original:
+            await page.set_viewport_size(original)
+    if failures:
+        raise AssertionError(
+            f"Test case failed: {len(failures)} of {len(profiles)} viewports failed:\n  " + "\n  ".join(failures)
+        )
+    return passed
@@ -0,0 +1,302 @@
+"""Compare the Flutter canvas against stored baselines, with NumPy.
+
+TC014 and TC015 looked for success text the app never renders. Flutter web
+paints to a canvas, so the way to check the Zellij background and the MD3
+theme is to look at the pixels::
+
+    from harness.visual import expect_screen
+
+    await expect_screen(page, "TC015_start_screen", palette=["primaryRedDark", "textDark"])
+
+``flutter-view`` is screenshotted and decoded by the browser into a raw
+RGBA buffer. The comparison against ``baselines/<name>.png`` is vectorised:
+
+* a perceptual hash (DCT of a 32x32 greyscale thumbnail) first tells a
+  different screen apart from a changed one;
+* the per-channel delta of every pixel is held against a tolerance mask,
+  ``baselines/<name>.tolerance.png``, recorded from several frames so
+  running animations (the Zellij orbs, shimmers) don't count as changes;
+* each ``palette`` entry names an ``AppTheme`` colour from
+  ``lib/utils/theme.dart``. When the baseline is recorded, a point inside a
+  solid patch of that colour is stored in ``baselines/<name>.json``. Every
+  check samples the same point and expects the theme colour there.
+
+A missing baseline fails the check. Record or refresh baselines with
+``python -m harness --update-baselines TC014 TC015`` (or with
+``HARNESS_UPDATE_BASELINES=1`` set when running a script directly), review
+the PNGs and commit them. Failed checks leave the actual screen and a diff
+image in ``tmp/visual/``.
+
+NumPy is only needed by tests that call into this module.
+"""
+
+import base64
+import json
+import os
+import re
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:  # only the visual checks need it
+    np = None
+
+from . import REPO_DIR, TESTS_DIR, TMP_DIR
+from .profile import span
+
+THEME_PATH = REPO_DIR / "lib" / "utils" / "theme.dart"
+BASELINE_DIR = TESTS_DIR / "baselines"
+ARTIFACT_DIR = TMP_DIR / "visual"
+UPDATE_ENV = "HARNESS_UPDATE_BASELINES"
+
+# Largest per-channel difference (0-255) that still counts as the same pixel.
+CHANNEL_TOLERANCE = 8
+# Share of pixels allowed to differ beyond their tolerance.
+MAX_CHANGED_RATIO = 0.005
+# Perceptual-hash bits (of 64) that may differ before it's another screen.
+MAX_HASH_DISTANCE = 10
+# How close a palette point must be to its AppTheme colour.
+PALETTE_TOLERANCE = 6
+# Pixels of solid colour wanted around a palette point, where there are that many.
+POINT_MARGIN = 4
+# Frames, and the gap between them, used to record a tolerance mask.
+RECORD_FRAMES = 4
+RECORD_INTERVAL_MS = 250
+
+_THEME_COLOR = re.compile(r"static\s+const\s+Color\s+(\w+)\s*=\s*Color\(0x([0-9A-Fa-f]{8})\)")
+
+DECODE_JS = """
+async (png) => {
+  const blob = await (await fetch('data:image/png;base64,' + png)).blob();
+  const bitmap = await createImageBitmap(blob, { colorSpaceConversion: 'none', premultiplyAlpha: 'none' });
+  const canvas = new OffscreenCanvas(bitmap.width, bitmap.height);
+  const ctx = canvas.getContext('2d');
+  ctx.drawImage(bitmap, 0, 0);
+  const data = ctx.getImageData(0, 0, bitmap.width, bitmap.height).data;
+  let binary = '';
+  for (let i = 0; i < data.length; i += 0x8000) {
+    binary += String.fromCharCode.apply(null, data.subarray(i, i + 0x8000));
+  }
+  return [bitmap.width, bitmap.height, btoa(binary)];
+}
+"""
+
+
+def _numpy():
+    if np is None:
+        raise RuntimeError("harness.visual needs NumPy: pip install numpy")
+    return np
+
+
+def theme_colors(path=THEME_PATH) -> dict:
+    """``AppTheme`` colour name -> (r, g, b, a), read from ``theme.dart``."""
+    colors = {}
+    for name, argb in _THEME_COLOR.findall(path.read_text(encoding="utf-8-sig")):
+        value = int(argb, 16)
+        colors[name] = ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF, value >> 24)
+    return colors
+
+
+def encode_png(pixels) -> bytes:
+    """PNG bytes for an (h, w, 4) RGBA or (h, w) greyscale uint8 array."""
+    height, width = pixels.shape[:2]
+    color_type = 6 if pixels.ndim == 3 else 0
+    rows = pixels.reshape(height, -1)
+    raw = _numpy().hstack([np.zeros((height, 1), np.uint8), rows]).tobytes()
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b"")
+
+
+async def decode_png(page, data):
+    """Decode PNG bytes in the browser; returns an (h, w, 4) uint8 array."""
+    width, height, rgba = await page.evaluate(DECODE_JS, base64.b64encode(data).decode("ascii"))
+    return _numpy().frombuffer(base64.b64decode(rgba), np.uint8).reshape(height, width, 4)
+
+
+async def capture(page, selector="flutter-view"):
+    """``selector`` as an RGBA array."""
+    with span("action", "visual.capture"):
+        data = await page.locator(selector).first.screenshot(type="png", animations="disabled")
+        return await decode_png(page, data)
+
+
+def perceptual_hash(pixels) -> int:
+    """64-bit DCT hash of the image's 32x32 greyscale thumbnail."""
+    _numpy()
+    grey = pixels[..., :3].astype(np.float64) @ np.array([0.299, 0.587, 0.114])
+    height, width = (grey.shape[0] // 32) * 32, (grey.shape[1] // 32) * 32
+    thumb = grey[:height, :width].reshape(32, height // 32, 32, width // 32).mean(axis=(1, 3))
+    n = np.arange(32)
+    dct = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / 64)
+    low = (dct @ thumb @ dct.T)[:8, :8].ravel()
+    bits = low > np.median(low[1:])
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def hash_distance(a, b) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _dilate(mask):
+    """Grow a 2-D array by one pixel in every direction (elementwise max)."""
+    padded = np.pad(mask, 1, mode="edge")
+    height, width = mask.shape
+    return np.max(
+        [padded[dy:dy + height, dx:dx + width] for dy in range(3) for dx in range(3)], axis=0
+    )
+
+
+def tolerance_mask(frames):
+    """Per-pixel allowed channel delta: what animation moved, plus the base tolerance."""
+    stack = _numpy().stack([frame[..., :3].astype(np.int16) for frame in frames])
+    spread = (stack.max(axis=0) - stack.min(axis=0)).max(axis=-1)
+    return np.clip(_dilate(spread) + CHANNEL_TOLERANCE, 0, 255).astype(np.uint8)
+
+
+def _erode(mask):
+    return -_dilate(-mask.astype(np.int8)) > 0
+
+
+def palette_point(pixels, rgb):
+    """A pixel inside a solid patch of ``rgb``, away from its edges where possible.
+
+    The match is eroded (up to :data:`POINT_MARGIN` times) and the remaining
+    pixel nearest its centroid is picked, so anti-aliased edges are avoided.
+    """
+    delta = np.abs(pixels[..., :3].astype(np.int16) - np.array(rgb, np.int16)).max(axis=-1)
+    interior = _erode(delta <= PALETTE_TOLERANCE)
+    for _ in range(POINT_MARGIN - 1):
+        eroded = _erode(interior)
+        if not eroded.any():
+            break
+        interior = eroded
+    ys, xs = np.nonzero(interior)
+    if not len(xs):
+        return None
+    nearest = np.argmin((xs - xs.mean()) ** 2 + (ys - ys.mean()) ** 2)
+    return [int(xs[nearest]), int(ys[nearest])]
+
+
+def sample(pixels, point):
+    """Median colour of the 3x3 patch around ``point``."""
+    x, y = point
+    patch = pixels[max(y - 1, 0):y + 2, max(x - 1, 0):x + 2, :3].reshape(-1, 3)
+    return tuple(int(v) for v in np.median(patch, axis=0))
+
+
+@dataclass
+class Comparison:
+    name: str
+    size: tuple
+    baseline_size: tuple
+    hash_distance: int = 0
+    changed_ratio: float = 0.0
+    max_delta: int = 0
+    # (AppTheme name, expected rgb, sampled rgb) for each palette miss.
+    palette_misses: list = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return (
+            self.size == self.baseline_size
+            and self.hash_distance <= MAX_HASH_DISTANCE
+            and self.changed_ratio <= MAX_CHANGED_RATIO
+            and not self.palette_misses
+        )
+
+    def describe(self) -> str:
+        if self.size != self.baseline_size:
+            return "{}: screen is {}x{}, baseline {}x{}".format(self.name, *self.size, *self.baseline_size)
+        problems = []
+        if self.hash_distance > MAX_HASH_DISTANCE:
+            problems.append(f"looks like a different screen (hash distance {self.hash_distance}/64)")
+        if self.changed_ratio > MAX_CHANGED_RATIO:
+            problems.append(f"{self.changed_ratio:.2%} of pixels changed (max delta {self.max_delta})")
+        for name, expected, actual in self.palette_misses:
+            problems.append(f"AppTheme.{name} expected #{bytes(expected).hex()}, found #{bytes(actual).hex()}")
+        return f"{self.name}: " + ("; ".join(problems) or f"matches ({self.elapsed_ms:.0f} ms)")
+
+
+def compare(name, pixels, baseline, tolerance, meta, colors=None) -> Comparison:
+    started = time.perf_counter()
+    _numpy()
+    result = Comparison(name, pixels.shape[1::-1], baseline.shape[1::-1])
+    if result.size == result.baseline_size:
+        result.hash_distance = hash_distance(perceptual_hash(pixels), int(meta["phash"], 16))
+        delta = np.abs(pixels[..., :3].astype(np.int16) - baseline[..., :3]).max(axis=-1)
+        result.changed_ratio = float((delta > tolerance).mean())
+        result.max_delta = int(delta.max())
+        colors = colors or theme_colors()
+        for color_name, point in meta.get("palette", {}).items():
+            expected = colors[color_name][:3]
+            actual = sample(pixels, point)
+            if max(abs(a - b) for a, b in zip(actual, expected)) > PALETTE_TOLERANCE:
+                result.palette_misses.append((color_name, expected, actual))
+    result.elapsed_ms = 1000 * (time.perf_counter() - started)
+    return result
+
+
+def _paths(name, directory=BASELINE_DIR):
+    return directory / f"{name}.png", directory / f"{name}.tolerance.png", directory / f"{name}.json"
+
+
+async def record_baseline(page, name, palette=(), directory=BASELINE_DIR):
+    """Capture ``RECORD_FRAMES`` frames and store the baseline, mask and palette points."""
+    frames = [await capture(page)]
+    for _ in range(RECORD_FRAMES - 1):
+        await page.wait_for_timeout(RECORD_INTERVAL_MS)
+        frames.append(await capture(page))
+    colors = theme_colors()
+    points = {}
+    for color_name in palette:
+        point = palette_point(frames[0], colors[color_name][:3])
+        if point is None:
+            raise AssertionError(f"{name}: AppTheme.{color_name} does not appear on the screen")
+        points[color_name] = point
+    directory.mkdir(parents=True, exist_ok=True)
+    image_path, tolerance_path, meta_path = _paths(name, directory)
+    image_path.write_bytes(encode_png(frames[0]))
+    tolerance_path.write_bytes(encode_png(tolerance_mask(frames)))
+    meta = {"phash": f"{perceptual_hash(frames[0]):016x}", "palette": points}
+    meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    print(f"visual: recorded {image_path}")
+
+
+def _write_artifacts(name, pixels, baseline, tolerance):
+    ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+    (ARTIFACT_DIR / f"{name}.actual.png").write_bytes(encode_png(pixels))
+    if pixels.shape != baseline.shape:
+        return
+    delta = np.abs(pixels[..., :3].astype(np.int16) - baseline[..., :3]).max(axis=-1)
+    diff = (pixels * 0.3).astype(np.uint8)
+    diff[..., 3] = 255
+    diff[delta > tolerance] = (255, 0, 0, 255)
+    (ARTIFACT_DIR / f"{name}.diff.png").write_bytes(encode_png(diff))
+
+
+async def expect_screen(page, name, palette=(), directory=BASELINE_DIR):
+    """Fail unless ``flutter-view`` matches baseline ``name`` and shows ``palette``."""
+    image_path, tolerance_path, meta_path = _paths(name, directory)
+    if os.environ.get(UPDATE_ENV):
+        await record_baseline(page, name, palette, directory)
+        return
+    if not meta_path.exists():
+        raise AssertionError(
+            f"{name}: no baseline in {directory.name}/; record one with --update-baselines"
+        )
+    pixels = await capture(page)
+    baseline = await decode_png(page, image_path.read_bytes())
+    tolerance = (await decode_png(page, tolerance_path.read_bytes()))[..., 0]
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    result = compare(name, pixels, baseline, tolerance, meta)
+    if not result.ok:
+        _write_artifacts(name, pixels, baseline, tolerance)
+        raise AssertionError(f"Test case failed: {result.describe()}")